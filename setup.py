@@ -28,7 +28,6 @@ setup(
     url='https://github.com/facebookresearch/vizseq',
     classifiers=[
         'Intended Audience :: Science/Research',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3 :: Only',
@@ -37,6 +36,7 @@ setup(
     long_description=readme,
     long_description_content_type='text/markdown',
     license='MIT',
+    python_requires='>=3.7',
     setup_requires=[
         'setuptools>=18.0',
     ],
@@ -56,9 +56,21 @@ setup(
         'pandas',
         'soundfile',
         'laserembeddings',
-        'bert-score',
+        'bert-score>=0.3.0',
     ],
+    extras_require={
+        # image thumbnails on the example pages
+        'thumbnails': ['Pillow'],
+        # zstd-compressed data files (`closefd` needs 0.15)
+        'zstd': ['zstandard>=0.15'],
+    },
     packages=find_packages(exclude=['examples', 'tests']),
+    entry_points={
+        'console_scripts': [
+            'vizseq = vizseq.__main__:main',
+            'vizseq-fetch-resources = vizseq.fetch_resources:main',
+        ],
+    },
     package_data={'vizseq': ['_templates/*.html', 'VERSION']},
     test_suite='tests',
     zip_safe=False,
@@ -0,0 +1,118 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os.path as op
+import gzip
+import lzma
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from vizseq._data import compressed
+from vizseq._data.compressed import (get_decoded_path, glob_text_files,
+                                     find_text_files)
+from vizseq._data.line_index import build_line_offsets, load_line_offsets
+from vizseq._data.data_sources import (VizSeqDataSource, VizSeqDataSources,
+                                       VizSeqCompressedTextFileSource,
+                                       VizSeqTextFileSource,
+                                       VizSeqMmapTextFileSource,
+                                       get_name_from_path)
+from vizseq._utils.cache_dir import CACHE_ROOT_ENV
+
+CONTENT = 'a b\n  über c \n\nlast'
+
+
+class VizSeqCompressedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.env = patch.dict('os.environ', {
+            CACHE_ROOT_ENV: op.join(self.root, 'cache')
+        })
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def _write(self, filename: str, content: str = CONTENT) -> str:
+        path = op.join(self.root, filename)
+        _open = lzma.open if path.endswith('.xz') else gzip.open
+        with _open(path, 'wt', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_names(self):
+        self.assertEqual(get_name_from_path('/a/pred_m1.txt.gz'), 'm1')
+        self.assertEqual(get_name_from_path('/a/src_0.txt.zst'), '0')
+        self.assertEqual(get_name_from_path('/a/ref_0.txt'), '0')
+
+    def test_glob(self):
+        self._write('ref_0.txt.gz')
+        self._write('ref_1.txt.xz')
+        with open(op.join(self.root, 'ref_2.txt'), 'w') as f:
+            f.write(CONTENT)
+        self.assertEqual(
+            [op.basename(p) for p in glob_text_files(self.root, 'ref')],
+            ['ref_0.txt.gz', 'ref_1.txt.xz', 'ref_2.txt']
+        )
+        self.assertEqual(find_text_files(self.root, 'ref_1'),
+                         [op.join(self.root, 'ref_1.txt.xz')])
+        self.assertEqual(find_text_files(self.root, 'ref_2'),
+                         [op.join(self.root, 'ref_2.txt')])
+        sources = VizSeqDataSources(glob_text_files(self.root, 'ref'))
+        self.assertEqual(sources.names, ['0', '1', '2'])
+        self.assertEqual(sources.text[0], sources.text[2])
+
+    def test_decoded(self):
+        path = self._write('ref_0.txt.gz')
+        with patch.object(compressed, '_CHUNK_SIZE', 3):
+            decoded_path = get_decoded_path(path)
+        with open(decoded_path, 'rb') as f:
+            buffer = f.read()
+        self.assertEqual(buffer.decode('utf-8'), CONTENT)
+        # the index built while decoding is the one used by memory maps
+        self.assertEqual(load_line_offsets(decoded_path, b'').tolist(),
+                         build_line_offsets(buffer).tolist())
+        self.assertEqual(get_decoded_path(path), decoded_path)
+
+    def test_data_source(self):
+        path = self._write('ref_0.txt.xz')
+        expected = [l.strip() for l in CONTENT.split('\n')]
+        source = VizSeqDataSource('0', path)
+        self.assertIsInstance(source.data_source,
+                              VizSeqCompressedTextFileSource)
+        self.assertEqual(list(source.data_source.data), expected)
+        prev = VizSeqDataSource.DECODED_MMAP_MIN_BYTES
+        VizSeqDataSource.DECODED_MMAP_MIN_BYTES = 0
+        try:
+            source = VizSeqDataSource('0', path)
+        finally:
+            VizSeqDataSource.DECODED_MMAP_MIN_BYTES = prev
+        self.assertEqual(list(source.data_source.data), expected)
+        self.assertEqual(source.data_source.cached([3, 1]), ['last', 'über c'])
+        self.assertTrue(source.is_text)
+
+    def test_line_breaks(self):
+        # only '\n' separates lines, whatever the file size or compression
+        content = 'a\rb\r\nc\u2028d\n\re\x0bf'
+        path = self._write('ref_0.txt.gz', content)
+        plain_path = op.join(self.root, 'ref_1.txt')
+        with open(plain_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        expected = ['a\rb', 'c\u2028d', 'e\x0bf']
+        for source in [
+            VizSeqTextFileSource(plain_path),
+            VizSeqMmapTextFileSource(plain_path),
+            VizSeqCompressedTextFileSource(path),
+            VizSeqCompressedTextFileSource(path, decode_to_cache=True)
+        ]:
+            self.assertEqual(list(source.data), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os.path as op
+import tempfile
+import unittest
+
+from vizseq._data.data_sources import VizSeqDataSources
+
+N_FILES = 12
+
+
+class VizSeqDataSourcesTestCase(unittest.TestCase):
+    def _write(self, root: str, name: str, lines) -> str:
+        path = op.join(root, f'pred_{name}.txt')
+        with open(path, 'w') as f:
+            f.write(''.join(f'{l}\n' for l in lines))
+        return path
+
+    def test_parallel_loading(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = [self._write(root, f'm{i:02d}', [f'{i} a', f'{i} b'])
+                     for i in range(N_FILES)]
+            with self.assertLogs('vizseq._data.data_sources', 'DEBUG') as logs:
+                sources = VizSeqDataSources(paths)
+            self.assertEqual(sources.names,
+                             [f'm{i:02d}' for i in range(N_FILES)])
+            self.assertEqual(sources.text,
+                             [[f'{i} a', f'{i} b'] for i in range(N_FILES)])
+            self.assertEqual(len(logs.output), N_FILES + 1)
+            self.assertTrue(any('pred_m00.txt (2 examples)' in l
+                                for l in logs.output))
+
+    def test_length_mismatch(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = [self._write(root, 'a', ['1', '2']),
+                     self._write(root, 'b', ['1'])]
+            with self.assertRaisesRegex(AssertionError, 'Source b has 1'):
+                VizSeqDataSources(paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+from vizseq._data.data_sources import VizSeqListSource, VizSeqZipFileSource
+from vizseq._data.duration_index import VizSeqDurationIndex
+from vizseq._utils.cache_dir import CACHE_ROOT_ENV
+
+SAMPLE_RATE = 16000
+DURATIONS_MS = [1000, 250, 3210]
+
+
+class VizSeqDurationIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_ROOT_ENV: op.join(self.root, 'cache')}
+        )
+        self.env.start()
+        self.paths = []
+        for i, d in enumerate(DURATIONS_MS):
+            path = op.join(self.root, f'{i}.wav')
+            sf.write(path, np.zeros(SAMPLE_RATE * d // 1000), SAMPLE_RATE)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def _check(self, source):
+        expected_frames = [int(1 + (d - 25) / 10) for d in DURATIONS_MS]
+        self.assertEqual(source.get_len(2, finer=True), DURATIONS_MS[2])
+        self.assertEqual(source.get_lens(finer=True).tolist(), DURATIONS_MS)
+        self.assertEqual(source.get_lens().tolist(), expected_frames)
+        self.assertEqual(source.get_len(1), expected_frames[1])
+
+    def test_files(self):
+        self._check(VizSeqListSource(self.paths))
+        # a new source reads the persisted index instead of probing
+        with mock.patch.object(VizSeqDurationIndex, 'probe') as probe:
+            self._check(VizSeqListSource(self.paths))
+            probe.assert_not_called()
+
+    def test_zip(self):
+        path = op.join(self.root, 'src_0.zip')
+        with zipfile.ZipFile(path, 'w') as zip_f:
+            zip_f.writestr('source.txt', '\n'.join(
+                op.basename(p) for p in self.paths
+            ))
+            for p in self.paths:
+                zip_f.write(p, op.basename(p))
+        self._check(VizSeqZipFileSource(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
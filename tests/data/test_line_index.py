@@ -0,0 +1,84 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import pickle
+import tempfile
+import unittest
+
+from vizseq._data.line_index import VizSeqMmapLines, LINE_INDEX_EXT
+from vizseq._data.data_sources import (VizSeqDataSource,
+                                       VizSeqTextFileSource,
+                                       VizSeqMmapTextFileSource)
+
+
+class VizSeqMmapLinesTestCase(unittest.TestCase):
+    def _write(self, root: str, content: str) -> str:
+        path = op.join(root, 'ref_0.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_lines(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = 'a b\n  über c \n\nlast'
+            path = self._write(root, content)
+            with open(path) as f:
+                expected = [l.strip() for l in f]
+            lines = VizSeqMmapLines(path)
+            self.assertEqual(len(lines), len(expected))
+            self.assertEqual(list(lines), expected)
+            self.assertEqual(lines[1], 'über c')
+            self.assertEqual(lines[-1], 'last')
+            self.assertEqual(lines[1:3], expected[1:3])
+            self.assertEqual(pickle.loads(pickle.dumps(lines))[3], 'last')
+            self.assertTrue(
+                op.exists(op.join(root, f'.ref_0.txt{LINE_INDEX_EXT}'))
+            )
+
+    def test_stale_index(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = self._write(root, 'a\nb\n')
+            self.assertEqual(len(VizSeqMmapLines(path)), 2)
+            path = self._write(root, 'a\nb\nc d\n')
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(list(VizSeqMmapLines(path)), ['a', 'b', 'c d'])
+
+    def test_empty(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.assertEqual(len(VizSeqMmapLines(self._write(root, ''))), 0)
+
+    def test_data_source(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = self._write(root, 'x y z\nw\n')
+            source = VizSeqMmapTextFileSource(path)
+            self.assertTrue(source.is_text)
+            self.assertEqual(source.cached([1, 0]), ['w', 'x y z'])
+            self.assertEqual(source.get_len(0), 3)
+            self.assertEqual(dict(source.vocab)['w'], 1)
+            prev = VizSeqDataSource.MMAP_MIN_BYTES
+            VizSeqDataSource.MMAP_MIN_BYTES = 0
+            try:
+                source = VizSeqDataSource('0', path)
+            finally:
+                VizSeqDataSource.MMAP_MIN_BYTES = prev
+            self.assertIsInstance(source.data_source, VizSeqMmapTextFileSource)
+
+    def test_line_breaks(self):
+        # small and memory-mapped files split lines the same way
+        with tempfile.TemporaryDirectory() as root:
+            path = op.join(root, 'ref_0.txt')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write('a\rb\r\nc\u2028d\n\re')
+            expected = ['a\rb', 'c\u2028d', 'e']
+            self.assertEqual(VizSeqTextFileSource(path).data, expected)
+            self.assertEqual(list(VizSeqMmapLines(path)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import pickle
+import tempfile
+import unittest
+from glob import glob
+
+from vizseq._data import (VizSeqDataSources, VizSeqStats, VizSeqPackedTask,
+                          pack_task)
+from vizseq._view.data_filter import VizSeqFilter
+
+TASK_FILES = {
+    'src_0.txt': ['ein Haus .', 'zwei Häuser', '', 'das Haus ist rot'],
+    'ref_0.txt': ['a house .', 'two houses', 'nothing', 'the house is red'],
+    'ref_1.txt': ['one house', 'two homes', 'none', 'the home is red'],
+    'pred_a.txt': ['a house', 'two house', 'no', 'house is red'],
+    'pred_b.txt': ['house', 'houses', 'nothing', 'the red house'],
+    'tag_0.txt': ['x', 'y', 'x', 'z'],
+}
+
+
+class VizSeqPackedTaskTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        for name, lines in TASK_FILES.items():
+            with open(op.join(self.root, name), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        pack_task(self.root)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _get_text_sources(self, prefix: str, text_merged=False):
+        return VizSeqDataSources(
+            sorted(glob(op.join(self.root, f'{prefix}_*.txt'))),
+            text_merged=text_merged
+        )
+
+    def test_sources(self):
+        packed = VizSeqPackedTask.open(self.root)
+        self.assertIsNotNone(packed)
+        for kind in ['src', 'ref', 'pred']:
+            expected = self._get_text_sources(kind)
+            sources = packed.get_sources(kind)
+            self.assertEqual(sources.names, expected.names)
+            self.assertEqual([list(t) for t in sources.text], expected.text)
+            self.assertEqual(sources.cached([3, 1]), expected.cached([3, 1]))
+        self.assertEqual(packed.get_sources('pred', names=['b']).names, ['b'])
+        self.assertIsNone(packed.get_sources('pred', names=['c']))
+        tags = packed.get_sources('tag', text_merged=True)
+        self.assertEqual(tags.text, [['x'], ['y'], ['x'], ['z']])
+        names, indptr, indices = packed.get_tags()
+        self.assertEqual([names[i] for i in indices], ['x', 'y', 'x', 'z'])
+        self.assertEqual(indptr.tolist(), [0, 1, 2, 3, 4])
+
+        lines = packed.get_sources('ref').data[0].data_source.data
+        self.assertEqual(list(pickle.loads(pickle.dumps(lines))),
+                         TASK_FILES['ref_0.txt'])
+
+    def test_stats_and_filter(self):
+        packed = VizSeqPackedTask.open(self.root)
+        src, ref = packed.get_sources('src'), packed.get_sources('ref')
+        tags = packed.get_sources('tag', text_merged=True)
+        self.assertEqual(
+            VizSeqStats.get(src, ref, tags),
+            VizSeqStats.get(self._get_text_sources('src'),
+                            self._get_text_sources('ref'),
+                            self._get_text_sources('tag', text_merged=True))
+        )
+        text_ref = self._get_text_sources('ref')
+        for query in ['house', 'red', 'Haus', 'no', 'missing', 's\nt']:
+            self.assertEqual(VizSeqFilter.filter(ref.text, query),
+                             VizSeqFilter.filter(text_ref.text, query))
+
+    def test_stale(self):
+        path = op.join(self.root, 'pred_a.txt')
+        with open(path, 'a') as f:
+            f.write('')
+        os.utime(path, ns=(0, 0))
+        self.assertIsNone(VizSeqPackedTask.open(self.root))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from vizseq._data import search_index
+from vizseq._data.search_index import VizSeqSearchIndex
+from vizseq._view.data_filter import VizSeqFilter
+from vizseq._utils.cache_dir import CACHE_ROOT_ENV
+
+CHARS = 'abc über'
+
+
+def _get_random_data(n_columns: int, n_examples: int):
+    random.seed(0)
+    return [
+        [''.join(random.choice(CHARS) for _ in range(random.randint(0, 12)))
+         for _ in range(n_examples)]
+        for _ in range(n_columns)
+    ]
+
+
+class VizSeqSearchIndexTestCase(unittest.TestCase):
+    def _test_queries(self, data, index):
+        random.seed(1)
+        queries = ['a', 'ü', 'b ', 'ab', 'abc', 'üb', 'cab a', 'x', 'aaaa',
+                   '\n', ' ']
+        for _ in range(300):
+            n = random.randint(1, 6)
+            queries.append(''.join(random.choice(CHARS) for _ in range(n)))
+        for q in queries:
+            self.assertEqual(index.find(q, data),
+                             VizSeqFilter.filter(data, q), q)
+
+    def test_find(self):
+        for n_columns in [1, 3]:
+            data = _get_random_data(n_columns, 500)
+            self._test_queries(data, VizSeqSearchIndex.build(data))
+
+    def test_chunks(self):
+        data = _get_random_data(2, 500)
+        with patch.object(search_index, '_CHUNK_SIZE', 64):
+            index = VizSeqSearchIndex.build(data)
+        self._test_queries(data, index)
+
+    def test_empty(self):
+        index = VizSeqSearchIndex.build([['', '']])
+        self.assertEqual(index.find('a', [['', '']]), [])
+        self.assertEqual(index.find('', [['', '']]), [0, 1])
+
+    def test_persisted(self):
+        data = _get_random_data(2, 200)
+        with tempfile.TemporaryDirectory() as root, \
+                patch.dict('os.environ', {CACHE_ROOT_ENV: root}):
+            self.assertIsNone(VizSeqSearchIndex.get('k', lambda: data))
+            VizSeqSearchIndex.wait()
+            self.assertTrue(op.isdir(op.join(root, 'search_index', 'k')))
+            index = VizSeqSearchIndex.get('k', lambda: data)
+            self.assertIsNotNone(index)
+            self._test_queries(data, index)
+            VizSeqSearchIndex._loaded.clear()
+
+    def test_prune(self):
+        data = _get_random_data(2, 20)
+        with tempfile.TemporaryDirectory() as root, \
+                patch.dict('os.environ', {CACHE_ROOT_ENV: root}):
+            for key in ['v1', 'v2']:
+                VizSeqSearchIndex.get(key, lambda: data, group='task')
+                VizSeqSearchIndex.get(key, lambda: data, group='other')
+                VizSeqSearchIndex.wait()
+            # only the latest index of each group is kept
+            self.assertEqual(
+                sorted(os.listdir(op.join(root, 'search_index'))),
+                ['other.v2', 'task.v2']
+            )
+            index = VizSeqSearchIndex.get('v2', lambda: data, group='task')
+            self._test_queries(data, index)
+            VizSeqSearchIndex._loaded.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
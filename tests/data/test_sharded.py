@@ -0,0 +1,107 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os.path as op
+import gzip
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from vizseq._data import sharded
+from vizseq._data.sharded import VizSeqShardedLines, group_shard_paths
+from vizseq._data.data_sources import (VizSeqDataSources,
+                                       VizSeqShardedTextFileSource)
+from vizseq._utils.cache_dir import CACHE_ROOT_ENV
+from vizseq.scorers import get_scorer
+
+SHARDS = [['a b c', 'd e'], [], ['f', 'g h i', 'j']]
+
+
+class VizSeqShardedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.env = patch.dict('os.environ', {
+            CACHE_ROOT_ENV: op.join(self.root, 'cache')
+        })
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def _write(self, stem: str, shards=SHARDS):
+        paths = []
+        for i, lines in enumerate(shards):
+            path = op.join(self.root, f'{stem}.part-{i:05d}.txt')
+            _open = open
+            if i == 0:
+                path, _open = path + '.gz', gzip.open
+            with _open(path, 'wt', encoding='utf-8') as f:
+                f.write(''.join(l + '\n' for l in lines))
+            paths.append(path)
+        return paths
+
+    def test_group_shard_paths(self):
+        paths = ['/d/ref_1.txt', '/d/ref_0.part-00010.txt',
+                 '/d/ref_0.part-00002.txt.gz']
+        grouped, shards = group_shard_paths(paths)
+        self.assertEqual(grouped, ['/d/ref_1.txt', '/d/ref_0.txt'])
+        self.assertEqual(shards['/d/ref_0.txt'],
+                         ['/d/ref_0.part-00002.txt.gz',
+                          '/d/ref_0.part-00010.txt'])
+
+    def test_lines(self):
+        paths = self._write('ref_0')
+        expected = [l for s in SHARDS for l in s]
+        lines = VizSeqShardedLines(paths)
+        self.assertEqual(lines.offsets.tolist(), [0, 2, 2, 5])
+        self.assertEqual(len(lines), len(expected))
+        self.assertEqual(lines[2], 'f')
+        self.assertEqual(lines[-1], 'j')
+        # only the shard of the requested line is opened
+        self.assertEqual([s is not None for s in lines._shards],
+                         [False, False, True])
+        self.assertEqual(list(lines), expected)
+        self.assertEqual(lines[1:4], expected[1:4])
+        self.assertEqual(list(pickle.loads(pickle.dumps(lines))), expected)
+        self.assertEqual(list(lines.select_shards(1, 3)), expected[2:])
+        # the global offset table is persisted
+        with patch.object(sharded, '_count_lines') as count_lines:
+            self.assertEqual(VizSeqShardedLines(paths).offsets.tolist(),
+                             [0, 2, 2, 5])
+            count_lines.assert_not_called()
+
+    def test_data_sources(self):
+        paths = self._write('ref_0')
+        with open(op.join(self.root, 'ref_1.txt'), 'w') as f:
+            f.write('1\n2\n3\n4\n5\n')
+        sources = VizSeqDataSources(paths + [op.join(self.root, 'ref_1.txt')])
+        self.assertEqual(sources.names, ['0', '1'])
+        self.assertIsInstance(sources.data[0].data_source,
+                              VizSeqShardedTextFileSource)
+        self.assertEqual(sources.cached([1, 4]), [['d e', 'j'], ['2', '5']])
+
+    def test_shard_parallel_scoring(self):
+        hypo = VizSeqShardedLines(self._write('pred_0'))
+        ref = VizSeqShardedLines(self._write('ref_0', shards=[
+            [' '.join(reversed(l.split())) for l in s] for s in SHARDS
+        ]))
+        scorer = get_scorer('bleu')(corpus_level=False, sent_level=True,
+                                    n_workers=2)
+        batches = scorer._batch_shards(hypo, [ref], n_batches=2)
+        self.assertEqual([len(h) for h, _ in batches], [2, 3])
+        scores = scorer.score(hypo, [ref]).sent_scores
+        expected = get_scorer('bleu')(corpus_level=False, sent_level=True,
+                                      n_workers=1).score(list(hypo),
+                                                         [list(ref)])
+        self.assertEqual(scores, expected.sent_scores)
+
+
+if __name__ == '__main__':
+    unittest.main()
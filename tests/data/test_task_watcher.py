@@ -0,0 +1,114 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from vizseq._data.task_watcher import VizSeqTaskWatcher, get_file_group
+from vizseq._view import mem_cached_data_getters as getters
+
+
+class VizSeqTaskWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.env = patch.dict('os.environ', {
+            'VIZSEQ_CACHE_ROOT': op.join(self.root, '.cache')
+        })
+        self.env.start()
+        for name, lines in [('src_0.txt', 'a\nb\n'), ('ref_0.txt', 'c\nd\n'),
+                            ('pred_x.txt', 'c\nx\n'), ('pred_y.txt', 'c\ny\n')]:
+            self._write(name, lines)
+        getters._clear_caches()
+
+    def tearDown(self):
+        getters._clear_caches()
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def _write(self, name: str, content: str, mtime_ns: int = None):
+        path = op.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_file_group(self):
+        self.assertEqual(get_file_group('src_0.zip'), 'src')
+        self.assertEqual(get_file_group('pred_m.1.txt.gz'), 'pred_m.1')
+        self.assertEqual(get_file_group('pred_m.part-00003.txt'), 'pred_m')
+        self.assertEqual(get_file_group('task.vizseq'), 'packed')
+        self.assertIsNone(get_file_group('.ref_0.txt.lidx.npy'))
+        self.assertIsNone(get_file_group('README.md'))
+
+    def _test_invalidation(self):
+        versions = dict(VizSeqTaskWatcher.get_versions(self.root))
+        ref = getters._get_ref(self.root)
+        self.assertEqual(getters._get_hypo(self.root, ['x']).text,
+                         [['c', 'x']])
+        hypo_y = getters._get_hypo(self.root, ['y'])
+        self._write('pred_x.txt', 'c\nz\n', mtime_ns=1)
+        new_versions = VizSeqTaskWatcher.get_versions(self.root)
+        self.assertEqual(
+            {g for g in versions if versions[g] != new_versions[g]},
+            {'pred_x'}
+        )
+        self.assertEqual(getters._get_hypo(self.root, ['x']).text,
+                         [['c', 'z']])
+        # other caches are kept
+        self.assertIs(getters._get_ref(self.root), ref)
+        self.assertIs(getters._get_hypo(self.root, ['y']), hypo_y)
+
+    def test_polling(self):
+        with patch.object(VizSeqTaskWatcher, 'is_inotify_available',
+                          return_value=False), \
+                patch.object(VizSeqTaskWatcher, 'POLL_INTERVAL', 0):
+            self._test_invalidation()
+
+    @unittest.skipUnless(VizSeqTaskWatcher.is_inotify_available(),
+                         'inotify_simple is not installed')
+    def test_inotify(self):
+        with patch.object(VizSeqTaskWatcher, 'POLL_INTERVAL', 3600):
+            self._test_invalidation()
+
+    def test_invalidate(self):
+        with patch.object(VizSeqTaskWatcher, 'is_inotify_available',
+                          return_value=False), \
+                patch.object(VizSeqTaskWatcher, 'POLL_INTERVAL', 3600):
+            versions = dict(VizSeqTaskWatcher.get_versions(self.root))
+            # same size and mtime: not seen by a rescan
+            self._write('pred_x.txt', 'c\nz\n', mtime_ns=1)
+            VizSeqTaskWatcher.get_versions(self.root)
+            self._write('pred_x.txt', 'c\nw\n', mtime_ns=1)
+            self.assertEqual(VizSeqTaskWatcher.get_versions(self.root),
+                             versions)
+            VizSeqTaskWatcher.invalidate(self.root, 'pred_x')
+            new_versions = VizSeqTaskWatcher.get_versions(self.root)
+            self.assertEqual(
+                {g for g in versions if versions[g] != new_versions[g]},
+                {'pred_x'}
+            )
+            self.assertEqual(getters._get_hypo(self.root, ['x']).text,
+                             [['c', 'w']])
+
+    def test_data_version(self):
+        version = VizSeqTaskWatcher.get_data_version(self.root)
+        self._write('.ref_0.txt.lidx.npy', '')
+        VizSeqTaskWatcher.reset()
+        self.assertEqual(VizSeqTaskWatcher.get_data_version(self.root),
+                         version)
+        self._write('tag_0.txt', 't\nt\n')
+        VizSeqTaskWatcher.reset()
+        self.assertNotEqual(VizSeqTaskWatcher.get_data_version(self.root),
+                            version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+import os
+import tempfile
+
+from vizseq._data.tokenizers import (VizSeqTokenization, VizSeqTokenizer,
+                                     VizSeqTokenizationCache)
+from vizseq._data.data_sources import (VizSeqDataSource,
+                                       VizSeqMmapTextFileSource)
+
+
+class VizSeqTokenizationCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lines = ['Hello, world!', 'It costs $3.50.', '']
+
+    def test_tokenize(self):
+        expected = [
+            VizSeqTokenizer.tokenize_line(l, VizSeqTokenization.mteval_13a)
+            for l in self.lines
+        ]
+        self.assertEqual(expected[0], 'Hello , world !')
+        tokenized = VizSeqTokenizer.tokenize(
+            self.lines, VizSeqTokenization.mteval_13a, n_workers=1
+        )
+        self.assertEqual(tokenized, expected)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            cache = VizSeqTokenizationCache(root=root)
+            first = cache.get(self.lines, VizSeqTokenization.mteval_13a)
+            self.assertEqual(len(os.listdir(root)), 1)
+            second = cache.get(self.lines, VizSeqTokenization.mteval_13a)
+            self.assertEqual(first, second)
+            _ = cache.get(self.lines, VizSeqTokenization.char)
+            self.assertEqual(len(os.listdir(root)), 2)
+            self.assertIs(
+                cache.get(self.lines, VizSeqTokenization.none), self.lines
+            )
+
+    def test_cache_line_breaks(self):
+        lines = ['a\rb', 'c d', 'e\x0bf', 'g']
+        with tempfile.TemporaryDirectory() as root:
+            cache = VizSeqTokenizationCache(root=root)
+            path = cache.get_path(lines, VizSeqTokenization.char)
+            mtime = os.stat(path).st_mtime_ns
+            tokenized = cache.get(lines, VizSeqTokenization.char)
+            self.assertEqual(len(tokenized), len(lines))
+            # the cache file is valid and is not rewritten
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+    def test_data_source_tokenize(self):
+        with tempfile.TemporaryDirectory() as root:
+            cache = VizSeqTokenizationCache(root=root)
+            source = VizSeqDataSource('src', list(self.lines))
+            tokenized = source.tokenize(VizSeqTokenization.mteval_13a, cache)
+            self.assertIsInstance(tokenized.data_source,
+                                  VizSeqMmapTextFileSource)
+            self.assertEqual(
+                list(tokenized.text),
+                cache.get(self.lines, VizSeqTokenization.mteval_13a)
+            )
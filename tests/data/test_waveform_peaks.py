@@ -0,0 +1,56 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os.path as op
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+from vizseq._aligners.speech_aligner import VizSeqSpeechToTextAligner
+from vizseq._data.data_sources import VizSeqDataSource
+from vizseq._data.waveform_peaks import VizSeqWaveformPeaks
+
+
+class VizSeqWaveformPeaksTestCase(unittest.TestCase):
+    def test_envelope(self):
+        sound = np.concatenate([np.full(50, 0.5), np.full(50, -1.)])
+        peaks = VizSeqSpeechToTextAligner.get_peak_envelope(sound, 3)
+        self.assertEqual(peaks.dtype, np.int8)
+        self.assertEqual(peaks.tolist(), [[64, 64], [-127, 64], [-127, -127]])
+        # shorter than the number of points
+        self.assertEqual(
+            VizSeqSpeechToTextAligner.get_peak_envelope(sound[:2], 4).shape,
+            (4, 2)
+        )
+        self.assertEqual(VizSeqSpeechToTextAligner.get_peak_envelope(
+            np.zeros(0), 3).tolist(), [[0, 0]] * 3)
+
+    def test_build_and_get(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = []
+            for i in range(3):
+                path = op.join(root, f'{i}.wav')
+                sf.write(path, np.sin(np.arange(8000) / (i + 1)) * 0.5, 8000)
+                paths.append(path)
+            source = VizSeqDataSource('0', paths)
+            peaks = VizSeqWaveformPeaks(n_points=100, root=root)
+            on_the_fly = peaks.get(source, [2, 0])
+            self.assertEqual(on_the_fly.shape, (2, 100, 2))
+            self.assertIsNone(peaks.load(source))
+            built = peaks.build(source)
+            np.testing.assert_array_equal(built[[2, 0]], on_the_fly)
+            with mock.patch.object(VizSeqWaveformPeaks, 'compute') as compute:
+                np.testing.assert_array_equal(peaks.get(source, [1]),
+                                              built[[1]])
+                compute.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import base64
+import os
+import os.path as op
+import tempfile
+import unittest
+import zipfile
+
+from vizseq._data.data_sources import VizSeqZipFileSource
+from vizseq._data.zip_handles import VizSeqZipHandlePool
+
+
+class VizSeqZipHandlePoolTestCase(unittest.TestCase):
+    def _write_zip(self, path: str, n: int, suffix: bytes = b''):
+        with zipfile.ZipFile(path, 'w') as zip_f:
+            names = [f'{i}.png' for i in range(n)]
+            zip_f.writestr('source.txt', '\n'.join(names))
+            for i, name in enumerate(names):
+                zip_f.writestr(name, str(i).encode('utf-8') + suffix)
+
+    def test_pool(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = op.join(root, 'src_0.zip')
+            self._write_zip(path, 50)
+            with VizSeqZipHandlePool.open(path) as zip_f:
+                first = zip_f
+            with VizSeqZipHandlePool.open(path) as zip_f:
+                self.assertIs(zip_f, first)
+                # a concurrent user gets another handle
+                with VizSeqZipHandlePool.open(path) as other:
+                    self.assertIsNot(other, zip_f)
+            members = [f'{i}.png' for i in range(50)]
+            self.assertEqual(VizSeqZipHandlePool.read_all(path, members),
+                             [str(i).encode('utf-8') for i in range(50)])
+
+            self._write_zip(path, 50, suffix=b'!')
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(VizSeqZipHandlePool.read(path, '3.png'), b'3!')
+            VizSeqZipHandlePool.close_all()
+
+    def test_source(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = op.join(root, 'src_0.zip')
+            self._write_zip(path, 20)
+            source = VizSeqZipFileSource(path)
+            cached = source.cached([5, 2])
+            self.assertEqual(
+                cached[0], 'data:image/png;base64,' +
+                base64.b64encode(b'5').decode('utf-8')
+            )
+            self.assertEqual(source.get_media_info(7).size, 1)
+            with source.get_media_info(12).open() as f:
+                self.assertEqual(f.read(), b'12')
+            VizSeqZipHandlePool.close_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,8 @@ class VizSeqIpynbCoreTestCase(VizSeqIpynbTestCase):
 
     def test_view_examples(self):
         _ = view_examples(self.source, self.references, self.hypothesis)
+        _ = view_examples(self.source, self.references, self.hypothesis,
+                          sorting_metric='bleu:hypo', top_k=5)
 
     def test_view_scores(self):
         _ = view_scores(self.references, self.hypothesis, ['bleu'])
@@ -5,10 +5,28 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import numpy as np
+
 from . import VizSeqScorerTestCase
-from vizseq.scorers.bert_score import BERTScoreScorer
+from vizseq.scorers.bert_score import BERTScoreScorer, _greedy_match
 
 
 class BERTScoreScorerTestCase(VizSeqScorerTestCase):
     def test(self):
         return self._test_embedding_based(BERTScoreScorer)
+
+    def test_greedy_match(self):
+        tokens = np.random.rand(5, 8)
+        idf = np.array([[0.], [1.], [1.], [1.], [0.]])
+        hypo = np.concatenate([tokens, idf], axis=1)
+        self.assertAlmostEqual(_greedy_match(hypo, hypo), 1., places=5)
+        # matches on zero-weighted (special) tokens do not count
+        ref = np.concatenate([tokens[[0, 4]], idf[[1, 2]]], axis=1)
+        self.assertLess(_greedy_match(hypo, ref), 1.)
+
+    def test_greedy_match_empty(self):
+        # an empty sentence only has [CLS] and [SEP], both with zero weight
+        empty = np.concatenate([np.random.rand(2, 8), np.zeros((2, 1))], axis=1)
+        hypo = np.concatenate([np.random.rand(3, 8), np.ones((3, 1))], axis=1)
+        self.assertEqual(_greedy_match(empty, hypo), 0.)
+        self.assertEqual(_greedy_match(hypo, empty), 0.)
@@ -0,0 +1,35 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+from vizseq.scorers._embedding_batching import (get_length_buckets,
+                                                VizSeqEmbeddingBatcher)
+
+
+class EmbeddingBatchingTestCase(unittest.TestCase):
+    def test_buckets(self):
+        lengths = [5, 100, 3, 50, 5, 4, 100]
+        buckets = get_length_buckets(lengths, max_tokens=200)
+        self.assertEqual(sorted(i for b in buckets for i in b),
+                         list(range(len(lengths))))
+        for b in buckets:
+            self.assertTrue(
+                len(b) == 1 or len(b) * max(lengths[i] for i in b) <= 200
+            )
+        # similar lengths end up together
+        self.assertEqual(buckets[0], [2, 5, 0, 4])
+
+    def test_run_keeps_order(self):
+        lengths = [7, 1, 30, 2, 9]
+        batcher = VizSeqEmbeddingBatcher(max_tokens=16)
+        outputs = batcher.run(lengths, lambda b: [lengths[i] * 10 for i in b])
+        self.assertEqual(outputs, [l * 10 for l in lengths])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,8 @@
 #
 
 from . import VizSeqScorerTestCase
-from vizseq.scorers.laser import LaserScorer
+from vizseq.scorers.laser import LaserScorer, _embed, LASER_EMBEDDING_DIM
+from vizseq.scorers._embedding_batching import VizSeqEmbeddingBatcher
 
 
 class LaserScorerTestCase(VizSeqScorerTestCase):
@@ -14,3 +15,7 @@ class LaserScorerTestCase(VizSeqScorerTestCase):
         return self._test_embedding_based(
             LaserScorer, extra_args={'laser_trg_lang': 'de'}
         )
+
+    def test_embed_empty(self):
+        embeddings = _embed([], 'en', 'float32', VizSeqEmbeddingBatcher())
+        self.assertEqual(embeddings.shape, (0, LASER_EMBEDDING_DIM))
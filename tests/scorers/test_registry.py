@@ -0,0 +1,45 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+import subprocess
+import sys
+import json
+
+from vizseq.scorers import (get_scorer, get_scorer_ids, get_scorer_name,
+                            SCORER_MANIFEST)
+
+HEAVY_MODULES = [
+    'sacrebleu', 'nltk', 'rouge', 'matplotlib', 'IPython', 'pandas',
+    'google.cloud.translate', 'laserembeddings', 'bert_score', 'torch'
+]
+# cold start budget (seconds) for `import vizseq; import vizseq.scorers`
+MAX_IMPORT_TIME = 2.0
+
+
+class VizSeqScorerRegistryTestCase(unittest.TestCase):
+    def test_manifest(self):
+        self.assertEqual(
+            sorted(get_scorer_ids()), sorted(set(get_scorer_ids()))
+        )
+        for scorer_id, (_, scorer_name) in SCORER_MANIFEST.items():
+            self.assertIn(scorer_id, get_scorer_ids())
+            self.assertEqual(get_scorer_name(scorer_id), scorer_name)
+        self.assertEqual(get_scorer('bleu').__name__, 'BLEUScorer')
+
+    def test_import_time(self):
+        code = (
+            'import time, sys, json; start = time.time(); import vizseq; '
+            'import vizseq.scorers; vizseq.scorers.get_scorer_ids_and_names(); '
+            'elapsed = time.time() - start; '
+            f'heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]; '
+            'print(json.dumps({"elapsed": elapsed, "heavy": heavy}))'
+        )
+        output = subprocess.check_output([sys.executable, '-c', code])
+        result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        self.assertEqual(result['heavy'], [])
+        self.assertLess(result['elapsed'], MAX_IMPORT_TIME)
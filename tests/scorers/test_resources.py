@@ -0,0 +1,32 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+import subprocess
+import sys
+
+from vizseq._utils.resources import VizSeqResourceManager
+
+
+class VizSeqResourceManagerTestCase(unittest.TestCase):
+    def test_no_download_on_import(self):
+        code = (
+            'import nltk, urllib.request\n'
+            'def _fail(*args, **kwargs): raise AssertionError("network")\n'
+            'nltk.download = _fail\n'
+            'urllib.request.urlopen = _fail\n'
+            'import vizseq.scorers.rouge, vizseq.scorers.meteor\n'
+            'import vizseq.scorers.laser\n'
+        )
+        subprocess.check_call([sys.executable, '-c', code])
+
+    def test_require(self):
+        with self.assertRaises(ValueError):
+            VizSeqResourceManager.require('unknown_resource')
+        if not VizSeqResourceManager.is_available('laser'):
+            with self.assertRaises(FileNotFoundError):
+                VizSeqResourceManager.require('laser')
@@ -0,0 +1,77 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from vizseq._utils.worker_pool import VizSeqWorkerPool, _init_worker
+from vizseq.scorers.bleu import _get_sent_bleu
+
+N_CALLS = 5
+N_WORKERS = 2
+# loose bound on the per-call time with warm workers relative to a new pool
+# per call (usually well below 0.5)
+MAX_WARM_COLD_RATIO = 2.
+MODULES = ('vizseq.scorers.bleu', 'sacrebleu')
+
+
+def _call(executor: ProcessPoolExecutor):
+    hypo, ref = ['a b c d'] * 4, [['a b c e'] * 4]
+    futures = [
+        executor.submit(_get_sent_bleu, hypo, ref) for _ in range(N_WORKERS)
+    ]
+    return [f.result() for f in futures]
+
+
+def _get_pids(executor: ProcessPoolExecutor):
+    futures = [executor.submit(os.getpid) for _ in range(4 * N_WORKERS)]
+    return {f.result() for f in futures}
+
+
+class VizSeqWorkerPoolTestCase(unittest.TestCase):
+    def test_reuse(self):
+        with ProcessPoolExecutor(
+                max_workers=N_WORKERS, initializer=_init_worker,
+                initargs=(MODULES, ())
+        ) as executor:
+            expected = _call(executor)
+
+        executor = VizSeqWorkerPool.get(N_WORKERS, modules=MODULES)
+        pids = _get_pids(executor)
+        for _ in range(N_CALLS):
+            self.assertIs(
+                VizSeqWorkerPool.get(N_WORKERS, modules=MODULES), executor
+            )
+            self.assertEqual(_call(executor), expected)
+            pids |= _get_pids(executor)
+        # the same workers serve every call
+        self.assertLessEqual(len(pids), N_WORKERS)
+        self.assertIs(VizSeqWorkerPool.get(1, modules=MODULES), executor)
+
+    def test_per_call_overhead(self):
+        # before: a new pool (and fresh module imports) for every call
+        start = time.time()
+        for _ in range(N_CALLS):
+            with ProcessPoolExecutor(
+                    max_workers=N_WORKERS, initializer=_init_worker,
+                    initargs=(MODULES, ())
+            ) as executor:
+                cold_result = _call(executor)
+        time_cold = (time.time() - start) / N_CALLS
+
+        # after: warm workers are reused across calls
+        _ = _call(VizSeqWorkerPool.get(N_WORKERS, modules=MODULES))
+        start = time.time()
+        for _ in range(N_CALLS):
+            executor = VizSeqWorkerPool.get(N_WORKERS, modules=MODULES)
+            warm_result = _call(executor)
+        time_warm = (time.time() - start) / N_CALLS
+
+        self.assertEqual(cold_result, warm_result)
+        self.assertLess(time_warm, time_cold * MAX_WARM_COLD_RATIO)
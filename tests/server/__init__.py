@@ -0,0 +1,60 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import tempfile
+from typing import List
+from unittest import mock
+
+from tornado.testing import AsyncHTTPTestCase
+
+from vizseq import server
+from vizseq._data import VizSeqTaskWatcher
+from vizseq._view import mem_cached_data_getters
+
+
+class VizSeqServerTestCase(AsyncHTTPTestCase):
+    """Server tests on a task `task` in a temporary data root (with its own
+    cache directory). Subclasses write the task files in
+    `_write_task_files`."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.task_dir = op.join(self.tmp_dir.name, 'task')
+        os.makedirs(self.task_dir)
+        self.patches = [
+            mock.patch.object(server.args, 'data_root', self.tmp_dir.name),
+            mock.patch.dict(os.environ, {
+                'VIZSEQ_CACHE_ROOT': op.join(self.tmp_dir.name, 'c')
+            }),
+            mock.patch.object(VizSeqTaskWatcher, 'POLL_INTERVAL', 0),
+        ]
+        for p in self.patches:
+            p.start()
+        self._write_task_files()
+        mem_cached_data_getters._clear_caches()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        for p in self.patches:
+            p.stop()
+        mem_cached_data_getters._clear_caches()
+        self.tmp_dir.cleanup()
+
+    def get_app(self):
+        return server.make_app()
+
+    def _write_task_files(self):
+        pass
+
+    def _write(self, name: str, content: str):
+        with open(op.join(self.task_dir, name), 'w') as f:
+            f.write(content)
+
+    def _write_lines(self, name: str, lines: List[str]):
+        self._write(name, '\n'.join(lines) + '\n')
@@ -0,0 +1,107 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import io
+import os.path as op
+import zipfile
+
+from PIL import Image
+
+from . import VizSeqServerTestCase
+
+
+def _get_png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color=(200, 10, 10)).save(
+        buffer, format='PNG'
+    )
+    return buffer.getvalue()
+
+
+IMAGES = {
+    'a.png': _get_png(1000, 500), 'b.png': _get_png(100, 80),
+    'c.png': _get_png(100, 80)[:40]
+}
+
+
+class MediaHandlerTestCase(VizSeqServerTestCase):
+    def _write_task_files(self):
+        with zipfile.ZipFile(op.join(self.task_dir, 'src_0.zip'), 'w') as f:
+            f.writestr('source.txt', '\n'.join(IMAGES))
+            for name, content in IMAGES.items():
+                f.writestr(name, content)
+        self._write('ref_0.txt', 'image a\nimage b\nimage c\n')
+
+    def test_full_and_cached(self):
+        response = self.fetch('/media?t=task&s=0&i=0')
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.body, IMAGES['a.png'])
+        self.assertEqual(response.headers['Content-Type'], 'image/png')
+        etag = response.headers['ETag']
+        response = self.fetch(
+            '/media?t=task&s=0&i=0', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.code, 304)
+        response = self.fetch(
+            '/media?t=task&s=0&i=0',
+            headers={'If-Modified-Since': response.headers['Last-Modified']}
+        )
+        self.assertEqual(response.code, 304)
+
+    def test_range(self):
+        response = self.fetch(
+            '/media?t=task&s=0&i=0', headers={'Range': 'bytes=10-19'}
+        )
+        self.assertEqual(response.code, 206)
+        self.assertEqual(response.body, IMAGES['a.png'][10:20])
+        self.assertEqual(response.headers['Content-Range'],
+                         f'bytes 10-19/{len(IMAGES["a.png"])}')
+        response = self.fetch(
+            '/media?t=task&s=0&i=1', headers={'Range': 'bytes=-4'}
+        )
+        self.assertEqual(response.body, IMAGES['b.png'][-4:])
+        response = self.fetch(
+            '/media?t=task&s=0&i=1', headers={'Range': 'bytes=10000-'}
+        )
+        self.assertEqual(response.code, 416)
+
+    def test_not_found(self):
+        self.assertEqual(self.fetch('/media?t=task&s=0&i=5').code, 404)
+        self.assertEqual(self.fetch('/media?t=task&s=1&i=0').code, 404)
+
+    def test_bad_index(self):
+        self.assertEqual(self.fetch('/media?t=task&s=0').code, 400)
+        self.assertEqual(self.fetch('/media?t=task&s=0&i=a').code, 400)
+        self.assertEqual(self.fetch('/media?t=task&s=0&i=-1').code, 400)
+
+    def test_thumbnails(self):
+        from vizseq._view import VizSeqWebView
+        page_data = VizSeqWebView(self.tmp_dir.name, 'task').get_page_data()
+        url = page_data.cur_src[0][0]
+        self.assertTrue(url.startswith('/media?t=task&s=0&i=0&w=320&v='))
+        response = self.fetch(url)
+        self.assertEqual(response.code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertEqual(Image.open(io.BytesIO(response.body)).size,
+                         (320, 160))
+        # small images are not upscaled
+        response = self.fetch('/media?t=task&s=0&i=1&w=640')
+        self.assertEqual(Image.open(io.BytesIO(response.body)).size,
+                         (100, 80))
+        self.assertEqual(self.fetch('/media?t=task&s=0&i=1&w=1').code, 400)
+
+    def test_thumbnail_version(self):
+        response = self.fetch('/media?t=task&s=0&i=0&w=320&v=0')
+        self.assertEqual(response.code, 200)
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+
+    def test_corrupt_image(self):
+        # served as it is
+        response = self.fetch('/media?t=task&s=0&i=2&w=320&v=0')
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.body, IMAGES['c.png'])
+        self.assertEqual(response.headers['Content-Type'], 'image/png')
@@ -0,0 +1,37 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import io
+import json
+import os.path as op
+import zipfile
+
+import numpy as np
+import soundfile as sf
+
+from . import VizSeqServerTestCase
+
+
+class PeaksHandlerTestCase(VizSeqServerTestCase):
+    def _write_task_files(self):
+        with zipfile.ZipFile(op.join(self.task_dir, 'src_0.zip'), 'w') as f:
+            f.writestr('source.txt', 'a.wav\nb.wav')
+            for name, amplitude in [('a.wav', 0.5), ('b.wav', 1.)]:
+                buffer = io.BytesIO()
+                sf.write(buffer, np.full(4000, amplitude), 8000, format='WAV')
+                f.writestr(name, buffer.getvalue())
+        self._write('ref_0.txt', 'clip a\nclip b\n')
+
+    def test_peaks(self):
+        response = self.fetch('/peaks?t=task&s=0&i=1,0')
+        self.assertEqual(response.code, 200)
+        data = json.loads(response.body)
+        self.assertEqual(data['n_points'], 1000)
+        self.assertEqual(set(data['peaks']['0']), {64})
+        self.assertEqual(set(data['peaks']['1']), {127})
+        self.assertEqual(self.fetch('/peaks?t=task&s=0&i=2').code, 404)
+        self.assertEqual(self.fetch('/peaks?t=task&s=0&i=x').code, 400)
@@ -0,0 +1,69 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import json
+
+from vizseq._data import VizSeqTaskConfigManager
+from . import VizSeqServerTestCase
+
+REF = ['a b c d', 'e f g h', 'i j k l', 'm n o p']
+PRED_A = ['a b c d', 'e f', 'x y z w', 'm n o p']
+PRED_B = ['a b', 'e f g h', 'i j k l', 'm n x y']
+
+
+class SortingTestCase(VizSeqServerTestCase):
+    def _write_task_files(self):
+        for name, lines in [('src_0', REF), ('ref_0', REF), ('pred_A', PRED_A),
+                            ('pred_B', PRED_B)]:
+            self._write_lines(f'{name}.txt', lines)
+        VizSeqTaskConfigManager(self.task_dir).set_metrics(['bleu'])
+
+    def _get_idx(self, sorting: int, s_metric: str):
+        response = self.fetch(
+            f'/page_data?t=task&m=A,B&s={sorting}&s_metric={s_metric}'
+        )
+        self.assertEqual(response.code, 200)
+        return json.loads(response.body)['cur_idx']
+
+    def test_score_difference(self):
+        self.assertEqual(self._get_idx(6, 'wer:A-B'), [0, 3, 1, 2])
+        self.assertEqual(self._get_idx(6, 'wer:B-A'), [2, 1, 0, 3])
+        self.assertEqual(self._get_idx(6, 'wer:A'), [0, 3, 1, 2])
+
+    def test_rank_disagreement(self):
+        # A has the higher mean WER: examples where B has the higher WER
+        # reverse the overall ranking
+        self.assertEqual(self._get_idx(7, 'wer'), [0, 3, 1, 2])
+
+    def test_view(self):
+        response = self.fetch('/view?t=task&m=A,B&s=6&s_metric=bleu:A-B')
+        self.assertEqual(response.code, 200)
+        body = response.body.decode()
+        self.assertRegex(body, r'data-metric="bleu:A-B"\s+selected')
+        self.assertIn('data-metric="bleu:B-A"', body)
+        self.assertIn('By model rank disagreement', body)
+
+    def test_top_k(self):
+        url = '/page_data?t=task&m=A,B&k=2&s=6&s_metric=wer:A'
+        for best, expected in [('0', [0, 3]), ('1', [2, 1])]:
+            response = self.fetch(f'{url}&best={best}')
+            self.assertEqual(response.code, 200)
+            page_data = json.loads(response.body)
+            self.assertEqual(page_data['cur_idx'], expected)
+            self.assertEqual(page_data['n_samples'], 2)
+        # the first task metric by default
+        response = self.fetch('/page_data?t=task&m=A,B&k=3')
+        self.assertEqual(len(json.loads(response.body)['cur_idx']), 3)
+        response = self.fetch('/page_data?t=task&m=A,B&k=x')
+        self.assertEqual(response.code, 400)
+
+    def test_top_k_view(self):
+        response = self.fetch('/view?t=task&m=A,B&k=10&best=1')
+        self.assertEqual(response.code, 200)
+        body = response.body.decode()
+        self.assertRegex(body, r'<option value="10"\s+selected')
+        self.assertRegex(body, r'<option value="1"\s+selected\s*>Best')
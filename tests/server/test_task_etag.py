@@ -0,0 +1,59 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import json
+import os
+import os.path as op
+from unittest import mock
+
+from vizseq._data import VizSeqTaskWatcher
+from . import VizSeqServerTestCase
+
+
+class TaskETagTestCase(VizSeqServerTestCase):
+    def _write_task_files(self):
+        self._write('src_0.txt', 'a b\nc\n')
+        self._write('ref_0.txt', 'a b\nd\n')
+
+    def test_stats(self):
+        response = self.fetch('/stats?t=task')
+        self.assertEqual(response.code, 200)
+        etag = response.headers['ETag']
+        response = self.fetch('/stats?t=task',
+                              headers={'If-None-Match': etag})
+        self.assertEqual(response.code, 304)
+        self.assertEqual(len(response.body), 0)
+
+        self._write('ref_0.txt', 'a b c\nd e\n')
+        os.utime(op.join(self.task_dir, 'ref_0.txt'), ns=(1, 1))
+        response = self.fetch('/stats?t=task',
+                              headers={'If-None-Match': etag})
+        self.assertEqual(response.code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_task_cfg(self):
+        with mock.patch.object(VizSeqTaskWatcher, 'is_inotify_available',
+                               return_value=False), \
+                mock.patch.object(VizSeqTaskWatcher, 'POLL_INTERVAL', 3600):
+            etag = self.fetch('/stats?t=task').headers['ETag']
+            response = self.fetch('/task_cfg?t=task&d=new', method='POST',
+                                  body='')
+            self.assertEqual(response.code, 200)
+            response = self.fetch('/stats?t=task',
+                                  headers={'If-None-Match': etag})
+            self.assertEqual(response.code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_cache_stats(self):
+        self.fetch('/stats?t=task')
+        self.fetch('/stats?t=task')
+        response = self.fetch('/cache_stats')
+        self.assertEqual(response.code, 200)
+        stats = json.loads(response.body)['stats']
+        self.assertEqual(stats['stats']['misses'], 1)
+        self.assertEqual(stats['stats']['hits'], 1)
+        self.assertGreater(stats['ref']['n_bytes'], 0)
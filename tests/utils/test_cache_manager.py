@@ -0,0 +1,82 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import mmap
+import sys
+import time
+import unittest
+
+import numpy as np
+
+from vizseq._utils.cache_manager import VizSeqCacheManager, get_n_bytes
+
+MB = 1024 ** 2
+
+
+class VizSeqCacheManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        VizSeqCacheManager.clear()
+        self.budget = VizSeqCacheManager.get_budget()
+
+    def tearDown(self):
+        VizSeqCacheManager.set_budget(self.budget)
+        VizSeqCacheManager.clear()
+
+    def test_n_bytes(self):
+        array = np.zeros(MB, dtype=np.uint8)
+        self.assertGreaterEqual(get_n_bytes(array), MB)
+        # views keep their base alive, which is counted once
+        self.assertGreaterEqual(get_n_bytes(array[:10]), MB)
+        self.assertLess(get_n_bytes([array, array[:10]]), 2 * MB)
+        # memory maps are backed by files
+        self.assertLess(
+            get_n_bytes(np.frombuffer(mmap.mmap(-1, MB), np.uint8)), MB
+        )
+        # large lists are estimated from a sample
+        strings = [f'{i:0100d}' for i in range(100000)]
+        exact = sys.getsizeof(strings) + sum(sys.getsizeof(s) for s in strings)
+        self.assertAlmostEqual(get_n_bytes(strings) / exact, 1., places=2)
+
+    def test_hits_and_evictions(self):
+        calls = []
+
+        @VizSeqCacheManager.cached('test')
+        def get(i: int, size: int = MB, cost: float = 0.):
+            calls.append(i)
+            time.sleep(cost)
+            return np.zeros(size, dtype=np.uint8)
+
+        VizSeqCacheManager.set_budget(int(3.5 * MB))
+        get(0, cost=0.05)
+        get(1)
+        get(0, cost=0.05)
+        self.assertEqual(calls, [0, 1])
+        get(2)
+        get(3)
+        # the cheapest entries to recompute per byte are evicted first
+        self.assertEqual(
+            VizSeqCacheManager.get_stats()['test'].evictions, 1
+        )
+        get(0, cost=0.05)
+        self.assertEqual(calls, [0, 1, 2, 3])
+        # entries over the budget are not cached
+        get(4, size=4 * MB)
+        get(4, size=4 * MB)
+        self.assertEqual(calls[-2:], [4, 4])
+
+        stats = VizSeqCacheManager.get_stats()['test']
+        self.assertEqual((stats.hits, stats.misses), (2, 6))
+        self.assertEqual(stats.n_entries, 3)
+        self.assertLessEqual(stats.n_bytes, 3.5 * MB)
+        self.assertEqual(VizSeqCacheManager.get_stats()['total'], stats)
+
+        get.cache_clear()
+        self.assertNotIn('test', VizSeqCacheManager.get_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+import tempfile
+
+import numpy as np
+
+from vizseq._utils.embedding_store import VizSeqEmbeddingStore
+
+
+class VizSeqEmbeddingStoreTestCase(unittest.TestCase):
+    def test_put_and_get(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = VizSeqEmbeddingStore('test', 4, root=root)
+            keys = [VizSeqEmbeddingStore.get_key(s, 'm') for s in 'abc']
+            self.assertEqual(store.get(keys), [None, None, None])
+            embeddings = [np.random.rand(1, 4), np.random.rand(3, 4)]
+            store.put(keys[:2], embeddings)
+            cached = store.get(keys)
+            self.assertIsNone(cached[2])
+            for e, c in zip(embeddings, cached[:2]):
+                np.testing.assert_allclose(e, c, rtol=1e-6)
+
+            # a second handle (e.g. from another process) sees the entries
+            other = VizSeqEmbeddingStore('test', 4, root=root)
+            self.assertIn(keys[1], other)
+            other.put(keys[1:], [np.zeros((1, 4)), np.ones((2, 4))])
+            np.testing.assert_allclose(store.get(keys)[2], np.ones((2, 4)))
+            self.assertEqual(len(store.get(keys)[1]), 3)
+
+    def test_float16(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = VizSeqEmbeddingStore('test', 2, dtype='float16', root=root)
+            store.put(['k'], [np.array([[0.5, 0.25]])])
+            self.assertEqual(store.get(['k'])[0].dtype, np.float16)
+
+    def test_max_bytes(self):
+        with tempfile.TemporaryDirectory() as root:
+            # room for 3 rows of 2 float32 values
+            store = VizSeqEmbeddingStore('test', 2, root=root, max_bytes=24)
+            store.put(['a', 'b', 'c'], [np.ones((2, 2))] * 3)
+            self.assertEqual([e is None for e in store.get(['a', 'b', 'c'])],
+                             [False, True, True])
+            store.put(['c'], [np.ones((1, 2))])
+            self.assertIsNotNone(store.get(['c'])[0])
+            store.put(['d'], [np.ones((1, 2))])
+            self.assertIsNone(store.get(['d'])[0])
@@ -0,0 +1,20 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+from vizseq._utils.optional import get_optional_bool
+
+
+class GetOptionalBoolTestCase(unittest.TestCase):
+    def test(self):
+        self.assertFalse(get_optional_bool(None, 'k', False))
+        self.assertTrue(get_optional_bool({}, 'k', True))
+        self.assertTrue(get_optional_bool({'k': 'True'}, 'k', False))
+        self.assertFalse(get_optional_bool({'k': 'false'}, 'k', True))
+        self.assertFalse(get_optional_bool({'k': '0'}, 'k', True))
+        self.assertTrue(get_optional_bool({'k': True}, 'k', False))
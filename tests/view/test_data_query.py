@@ -0,0 +1,119 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import numpy as np
+
+from vizseq._data import VizSeqDataSources, VizSeqSearchIndex
+from vizseq._view.data_query import (VizSeqQuery, VizSeqQueryColumns,
+                                     VizSeqQueryError, parse_query)
+from vizseq._view.data_view import VizSeqDataPageView
+
+
+class VizSeqQueryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.src = VizSeqDataSources({'src': [
+            'a b c', 'a b c d e', 'x', 'foo bar', 'a b c d e f g'
+        ]})
+        self.ref = VizSeqDataSources({'ref': [
+            'a b c', 'a b c d', 'y', 'foo baz', 'a b c d e f g'
+        ]})
+        self.hypo = VizSeqDataSources({
+            'A': ['a b c', 'a x', 'y', 'foo bar', 'a b c d e f g'],
+            'B': ['z', 'a b c d', 'foo', 'q', 'a b']
+        })
+        self.tags = [['news'], ['news'], ['web'], ['news', 'web'], ['web']]
+        self.columns = VizSeqQueryColumns(self.src, self.ref, self.hypo,
+                                          tags=self.tags)
+
+    def _filter(self, query: str):
+        return VizSeqQuery.parse(query).filter(self.columns)
+
+    def test_parse(self):
+        for plain in ['foo', 'foo bar', '', '"a b"', 'a(b', 'rock AND roll',
+                      'NOT (a OR b)']:
+            self.assertIsNone(parse_query(plain), plain)
+        self.assertEqual(
+            parse_query('NOT ref_len>3 OR tag:news AND hypo[B]~"a b"'),
+            ('or', ('not', ('cmp', 'ref_len', None, '>', 3.)),
+             ('and', ('tag', 'news'), ('text', 'hypo', 'B', 'a b')))
+        )
+        # plain searches with operators: the first field is unknown
+        for plain in ['AND', 'foo:bar', 'x=1', 'e=mc2', 'a<b AND ref_len>3',
+                      '<3', 'blue[A]<10']:
+            self.assertIsNone(parse_query(plain), plain)
+        for invalid in ['ref_len>', 'ref_len>x', '(tag:news', 'src_len~a',
+                        'ref_len>30 AND', 'ref_len>>3', 'tag:news AND',
+                        'tag:news AND foo:bar', 'ref_len>3 AND "a']:
+            with self.assertRaises(VizSeqQueryError, msg=invalid):
+                parse_query(invalid)
+
+    def test_filter(self):
+        self.assertEqual(self._filter('ref_len>3'), [1, 4])
+        self.assertEqual(self._filter('src_len<=3 AND tag:news'), [0, 3])
+        self.assertEqual(self._filter('NOT tag:news'), [2, 4])
+        self.assertEqual(self._filter('tag:web OR hypo_len[B]=4'), [1, 2, 3, 4])
+        self.assertEqual(self._filter('hypo[B]~"foo" OR src~x'), [2])
+        self.assertEqual(self._filter('hypo~"a b" AND ref~"c d"'), [1, 4])
+        self.assertEqual(self._filter('(tag:web AND ref_len<2) OR "baz"'),
+                         [2])
+        self.assertEqual(self._filter('bleu[A]>90'), [0, 2, 4])
+        self.assertEqual(self._filter('bleu[A]>90 AND NOT ref~y'), [0, 4])
+
+    def test_errors(self):
+        for query in ['bleu<10', 'bleu[C]<10', 'hypo_len[C]>1']:
+            with self.assertRaises(VizSeqQueryError):
+                self._filter(query)
+
+    def test_search_index(self):
+        index = VizSeqSearchIndex.build(self.src.text)
+        columns = VizSeqQueryColumns(self.src, self.ref, self.hypo,
+                                     search_index=index)
+        query = VizSeqQuery.parse('src~"b c" AND NOT src~"d"')
+        self.assertEqual(query.filter(columns), [0])
+        self.assertTrue(np.array_equal(
+            query.get_mask(columns), [True, False, False, False, False]
+        ))
+
+    def test_page_view(self):
+        view = VizSeqDataPageView.get(
+            self.src, self.ref, self.hypo, 10, 1, query='tag:web',
+            tags=self.tags, disable_alignment=True
+        )
+        self.assertEqual(view.cur_idx, [2, 3, 4])
+        # plain searches with boolean keywords
+        view = VizSeqDataPageView.get(
+            self.src, self.ref, self.hypo, 10, 1, query='foo bar',
+            disable_alignment=True
+        )
+        self.assertEqual(view.cur_idx, [3])
+        for query in ['hypo_len[C]<3', 'ref_len>30 AND']:
+            with self.assertRaises(VizSeqQueryError):
+                VizSeqDataPageView.get(
+                    self.src, self.ref, self.hypo, 10, 1, query=query,
+                    disable_alignment=True
+                )
+        # searched as a string
+        view = VizSeqDataPageView.get(
+            self.src, self.ref, self.hypo, 10, 1, query='x=1',
+            disable_alignment=True
+        )
+        self.assertEqual(view.n_samples, 0)
+
+    def test_non_text_source(self):
+        src = VizSeqDataSources(None)
+        columns = VizSeqQueryColumns(src, self.ref, self.hypo)
+        with self.assertRaises(VizSeqQueryError):
+            VizSeqQuery.parse('src_len>1').filter(columns)
+        self.assertEqual(
+            VizSeqQuery.parse('ref_len>3').filter(columns), [1, 4]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import random
+import unittest
+
+import numpy as np
+
+from vizseq._data import VizSeqDataSources
+from vizseq._view.data_sorters import (VizSeqSortingType, VizSeqByLenSorter,
+                                       VizSeqByStrOrderSorter,
+                                       VizSeqRandomSorter,
+                                       VizSeqSortPermutation, VizSeqScoreKey,
+                                       VizSeqTopKSelector,
+                                       VizSeqByRankDisagreementSorter)
+from vizseq._view.data_view import VizSeqDataPageView
+
+
+class VizSeqSortPermutationTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.data = [
+            ' '.join('abü'[random.randint(0, 2)] * random.randint(1, 3)
+                     for _ in range(random.randint(1, 8)))
+            for _ in range(200)
+        ]
+        self.indices = sorted(random.sample(range(200), 80))
+
+    def test_str_order(self):
+        permutation = VizSeqSortPermutation.by_str_order(self.data)
+        self.assertEqual(permutation.dtype, np.int32)
+        sorted_idx = VizSeqSortPermutation.take(permutation, self.indices)
+        self.assertEqual(sorted(sorted_idx.tolist()), self.indices)
+        # ties are kept in the original order
+        self.assertEqual(
+            sorted_idx.tolist(),
+            sorted(self.indices, key=lambda i: (self.data[i], i))
+        )
+
+    def test_len(self):
+        lens = np.array([len(s.split()) for s in self.data])
+        permutation = VizSeqSortPermutation.by_len(lens)
+        sorted_idx = VizSeqSortPermutation.take(permutation, self.indices)
+        # longest first, ties in the reverse order
+        expected = sorted(self.indices, key=lambda i: (-lens[i], -i))
+        self.assertEqual(sorted_idx.tolist(), expected)
+        self.assertEqual(VizSeqByLenSorter.sort(self.data, self.indices),
+                         expected)
+
+    def test_len_whitespace(self):
+        # lengths are whitespace token counts (`str.split()`) as in `ref_len`
+        # queries: repeated spaces, tabs and empty lines count no tokens
+        data = ['a  b', 'a b c', 'x\ty', '', ' d ']
+        src = VizSeqDataSources({'src': data})
+        ref = VizSeqDataSources({'ref': data})
+        hypo = VizSeqDataSources(None)
+        example_idx = VizSeqDataPageView.get_example_idx(
+            src, ref, hypo, sorting=VizSeqSortingType.ref_len.value
+        )
+        self.assertEqual(example_idx.tolist(), [1, 2, 0, 4, 3])
+        example_idx = VizSeqDataPageView.get_example_idx(
+            src, ref, hypo, query='ref_len>=2',
+            sorting=VizSeqSortingType.src_len.value
+        )
+        self.assertEqual(example_idx.tolist(), [1, 2, 0])
+
+    def test_take(self):
+        permutation = VizSeqSortPermutation.random(200)
+        self.assertEqual(sorted(permutation.tolist()), list(range(200)))
+        self.assertTrue(np.array_equal(
+            permutation, VizSeqSortPermutation.random(200)
+        ))
+        self.assertEqual(VizSeqRandomSorter.sort(list(range(200))),
+                         permutation.tolist())
+        mask = np.zeros(200, dtype=bool)
+        mask[self.indices] = True
+        sorted_idx = VizSeqSortPermutation.take(permutation, mask)
+        # the order of the permutation is kept
+        self.assertEqual(
+            sorted_idx.tolist(), [i for i in permutation if mask[i]]
+        )
+        self.assertTrue(np.array_equal(
+            sorted_idx, VizSeqSortPermutation.take(permutation, self.indices)
+        ))
+
+    def test_example_idx(self):
+        src = VizSeqDataSources({'src': self.data})
+        ref = VizSeqDataSources({'ref': self.data[::-1]})
+        hypo = VizSeqDataSources(None)
+        example_idx = VizSeqDataPageView.get_example_idx(
+            src, ref, hypo, query='a',
+            sorting=VizSeqSortingType.ref_alphabetical.value
+        )
+        ref_data = self.data[::-1]
+        expected = sorted([i for i, s in enumerate(self.data) if 'a' in s],
+                          key=lambda i: (ref_data[i], i))
+        self.assertEqual(example_idx.tolist(), expected)
+        self.assertEqual(VizSeqByStrOrderSorter.sort(ref_data, expected),
+                         expected)
+
+
+class VizSeqTopKSelectorTestCase(unittest.TestCase):
+    def test_select(self):
+        rng = np.random.RandomState(0)
+        scores = rng.randint(0, 20, size=300).astype(np.float64)
+        indices = np.flatnonzero(rng.rand(300) < 0.5)
+        by_score = sorted(indices.tolist(), key=lambda i: (scores[i], i))
+        for k in [0, 1, 10, len(indices), len(indices) + 5]:
+            self.assertEqual(
+                VizSeqTopKSelector.select(scores, indices, k).tolist(),
+                by_score[:k]
+            )
+            self.assertEqual(
+                VizSeqTopKSelector.select(scores, indices, k, best=True)
+                .tolist(),
+                sorted(indices.tolist(), key=lambda i: (-scores[i], i))[:k]
+            )
+
+    def test_select_nan(self):
+        scores = np.array([1., np.nan, .5, np.nan, 2.])
+        indices = np.arange(5)
+        self.assertEqual(
+            VizSeqTopKSelector.select(scores, indices, 4).tolist(),
+            [2, 0, 4, 1]
+        )
+        self.assertEqual(
+            VizSeqTopKSelector.select(scores, indices, 4, best=True).tolist(),
+            [4, 0, 2, 1]
+        )
+        self.assertEqual(
+            VizSeqTopKSelector.select(scores, indices, 2).tolist(), [2, 0]
+        )
+
+    def test_score_key(self):
+        models = ['a', 'a-b', 'b']
+        scores = {'a': np.array([1., 2.]), 'a-b': np.array([3., 3.]),
+                  'b': np.array([2., 1.])}
+        self.assertEqual(VizSeqScoreKey.parse('a-b', models), ['a-b'])
+        self.assertEqual(VizSeqScoreKey.parse('a-b-b', models), ['a-b', 'b'])
+        self.assertEqual(VizSeqScoreKey.parse('b-a', models), ['b', 'a'])
+        with self.assertRaises(ValueError):
+            VizSeqScoreKey.parse('c', models)
+        for key, expected in [('', [2., 2.]), ('b', [2., 1.]),
+                              ('a-b-a', [2., 1.])]:
+            self.assertEqual(
+                VizSeqScoreKey.get_scores(key, models, scores.get).tolist(),
+                expected
+            )
+
+
+class VizSeqByRankDisagreementSorterTestCase(unittest.TestCase):
+    def test_sort(self):
+        # overall ranking: a > b > c
+        scores = np.array([[9., 1., 5., 9., 6.],
+                           [5., 5., 5., 1., 4.],
+                           [1., 8., 4., 5., 1.]])
+        n_reversed, margins = \
+            VizSeqByRankDisagreementSorter.get_disagreement(scores)
+        self.assertEqual(n_reversed.tolist(), [0, 3, 0, 1, 0])
+        self.assertEqual(margins.tolist(), [0., 14., 0., 4., 0.])
+        self.assertEqual(
+            VizSeqByRankDisagreementSorter.sort(scores, [0, 1, 3, 4]),
+            [1, 3, 0, 4]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import numpy as np
+
+from vizseq._data import VizSeqDataSources, VizSeqTaskWatcher
+from vizseq._view import mem_cached_data_getters
+from vizseq._view.data_sorters import VizSeqSortingType, VizSeqByMetricSorter
+from vizseq._view.data_view import VizSeqDataPageView
+from vizseq._view.data_query import VizSeqQueryError
+from vizseq._view.web_view import VizSeqWebView
+from vizseq._view.mem_cached_data_getters import _get_example_idx
+from vizseq.scorers import get_scorer
+
+SRC = ['a b c', 'a b c d e', 'x', 'foo bar', 'a b c d e f g']
+REF = ['a b c', 'a b c d', 'y', 'foo baz', 'a b c d e f g']
+HYPO = {
+    'A': ['a b c', 'a x', 'y', 'foo bar', 'a b c d e f'],
+    'B': ['z', 'a b c d', 'foo', 'q', 'a b']
+}
+
+
+class VizSeqDataPageViewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.src = VizSeqDataSources({'src': SRC})
+        self.ref = VizSeqDataSources({'ref': REF})
+        self.hypo = VizSeqDataSources(HYPO)
+
+    def test_metric_sorting(self):
+        scores = {
+            m: get_scorer('bleu')(corpus_level=False, sent_level=True)
+            .score(h, [REF]).sent_scores for m, h in HYPO.items()
+        }
+        mean_scores = np.mean([scores[m] for m in HYPO], axis=0)
+        expected = sorted([0, 1, 3, 4], key=lambda i: (mean_scores[i], i))
+        self.assertEqual(VizSeqByMetricSorter.sort(
+            [{m: scores[m][i] for m in HYPO} for i in expected], expected
+        ), expected)
+        example_idx = VizSeqDataPageView.get_example_idx(
+            self.src, self.ref, self.hypo, query='a',
+            sorting=VizSeqSortingType.metric.value, sorting_metric='bleu'
+        )
+        self.assertEqual(example_idx.tolist(), expected)
+
+        view = VizSeqDataPageView.get(
+            self.src, self.ref, self.hypo, 2, 2, disable_alignment=True,
+            example_idx=example_idx
+        )
+        self.assertEqual(view.cur_idx, expected[2:4])
+        self.assertEqual(view.n_samples, 4)
+
+    def test_top_k(self):
+        scores = {
+            m: get_scorer('bleu')(corpus_level=False, sent_level=True)
+            .score(h, [REF]).sent_scores for m, h in HYPO.items()
+        }
+        diff = [a - b for a, b in zip(scores['A'], scores['B'])]
+        for key, values in [('', np.mean([scores['A'], scores['B']], 0)),
+                            (':B', scores['B']), (':A-B', diff)]:
+            for best in [False, True]:
+                expected = sorted(
+                    range(5), key=lambda i: (-values[i] if best else values[i])
+                )
+                view = VizSeqDataPageView.get(
+                    self.src, self.ref, self.hypo, 2, 1,
+                    sorting_metric=f'bleu{key}', disable_alignment=True,
+                    top_k=3, top_k_best=best
+                )
+                self.assertEqual(view.n_samples, 3)
+                self.assertEqual(view.cur_idx, expected[:2])
+                view = VizSeqDataPageView.get(
+                    self.src, self.ref, self.hypo, 2, 2,
+                    sorting_metric=f'bleu{key}', disable_alignment=True,
+                    top_k=3, top_k_best=best
+                )
+                self.assertEqual(view.cur_idx, expected[2:3])
+
+    def test_cached_example_idx(self):
+        with tempfile.TemporaryDirectory() as root, \
+                patch.dict(os.environ, {'VIZSEQ_CACHE_ROOT': root}), \
+                patch.object(VizSeqTaskWatcher, 'POLL_INTERVAL', 0):
+            for name, lines in [('src_0', SRC), ('ref_0', REF),
+                                ('pred_A', HYPO['A']), ('pred_B', HYPO['B'])]:
+                with open(op.join(root, f'{name}.txt'), 'w') as f:
+                    f.write('\n'.join(lines) + '\n')
+            mem_cached_data_getters._clear_caches()
+            args = (root, ['A', 'B'], 'a', VizSeqSortingType.metric.value,
+                    'bleu')
+            example_idx = _get_example_idx(*args)
+            self.assertIs(_get_example_idx(*args), example_idx)
+            self.assertEqual(
+                example_idx.tolist(),
+                VizSeqDataPageView.get_example_idx(
+                    self.src, self.ref, self.hypo, query='a',
+                    sorting=VizSeqSortingType.metric.value,
+                    sorting_metric='bleu'
+                ).tolist()
+            )
+            with open(op.join(root, 'pred_B.txt'), 'w') as f:
+                f.write('\n'.join(HYPO['A']) + '\n')
+            os.utime(op.join(root, 'pred_B.txt'), ns=(1, 1))
+            self.assertIsNot(_get_example_idx(*args), example_idx)
+            mem_cached_data_getters._clear_caches()
+
+    def test_query_errors(self):
+        with tempfile.TemporaryDirectory() as root, \
+                patch.dict(os.environ, {'VIZSEQ_CACHE_ROOT': root}):
+            task_dir = op.join(root, 'task')
+            os.makedirs(task_dir)
+            # image sources
+            with zipfile.ZipFile(op.join(task_dir, 'src_0.zip'), 'w') as f:
+                f.writestr('source.txt', '\n'.join(
+                    f'{i}.png' for i in range(len(REF))
+                ))
+                for i in range(len(REF)):
+                    f.writestr(f'{i}.png', b'')
+            for name, lines in [('ref_0', REF), ('pred_A', HYPO['A']),
+                                ('pred_B', HYPO['B'])]:
+                with open(op.join(task_dir, f'{name}.txt'), 'w') as f:
+                    f.write('\n'.join(lines) + '\n')
+            mem_cached_data_getters._clear_caches()
+            with self.assertRaises(VizSeqQueryError):
+                _get_example_idx(task_dir, ['A'], query='src_len>1')
+            self.assertEqual(
+                _get_example_idx(task_dir, ['A'], query='ref_len>3').tolist(),
+                [1, 4]
+            )
+            for query in ['bleu<10', 'ref_len>30 AND', 'tag:news AND']:
+                page_data = VizSeqWebView(
+                    root, 'task', models=['A', 'B'], query=query
+                ).get_page_data()
+                self.assertIsNotNone(page_data.query_error)
+                self.assertEqual(page_data.n_samples, 0)
+            page_data = VizSeqWebView(
+                root, 'task', models=['A', 'B'], query='rock AND roll'
+            ).get_page_data()
+            self.assertIsNone(page_data.query_error)
+            mem_cached_data_getters._clear_caches()
+
+
+if __name__ == '__main__':
+    unittest.main()
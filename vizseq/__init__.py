@@ -7,10 +7,28 @@
 
 import os.path as op
 from pathlib import Path
+import importlib
 
 FILE_ROOT = Path(__file__).parent
 with open(op.join(FILE_ROOT, 'VERSION')) as f:
     __version__ = f.read()
 
-from vizseq.ipynb import *
-from vizseq.ipynb import fairseq_viz as fairseq
+# The notebook APIs pull in matplotlib, IPython, pandas, etc. They are loaded
+# on first attribute access so that `import vizseq` stays cheap.
+_IPYNB_ATTRS = {
+    'view_examples', 'view_n_grams', 'view_stats', 'view_scores',
+    'set_google_credential_path', 'available_scorers'
+}
+__all__ = sorted(_IPYNB_ATTRS) + ['fairseq']
+
+
+def __getattr__(name: str):
+    if name in _IPYNB_ATTRS:
+        return getattr(importlib.import_module('vizseq.ipynb'), name)
+    elif name == 'fairseq':
+        return importlib.import_module('vizseq.ipynb.fairseq_viz')
+    raise AttributeError(f"module 'vizseq' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(__all__))
@@ -0,0 +1,73 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import argparse
+import os.path as op
+import sys
+from glob import glob
+
+
+def _build_thumbnails(task_dir: str) -> int:
+    from vizseq._data import VizSeqDataSources, VizSeqThumbnailCache
+    from vizseq._data.data_sources import VizSeqDataType
+    if not VizSeqThumbnailCache.is_available():
+        return 0
+    src = VizSeqDataSources(sorted(glob(op.join(task_dir, 'src_*.*'))))
+    infos = [
+        d.get_media_info(i) for d in src.data
+        if d.data_type == VizSeqDataType.image for i in range(len(d))
+    ]
+    return VizSeqThumbnailCache().build(infos)
+
+
+def _build_waveform_peaks(task_dir: str) -> int:
+    from vizseq._data import VizSeqDataSources, VizSeqWaveformPeaks
+    src = VizSeqDataSources(sorted(glob(op.join(task_dir, 'src_*.*'))))
+    n_clips = 0
+    for d in src.data:
+        if d.is_audio:
+            n_clips += len(VizSeqWaveformPeaks().build(d))
+    return n_clips
+
+
+def _pack(args) -> None:
+    from vizseq._data import pack_task
+    if not op.isdir(args.task_dir):
+        sys.exit(f'Task directory not found: {args.task_dir}')
+    out_path = pack_task(args.task_dir, out_path=args.output)
+    print(f'Packed {args.task_dir} into {out_path}')
+    if not args.no_thumbnails:
+        n_images = _build_thumbnails(args.task_dir)
+        print(f'Generated thumbnails for {n_images} images')
+    if not args.no_peaks:
+        n_clips = _build_waveform_peaks(args.task_dir)
+        print(f'Computed waveform peaks for {n_clips} audio clips')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='vizseq')
+    sub_parsers = parser.add_subparsers(dest='command')
+    sub_parsers.required = True
+    pack_parser = sub_parsers.add_parser(
+        'pack', help='convert the text files of a task directory into a '
+                     'single columnar binary file for faster loading'
+    )
+    pack_parser.add_argument('task_dir', type=str)
+    pack_parser.add_argument('-o', '--output', type=str, default=None,
+                             help='output path (default: <task_dir>/'
+                                  'task.vizseq, which the web app picks up)')
+    pack_parser.add_argument('--no-thumbnails', action='store_true',
+                             help='do not pre-generate image thumbnails')
+    pack_parser.add_argument('--no-peaks', action='store_true',
+                             help='do not precompute audio waveform peaks')
+    pack_parser.set_defaults(func=_pack)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
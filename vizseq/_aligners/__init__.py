@@ -6,3 +6,4 @@
 #
 
 from .text_aligner import VizseqSrcRefTextAligner, VizseqRefHypoTextAligner
+from .speech_aligner import VizSeqSpeechToTextAligner
@@ -5,6 +5,21 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import numpy as np
+
 
 class VizSeqSpeechToTextAligner(object):
-    pass
+    @classmethod
+    def get_peak_envelope(cls, sound: np.ndarray, n_points: int) -> np.ndarray:
+        """Downsamples a waveform (mixed down to mono) to `n_points`
+        (min, max) pairs, quantized to int8."""
+        if sound.ndim > 1:
+            sound = sound.mean(axis=1)
+        if len(sound) == 0:
+            return np.zeros((n_points, 2), dtype=np.int8)
+        edges = np.linspace(0, len(sound), n_points + 1).astype(np.int64)
+        # clips shorter than n_points repeat samples
+        starts = np.minimum(edges[:-1], len(sound) - 1)
+        peaks = np.stack([np.minimum.reduceat(sound, starts),
+                          np.maximum.reduceat(sound, starts)], axis=1)
+        return np.round(np.clip(peaks, -1, 1) * 127).astype(np.int8)
@@ -6,11 +6,21 @@
 #
 
 from .data_sources import (VizSeqDataSources, PathOrPathsOrDictOfStrList,
-                           SOUNDFILE_FILE_EXTS)
+                           SOUNDFILE_FILE_EXTS, VizSeqMediaInfo,
+                           get_name_from_path)
 from .n_grams import VizSeqNGrams
 from .stats import VizSeqStats
 from .lang_tagger import VizSeqLanguageTagger
 from .google_translate import get_g_translate, set_g_cred_path
 from .config_manager import VizSeqTaskConfigManager, VizSeqGlobalConfigManager
 from .table_exporter import VizSeqTableExporter
-from .tokenizers import VizSeqTokenization
+from .tokenizers import (VizSeqTokenization, VizSeqTokenizer,
+                         VizSeqTokenizationCache)
+from .packed import VizSeqPackedTask, pack_task, PACKED_FILENAME
+from .thumbnails import (VizSeqThumbnailCache, VizSeqThumbnailError,
+                         THUMBNAIL_WIDTHS)
+from .waveform_peaks import VizSeqWaveformPeaks
+from .compressed import glob_text_files, find_text_files
+from .sharded import group_shard_paths
+from .task_watcher import VizSeqTaskWatcher
+from .search_index import VizSeqSearchIndex
@@ -0,0 +1,137 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import io
+import gzip
+import lzma
+import importlib.util
+from glob import glob
+from typing import List, Optional, Iterator, BinaryIO
+
+import numpy as np
+
+from .line_index import save_line_offsets
+from vizseq._utils.cache_dir import get_cache_dir, get_content_hash
+
+COMPRESSED_FILE_EXTS = ('.gz', '.xz', '.zst')
+_CHUNK_SIZE = 1024 * 1024
+
+
+def get_compressed_ext(path: str) -> Optional[str]:
+    for e in COMPRESSED_FILE_EXTS:
+        if path.endswith(e):
+            return e
+    return None
+
+
+def strip_compressed_ext(path: str) -> str:
+    ext = get_compressed_ext(path)
+    return path if ext is None else path[:-len(ext)]
+
+
+def _open_zst(path: str) -> BinaryIO:
+    if importlib.util.find_spec('zstandard') is None:
+        raise ImportError(
+            f'Reading {path} requires zstandard (pip install vizseq[zstd])'
+        )
+    import zstandard
+    return zstandard.ZstdDecompressor().stream_reader(
+        open(path, 'rb'), closefd=True
+    )
+
+
+def open_compressed(path: str) -> BinaryIO:
+    """Streaming (decompressing) binary reader of a compressed file."""
+    ext = get_compressed_ext(path)
+    if ext == '.gz':
+        return gzip.open(path, 'rb')
+    elif ext == '.xz':
+        return lzma.open(path, 'rb')
+    elif ext == '.zst':
+        return _open_zst(path)
+    raise ValueError(f'Unsupported compressed file: {path}')
+
+
+def open_text(path: str):
+    """Text reader of a plain or compressed UTF-8 file. Lines are separated
+    by '\n' only, as in memory-mapped files."""
+    if get_compressed_ext(path) is None:
+        return open(path, encoding='utf-8', newline='\n')
+    return io.TextIOWrapper(
+        open_compressed(path), encoding='utf-8', newline='\n'
+    )
+
+
+def iter_lines(path: str) -> Iterator[str]:
+    """Stripped lines of a plain or compressed text file, decoded as a
+    stream."""
+    with open_text(path) as f:
+        for l in f:
+            yield l.strip()
+
+
+def get_decoded_path(path: str) -> str:
+    """Decompresses a file into the cache directory (once per file version)
+    and returns the path of the decoded copy. The line-offset index of the
+    decoded copy is built in the same pass, so that lines can be accessed
+    randomly from a memory map right away."""
+    stat = os.stat(path)
+    key = get_content_hash(
+        [op.abspath(path)], str(stat.st_size), str(stat.st_mtime_ns)
+    )
+    ext = op.splitext(strip_compressed_ext(path))[1]
+    out_path = op.join(get_cache_dir('decoded'), f'{key}{ext}')
+    if op.exists(out_path):
+        return out_path
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    offsets, size = [np.zeros(1, dtype=np.int64)], 0
+    with open_compressed(path) as f_in, open(tmp_path, 'wb') as f_out:
+        while True:
+            chunk = f_in.read(_CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            f_out.write(chunk)
+            newlines = np.flatnonzero(
+                np.frombuffer(chunk, dtype=np.uint8) == ord('\n')
+            )
+            offsets.append(newlines.astype(np.int64) + size + 1)
+            size += len(chunk)
+    offsets = np.concatenate(offsets)
+    if size > 0 and offsets[-1] != size:
+        offsets = np.append(offsets, size)
+    os.replace(tmp_path, out_path)
+    save_line_offsets(out_path, offsets)
+    return out_path
+
+
+def glob_text_files(dir_path: str, prefix: str) -> List[str]:
+    """Paths of the (plain, compressed or sharded) text files
+    `{prefix}_*.txt*`."""
+    pattern = op.join(dir_path, f'{prefix}_*.txt')
+    paths = glob(pattern)
+    for e in COMPRESSED_FILE_EXTS:
+        paths.extend(glob(pattern + e))
+    return sorted(paths)
+
+
+def find_text_files(dir_path: str, stem: str) -> List[str]:
+    """Path of the text file `{stem}.txt`, of a compressed version of it or,
+    if the file is sharded, of its shards (`{stem}.part-NNNNN.txt*`)."""
+    path = op.join(dir_path, f'{stem}.txt')
+    if not op.exists(path):
+        for e in COMPRESSED_FILE_EXTS:
+            if op.exists(path + e):
+                return [path + e]
+        shard_pattern = op.join(dir_path, f'{stem}.part-*.txt')
+        shards = glob(shard_pattern)
+        for e in COMPRESSED_FILE_EXTS:
+            shards.extend(glob(shard_pattern + e))
+        if len(shards) > 0:
+            return sorted(shards)
+    return [path]
@@ -8,20 +8,37 @@
 
 import os
 import os.path as op
-import zipfile
-from typing import List, Dict, Union, Optional, Tuple, Set
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import (List, Dict, Union, Optional, Tuple, Set, NamedTuple,
+                    Callable)
 from collections import Counter
 from enum import Enum
 import base64
+from contextlib import contextmanager
+from functools import partial
 
 import numpy as np
 import soundfile as sf
 
+from .tokenizers import VizSeqTokenization, VizSeqTokenizationCache
+from .line_index import VizSeqMmapLines
+from .zip_handles import VizSeqZipHandlePool
+from .compressed import (get_compressed_ext, strip_compressed_ext,
+                         iter_lines, get_decoded_path)
+from .sharded import VizSeqShardedLines, group_shard_paths
+from .duration_index import (VizSeqDurationIndex, get_duration_ms,
+                             get_n_frames)
+from vizseq._utils.cache_dir import get_content_hash
+
 TXT_EXT = '.txt'
 ZIP_EXT = '.zip'
 
 PathOrPathsOrDictOfStrList = Union[str, List[str], Dict[str, List[str]]]
 
+_logger = logging.getLogger(__name__)
+
 
 class VizSeqDataType(Enum):
     text = 1
@@ -65,11 +82,11 @@ SOUNDFILE_FILE_EXTS = {'.wav', '.flac', '.sph'}
 
 
 def _get_file_ext(path: str) -> str:
-    return str(op.splitext(os.path.basename(path))[1])
+    return str(op.splitext(os.path.basename(strip_compressed_ext(path)))[1])
 
 
 def get_name_from_path(path: str) -> Optional[str]:
-    filename = str(op.splitext(op.basename(path))[0])
+    filename = str(op.splitext(op.basename(strip_compressed_ext(path)))[0])
     if any(filename.startswith(p) for p in RESERVED_FILE_PREFIXES):
         return filename.split('_', 1)[1]
     return None
@@ -97,11 +114,49 @@ def _get_data_source_names(
         return [str(i) for i, _ in enumerate(_paths)]
 
 
-def _get_base64_from_fp(fp, media_type: str) -> str:
-    encoded = base64.b64encode(fp.read())
+def _is_soundfile(path: str) -> bool:
+    return any(path.endswith(e) for e in SOUNDFILE_FILE_EXTS)
+
+
+def _get_file_key(path: str) -> str:
+    stat = os.stat(path)
+    return f'{op.abspath(path)}\t{stat.st_size}\t{stat.st_mtime_ns}'
+
+
+class VizSeqMediaInfo(NamedTuple):
+    # a file on disk or a member (`member`) of a zip file (`path`)
+    path: str
+    member: Optional[str]
+    size: int
+    mtime: float
+    mime_type: str
+
+    @contextmanager
+    def open(self):
+        if self.member is None:
+            with open(self.path, 'rb') as f:
+                yield f
+        else:
+            with VizSeqZipHandlePool.open(self.path) as zip_f:
+                with zip_f.open(self.member, 'r') as f:
+                    yield f
+
+
+def _get_mime_type(path: str) -> str:
+    media_type = NON_TXT_FILE_EXT_TO_MEDIA_TYPE.get(_get_file_ext(path), None)
+    assert media_type is not None
+    return media_type[len('data:'):]
+
+
+def _get_base64_from_bytes(content: bytes, media_type: str) -> str:
+    encoded = base64.b64encode(content)
     return f'{media_type};base64,' + encoded.decode('utf-8')
 
 
+def _get_base64_from_fp(fp, media_type: str) -> str:
+    return _get_base64_from_bytes(fp.read(), media_type)
+
+
 def _get_base64_from_path(path: str, media_type: str) -> str:
     with open(path, 'rb') as f:
         return _get_base64_from_fp(f, media_type)
@@ -117,6 +172,8 @@ def get_file_type_from_list(paths: List[str]) -> VizSeqDataType:
 
 
 class VizSeqDataSourceBase(object):
+    _durations_ms: Optional[np.ndarray] = None
+
     def __init__(self):
         self.data = []
 
@@ -146,8 +203,15 @@ class VizSeqDataSourceBase(object):
             return []
         return self.data
 
-    def cached(self, ids: List[int]) -> List[str]:
+    def cached(
+            self, ids: List[int],
+            media_url_fn: Optional[Callable[[int], str]] = None
+    ) -> List[str]:
+        """Texts, or media (images, audio or video) as base64 data URIs or,
+        given `media_url_fn`, as URLs to be served separately."""
         assert all(0 <= i < len(self) for i in ids)
+        if self.data_type != VizSeqDataType.text and media_url_fn is not None:
+            return [media_url_fn(i) for i in ids]
         result = [self.data[i] for i in ids]
         if self.data_type != VizSeqDataType.text:
             for k, i in enumerate(ids):
@@ -157,19 +221,63 @@ class VizSeqDataSourceBase(object):
                 result[k] = _get_base64_from_path(self.data[i], media_type)
         return result
 
+    def get_media_info(self, idx: int) -> Optional[VizSeqMediaInfo]:
+        if self.is_text or not 0 <= idx < len(self):
+            return None
+        stat = os.stat(self.data[idx])
+        return VizSeqMediaInfo(
+            path=self.data[idx], member=None, size=stat.st_size,
+            mtime=stat.st_mtime, mime_type=_get_mime_type(self.data[idx])
+        )
+
+    def _get_media_key(self) -> str:
+        return get_content_hash(_get_file_key(p) for p in self.data)
+
+    def _probe_duration_ms(self, idx: int) -> int:
+        if not _is_soundfile(self.data[idx]):
+            return -1
+        return get_duration_ms(self.data[idx])
+
+    def _probe_durations_ms(self) -> np.ndarray:
+        return VizSeqDurationIndex.probe(
+            list(range(len(self))), self._probe_duration_ms
+        )
+
+    @property
+    def durations_ms(self) -> np.ndarray:
+        """Audio durations (ms) of all items (-1 for unsupported formats),
+        read from the persisted duration index once available."""
+        if self._durations_ms is None:
+            self._durations_ms = VizSeqDurationIndex.get(
+                self._get_media_key(), len(self),
+                self._probe_durations_ms
+            )
+        return self._durations_ms
+
     def get_len(self, idx: int, finer=False) -> int:
         if not 0 <= idx <= len(self):
             raise ValueError(f'Invalid index {idx}')
         if self.is_text:
             return len(self.data[idx]) if finer else len(self.data[idx].split())
         elif self.is_audio:
-            if any(self.data[idx].endswith(e) for e in SOUNDFILE_FILE_EXTS):
-                sound, sr = sf.read(self.data[idx])
-                duration_ms = int(len(sound) / sr * 1000)
-                n_frames = int(1 + (duration_ms - 25) / 10)
-                return duration_ms if finer else n_frames
+            if self._durations_ms is not None:
+                duration_ms = int(self._durations_ms[idx])
+            else:
+                duration_ms = self._probe_duration_ms(idx)
+            if duration_ms >= 0:
+                return duration_ms if finer else int(get_n_frames(duration_ms))
         return 0
 
+    def get_lens(self, finer=False) -> np.ndarray:
+        if self.is_audio:
+            durations = self.durations_ms
+            lens = durations if finer else get_n_frames(durations)
+            return np.where(durations < 0, 0, lens)
+        return np.array(
+            [self.get_len(i, finer=finer) for i in range(len(self))],
+            dtype=np.int64
+        )
+
     @property
     def vocab(self) -> List[Tuple[str, int]]:
         if not self.is_text:
@@ -199,17 +307,52 @@ class VizSeqListSource(VizSeqDataSourceBase):
 class VizSeqTextFileSource(VizSeqDataSourceBase):
     def __init__(self, path: str):
         assert os.path.exists(path)
-        with open(path) as f:
+        # lines are separated by '\n' only, as in memory-mapped files
+        with open(path, encoding='utf-8', newline='\n') as f:
             self.data = [l.strip() for l in f]
 
 
+class VizSeqMmapTextFileSource(VizSeqDataSourceBase):
+    """Text file source that keeps lines in a memory-mapped file instead of
+    a list of strings."""
+    def __init__(self, path: str):
+        assert os.path.exists(path)
+        self.data = VizSeqMmapLines(path)
+
+
+class VizSeqCompressedTextFileSource(VizSeqDataSourceBase):
+    """Text file source for gzip/xz/zstd files. Small files are decoded as a
+    stream into a list of strings; larger ones are decoded once into the
+    cache directory and memory-mapped for random access."""
+    def __init__(self, path: str, decode_to_cache: bool = False):
+        assert os.path.exists(path) and get_compressed_ext(path) is not None
+        self.path = path
+        if decode_to_cache:
+            self.data = VizSeqMmapLines(get_decoded_path(path))
+        else:
+            self.data = list(iter_lines(path))
+
+
+class VizSeqShardedTextFileSource(VizSeqDataSourceBase):
+    """Text source split across shard files (`*.part-NNNNN.txt`), which are
+    opened lazily."""
+    def __init__(self, paths: List[str]):
+        assert len(paths) > 0 and all(os.path.exists(p) for p in paths)
+        self.paths = paths
+        self.data = VizSeqShardedLines(paths)
+
+    @property
+    def data_type(self) -> VizSeqDataType:
+        return VizSeqDataType.text
+
+
 class VizSeqZipFileSource(VizSeqDataSourceBase):
     def __init__(self, path: str):
         assert os.path.exists(path) and path.endswith(ZIP_EXT)
         self.path = path
         self.data = None
 
-        with zipfile.ZipFile(path) as zip_f:
+        with VizSeqZipHandlePool.open(path) as zip_f:
             name_list = zip_f.namelist()
 
             if len(name_list) == 1:
@@ -227,58 +370,96 @@ class VizSeqZipFileSource(VizSeqDataSourceBase):
                 with zip_f.open(metadata_txt_name) as f:
                     self.data = [l.decode('utf-8').strip() for l in f]
                 self._data_type = get_file_type_from_list(self.data)
-                assert all(fn in name_list for fn in self.data)
+                # member name -> ZipInfo
+                self._members = {i.filename: i for i in zip_f.infolist()}
+                assert all(fn in self._members for fn in self.data)
 
     @property
     def data_type(self) -> VizSeqDataType:
         return self._data_type
 
-    def cached(self, ids: List[int]) -> List[str]:
+    def cached(
+            self, ids: List[int],
+            media_url_fn: Optional[Callable[[int], str]] = None
+    ) -> List[str]:
         assert all(0 <= i < len(self) for i in ids)
         if self.data_type == VizSeqDataType.text:
             return [self.data[i] for i in ids]
+        elif media_url_fn is not None:
+            return [media_url_fn(i) for i in ids]
         else:
+            members = [self.data[i] for i in ids]
+            contents = VizSeqZipHandlePool.read_all(self.path, members)
             result = []
-            with zipfile.ZipFile(self.path) as zip_f:
-                for i in ids:
-                    file_ext = _get_file_ext(self.data[i])
-                    media_type = NON_TXT_FILE_EXT_TO_MEDIA_TYPE.get(
-                        file_ext, None
-                    )
-                    assert media_type is not None
-                    with zip_f.open(self.data[i], 'r') as f:
-                        result.append(_get_base64_from_fp(f, media_type))
+            for m, c in zip(members, contents):
+                media_type = NON_TXT_FILE_EXT_TO_MEDIA_TYPE.get(
+                    _get_file_ext(m), None
+                )
+                assert media_type is not None
+                result.append(_get_base64_from_bytes(c, media_type))
             return result
 
-    def get_len(self, idx: int, finer=False) -> int:
-        if not 0 <= idx <= len(self):
-            raise ValueError(f'Invalid index {idx}')
-        if self.is_text:
-            return len(self.data[idx]) if finer else len(self.data[idx].split())
-        elif self.is_audio:
-            if any(self.data[idx].endswith(e) for e in SOUNDFILE_FILE_EXTS):
-                with zipfile.ZipFile(self.path) as zip_f:
-                    with zip_f.open(self.data[idx], 'r') as f:
-                        sound, sr = sf.read(f)
-                        duration_ms = int(len(sound) / sr * 1000)
-                        n_frames = int(1 + (duration_ms - 25) / 10)
-                        return duration_ms if finer else n_frames
-        return 0
+    def get_media_info(self, idx: int) -> Optional[VizSeqMediaInfo]:
+        if self.is_text or not 0 <= idx < len(self):
+            return None
+        return VizSeqMediaInfo(
+            path=self.path, member=self.data[idx],
+            size=self._members[self.data[idx]].file_size,
+            mtime=os.stat(self.path).st_mtime,
+            mime_type=_get_mime_type(self.data[idx])
+        )
+
+    def _get_media_key(self) -> str:
+        return get_content_hash([_get_file_key(self.path)])
+
+    def _probe_duration_ms(self, idx: int) -> int:
+        if not _is_soundfile(self.data[idx]):
+            return -1
+        with VizSeqZipHandlePool.open(self.path) as zip_f:
+            with zip_f.open(self.data[idx], 'r') as f:
+                return get_duration_ms(f)
+
+    def _probe_durations_ms(self) -> np.ndarray:
+        # every probing thread reads through its own pooled handle
+        return VizSeqDurationIndex.probe(
+            list(range(len(self))), self._probe_duration_ms,
+            n_threads=VizSeqZipHandlePool.MAX_READ_THREADS
+        )
 
     def get_audio(self, idx) -> Optional[Tuple[np.ndarray, int]]:
         if not self.is_audio:
             return None
-        with zipfile.ZipFile(self.path) as zip_f:
+        with VizSeqZipHandlePool.open(self.path) as zip_f:
             with zip_f.open(self.data[idx], 'r') as f:
                 sound, sample_rate = sf.read(f)
         return sound, sample_rate
 
 
 class VizSeqDataSource(object):
-    def __init__(self, name: str, path_or_list: Union[str, List[str]]):
+    # text files at least this large are memory-mapped
+    MMAP_MIN_BYTES = 64 * 1024 * 1024
+    # compressed text files at least this large are decoded into the cache
+    # directory and memory-mapped
+    DECODED_MMAP_MIN_BYTES = 8 * 1024 * 1024
+
+    def __init__(
+            self, name: str,
+            path_or_list: Union[str, List[str], VizSeqDataSourceBase]
+    ):
         self.name = name
-        if isinstance(path_or_list, str) and path_or_list.endswith(ZIP_EXT):
+        if isinstance(path_or_list, VizSeqDataSourceBase):
+            self.data_source = path_or_list
+        elif isinstance(path_or_list, str) and path_or_list.endswith(ZIP_EXT):
             self.data_source = VizSeqZipFileSource(path_or_list)
+        elif isinstance(path_or_list, str) and \
+                get_compressed_ext(path_or_list) is not None:
+            self.data_source = VizSeqCompressedTextFileSource(
+                path_or_list, decode_to_cache=op.getsize(path_or_list) >=
+                self.DECODED_MMAP_MIN_BYTES
+            )
+        elif isinstance(path_or_list, str) and \
+                op.getsize(path_or_list) >= self.MMAP_MIN_BYTES:
+            self.data_source = VizSeqMmapTextFileSource(path_or_list)
         elif isinstance(path_or_list, str):
             self.data_source = VizSeqTextFileSource(path_or_list)
         elif isinstance(path_or_list, list):
@@ -308,12 +489,25 @@ class VizSeqDataSource(object):
     def text(self) -> List[str]:
         return self.data_source.text
 
-    def cached(self, ids: List[int]) -> List[str]:
-        return self.data_source.cached(ids)
+    def cached(
+            self, ids: List[int],
+            media_url_fn: Optional[Callable[[int], str]] = None
+    ) -> List[str]:
+        return self.data_source.cached(ids, media_url_fn=media_url_fn)
+
+    def get_media_info(self, idx: int) -> Optional[VizSeqMediaInfo]:
+        return self.data_source.get_media_info(idx)
+
+    def get_media_key(self) -> str:
+        """Identity of the media files of the source (for caches)."""
+        return self.data_source._get_media_key()
 
     def get_len(self, idx: int, finer=False) -> int:
         return self.data_source.get_len(idx, finer=finer)
 
+    def get_lens(self, finer=False) -> np.ndarray:
+        return self.data_source.get_lens(finer=finer)
+
     @property
     def vocab(self) -> List[Tuple[str, int]]:
         return self.data_source.vocab
@@ -325,8 +519,27 @@ class VizSeqDataSource(object):
     def unique(self) -> Set[str]:
         return self.data_source.unique
 
+    def tokenize(
+            self, tokenization: VizSeqTokenization,
+            cache: Optional[VizSeqTokenizationCache] = None
+    ) -> 'VizSeqDataSource':
+        if not self.is_text or tokenization == VizSeqTokenization.none:
+            return self
+        cache = VizSeqTokenizationCache() if cache is None else cache
+        try:
+            # memory-mapped from the cache file rather than held in a list
+            path = cache.get_path(self.text, tokenization)
+        except OSError:
+            return VizSeqDataSource(
+                self.name, cache.get(self.text, tokenization)
+            )
+        return VizSeqDataSource(self.name, VizSeqMmapTextFileSource(path))
+
 
 class VizSeqDataSources(object):
+    # independent files are loaded concurrently
+    MAX_LOAD_THREADS = 8
+
     def __init__(self, path_or_paths_or_dict: PathOrPathsOrDictOfStrList,
                  text_merged: bool = False):
         self.text_merged = text_merged
@@ -342,22 +555,69 @@ class VizSeqDataSources(object):
                 ]
         elif isinstance(path_or_paths_or_dict, list):
             assert all(isinstance(p, str) for p in path_or_paths_or_dict)
-            self.names = _get_data_source_names(path_or_paths_or_dict)
-            self.data = [
-                VizSeqDataSource(n, p)
-                for n, p in zip(self.names, path_or_paths_or_dict)
-            ]
+            paths, shards = group_shard_paths(path_or_paths_or_dict)
+            self.names = _get_data_source_names(paths)
+            self.data = self._load(self.names, [
+                partial(VizSeqShardedTextFileSource, shards[p])
+                if p in shards else p
+                for p in paths
+            ])
         elif isinstance(path_or_paths_or_dict, dict):
             self.names = sorted(path_or_paths_or_dict)
-            self.data = [
-                VizSeqDataSource(n, path_or_paths_or_dict[n])
-                for n in self.names
-            ]
+            self.data = self._load(
+                self.names, [path_or_paths_or_dict[n] for n in self.names]
+            )
         else:
             raise ValueError('Unknown type of data source')
 
         self.n_examples = len(self.data[0]) if len(self.data) > 0 else 0
-        assert all(len(d) == self.n_examples for d in self.data)
+        for n, d in zip(self.names, self.data):
+            assert len(d) == self.n_examples, \
+                f'Source {n} has {len(d)} examples, expected {self.n_examples}'
+
+    @classmethod
+    def _load(
+            cls, names: List[str],
+            items: List[Union[str, List[str], Callable]]
+    ) -> List[VizSeqDataSource]:
+        """Loads data sources, in threads if there are several. Callable
+        items build the data source on the loading thread."""
+        n_threads = min(cls.MAX_LOAD_THREADS, len(names))
+
+        def _load_one(name, item):
+            _start = time.time()
+            source = VizSeqDataSource(name, item() if callable(item) else item)
+            _logger.debug(
+                f'Loaded {item if isinstance(item, str) else name} '
+                f'({len(source)} examples) in {time.time() - _start:.3f}s'
+            )
+            return source
+
+        start = time.time()
+        if n_threads < 2:
+            data = [_load_one(n, i) for n, i in zip(names, items)]
+        else:
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                data = list(executor.map(_load_one, names, items))
+        if len(data) > 1:
+            _logger.debug(
+                f'Loaded {len(data)} data sources in {time.time() - start:.3f}s'
+            )
+        return data
+
+    @classmethod
+    def from_sources(
+            cls, names: List[str], sources: List[VizSeqDataSourceBase],
+            text_merged: bool = False
+    ) -> 'VizSeqDataSources':
+        data_sources = cls(None, text_merged=text_merged)
+        data_sources.names = list(names)
+        data_sources.data = [
+            VizSeqDataSource(n, s) for n, s in zip(names, sources)
+        ]
+        data_sources.n_examples = len(sources[0]) if len(sources) > 0 else 0
+        assert all(len(d) == data_sources.n_examples for d in sources)
+        return data_sources
 
     def __len__(self) -> int:
         return self.n_examples
@@ -403,9 +663,24 @@ class VizSeqDataSources(object):
             return None
         return self.data[idx].text
 
-    def cached(self, ids: List[int]) -> List[List[str]]:
+    def cached(
+            self, ids: List[int],
+            media_url_fn: Optional[Callable[[str, int], str]] = None
+    ) -> List[List[str]]:
         assert all(0 <= i < len(self) for i in ids)
-        return [d.cached(ids) for d in self.data]
+        if media_url_fn is None:
+            return [d.cached(ids) for d in self.data]
+        return [
+            d.cached(ids, media_url_fn=lambda i, n=n: media_url_fn(n, i))
+            for n, d in zip(self.names, self.data)
+        ]
+
+    def get_media_info(
+            self, name: str, idx: int
+    ) -> Optional[VizSeqMediaInfo]:
+        if name not in self.names:
+            return None
+        return self.data[self.names.index(name)].get_media_info(idx)
 
     @property
     def has_text(self):
@@ -415,6 +690,16 @@ class VizSeqDataSources(object):
     def has_audio(self):
         return any(d.is_audio for d in self.data)
 
+    def tokenize(self, tokenization: VizSeqTokenization) -> 'VizSeqDataSources':
+        if tokenization == VizSeqTokenization.none:
+            return self
+        cache = VizSeqTokenizationCache()
+        tokenized = VizSeqDataSources(None, text_merged=self.text_merged)
+        tokenized.names = list(self.names)
+        tokenized.data = [d.tokenize(tokenization, cache) for d in self.data]
+        tokenized.n_examples = self.n_examples
+        return tokenized
+
     def unique(
             self, text=True, image=False, audio=False, video=False
     ) -> Set[str]:
@@ -0,0 +1,77 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
+from typing import Callable, List, Optional, TypeVar
+
+import numpy as np
+import soundfile as sf
+
+from vizseq._utils.cache_dir import get_cache_dir
+
+T = TypeVar('T')
+
+
+def get_duration_ms(path_or_fp) -> int:
+    """Audio duration from the file header (without decoding samples)."""
+    info = sf.info(path_or_fp)
+    return int(info.frames / info.samplerate * 1000)
+
+
+def get_n_frames(duration_ms: np.ndarray) -> np.ndarray:
+    """Number of filter bank frames (25ms window, 10ms shift)."""
+    return (1 + (np.asarray(duration_ms) - 25) / 10).astype(np.int64)
+
+
+class VizSeqDurationIndex(object):
+    """Per-source audio durations (ms), probed in parallel from file headers
+    and persisted under the cache directory by source key."""
+    CACHE_SUB_DIR = 'durations'
+
+    @classmethod
+    def _get_path(cls, key: str) -> str:
+        return op.join(get_cache_dir(cls.CACHE_SUB_DIR), f'{key}.npy')
+
+    @classmethod
+    def probe(
+            cls, items: List[T], probe_fn: Callable[[T], int],
+            n_threads: Optional[int] = None
+    ) -> np.ndarray:
+        # header reads are I/O bound: threads overlap them well
+        n_threads = min(32, cpu_count() * 4) if n_threads is None \
+            else n_threads
+        if len(items) < 2 or n_threads < 2:
+            return np.array([probe_fn(i) for i in items], dtype=np.int64)
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            return np.array(list(executor.map(probe_fn, items)),
+                            dtype=np.int64)
+
+    @classmethod
+    def get(
+            cls, key: str, n_items: int,
+            probe_all_fn: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        path = cls._get_path(key)
+        if op.exists(path):
+            try:
+                durations = np.load(path)
+                if len(durations) == n_items:
+                    return durations
+            except (OSError, ValueError):
+                pass
+        durations = probe_all_fn()
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, durations)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        return durations
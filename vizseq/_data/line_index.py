@@ -0,0 +1,126 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import mmap
+from collections.abc import Sequence
+from typing import List, Iterator, Optional, Union
+
+import numpy as np
+
+from vizseq._utils.cache_dir import get_cache_dir, get_content_hash
+
+LINE_INDEX_EXT = '.lidx.npy'
+# rows of the index header (file size and mtime of the indexed file)
+_N_HEADER = 2
+
+
+def _get_index_paths(path: str) -> List[str]:
+    """A hidden sidecar next to the file (not matched by task globs) first,
+    then a fallback under the cache directory (for read-only data)."""
+    path = op.abspath(path)
+    sidecar = op.join(op.dirname(path), f'.{op.basename(path)}{LINE_INDEX_EXT}')
+    fallback = op.join(
+        get_cache_dir('line_index'), get_content_hash([path]) + LINE_INDEX_EXT
+    )
+    return [sidecar, fallback]
+
+
+def _get_header(path: str) -> np.ndarray:
+    stat = os.stat(path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def build_line_offsets(buffer) -> np.ndarray:
+    """Start offsets of all lines plus the end offset of the last line."""
+    size = len(buffer)
+    if size == 0:
+        return np.zeros(1, dtype=np.int64)
+    newlines = np.flatnonzero(
+        np.frombuffer(buffer, dtype=np.uint8) == ord('\n')
+    ).astype(np.int64)
+    ends = newlines + 1
+    if len(ends) == 0 or ends[-1] != size:
+        ends = np.append(ends, size)
+    return np.concatenate([np.zeros(1, dtype=np.int64), ends])
+
+
+def load_line_offsets(path: str, buffer) -> np.ndarray:
+    """Loads the persisted line-offset index of `path`, (re)building it when
+    missing or stale (size or mtime changed)."""
+    header = _get_header(path)
+    index_paths = _get_index_paths(path)
+    for p in index_paths:
+        if op.exists(p):
+            try:
+                index = np.load(p, mmap_mode='r')
+            except (OSError, ValueError):
+                continue
+            if np.array_equal(index[:_N_HEADER], header):
+                return index[_N_HEADER:]
+    offsets = build_line_offsets(buffer)
+    save_line_offsets(path, offsets)
+    return offsets
+
+
+def save_line_offsets(path: str, offsets: np.ndarray) -> None:
+    """Persists the line-offset index of `path` (e.g. built while the file
+    was being written)."""
+    index = np.concatenate([_get_header(path), offsets])
+    for p in _get_index_paths(path):
+        tmp_path = f'{p}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, index)
+            os.replace(tmp_path, p)
+            break
+        except OSError:
+            continue
+
+
+class VizSeqMmapLines(Sequence):
+    """Read-only sequence of the (stripped) lines of a UTF-8 text file. Lines
+    are decoded on demand from a memory-mapped file."""
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _open(self) -> None:
+        self._mmap: Optional[mmap.mmap] = None
+        buffer = b''
+        if op.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buffer = self._mmap
+        self.offsets = load_line_offsets(self.path, buffer)
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _decode(self, start: int, end: int) -> str:
+        return self._mmap[start: end].decode('utf-8').strip()
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('line index out of range')
+        return self._decode(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._decode(int(self.offsets[i]), int(self.offsets[i + 1]))
@@ -0,0 +1,325 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import mmap
+import json
+import struct
+from glob import glob
+from collections.abc import Sequence
+from typing import List, Dict, Optional, Tuple, Iterator, Union
+
+import numpy as np
+
+from .data_sources import (VizSeqDataSourceBase, VizSeqDataSources,
+                           VizSeqDataType, get_name_from_path, TXT_EXT)
+from .compressed import strip_compressed_ext, iter_lines
+from .sharded import group_shard_paths
+
+PACKED_FILENAME = 'task.vizseq'
+PACKED_MAGIC = b'VZSQPACK'
+PACKED_VERSION = 1
+# magic, version (uint32), header length (uint32)
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGN = 64
+
+# column kinds and the task files they are packed from
+PACKED_KINDS = {'src': 'src_*.*', 'ref': 'ref_*.*', 'pred': 'pred_*.*',
+                'tag': 'tag_*.*'}
+
+
+def _get_packable_files(dir_path: str) -> Dict[str, List[str]]:
+    """Task files by column kind (kinds with non-text files are skipped).
+    Compressed text files are packed in their decoded form."""
+    files = {k: sorted(glob(op.join(dir_path, p)))
+             for k, p in PACKED_KINDS.items()}
+    return {k: paths for k, paths in files.items()
+            if all(strip_compressed_ext(p).endswith(TXT_EXT) for p in paths)}
+
+
+def _get_file_stat(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _pad(n: int) -> int:
+    return (_ALIGN - n % _ALIGN) % _ALIGN
+
+
+class _ArrayWriter(object):
+    def __init__(self):
+        self.arrays: List[np.ndarray] = []
+        self.size = 0
+
+    def add(self, array: np.ndarray) -> List:
+        array = np.ascontiguousarray(array)
+        spec = [self.size, array.dtype.str, len(array)]
+        self.arrays.append(array)
+        self.size += array.nbytes + _pad(array.nbytes)
+        return spec
+
+    def write(self, f) -> None:
+        for a in self.arrays:
+            f.write(a.tobytes())
+            f.write(b'\0' * _pad(a.nbytes))
+
+
+def _add_strings(writer: _ArrayWriter, strings: List[str]) -> Dict:
+    """UTF-8 blob with a trailing newline after every string (so that a
+    search never matches across strings) and start offsets."""
+    encoded = [s.encode('utf-8') + b'\n' for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return {
+        'blob': writer.add(np.frombuffer(b''.join(encoded), dtype=np.uint8)),
+        'offsets': writer.add(offsets)
+    }
+
+
+def pack_task(dir_path: str, out_path: Optional[str] = None) -> str:
+    """Converts the text files of a task directory into a single columnar
+    binary file. Non-text sources (e.g. images or audio) are not packed."""
+    out_path = op.join(dir_path, PACKED_FILENAME) if out_path is None \
+        else out_path
+    writer = _ArrayWriter()
+    vocab: Dict[str, int] = {}
+    columns, sources, tag_lines = [], {}, []
+    n_examples = None
+    for kind, paths in _get_packable_files(dir_path).items():
+        # shards of a file are packed as a single column
+        paths, shards = group_shard_paths(paths)
+        for p in paths:
+            shard_paths = shards.get(p, [p])
+            lines = [l for s in shard_paths for l in iter_lines(s)]
+            if n_examples is None:
+                n_examples = len(lines)
+            assert len(lines) == n_examples, f'Length mismatch: {p}'
+            tokens = [l.split() for l in lines]
+            token_ids = np.array(
+                [vocab.setdefault(t, len(vocab)) for s in tokens for t in s],
+                dtype=np.int32
+            )
+            n_tokens = np.array([len(s) for s in tokens], dtype=np.int32)
+            token_offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+            np.cumsum(n_tokens, out=token_offsets[1:])
+            arrays = _add_strings(writer, lines)
+            arrays.update({
+                'n_tokens': writer.add(n_tokens),
+                'n_chars': writer.add(
+                    np.array([len(l) for l in lines], dtype=np.int32)
+                ),
+                'token_ids': writer.add(token_ids),
+                'token_offsets': writer.add(token_offsets),
+            })
+            columns.append({'kind': kind, 'name': get_name_from_path(p),
+                            'arrays': arrays})
+            for s in shard_paths:
+                sources[op.basename(s)] = _get_file_stat(s)
+            if kind == 'tag':
+                tag_lines.append(lines)
+
+    # tags per example in CSR form (one tag per tag file)
+    tag_names = sorted(set(t for lines in tag_lines for t in lines))
+    tag_to_idx = {t: i for i, t in enumerate(tag_names)}
+    n_examples = n_examples or 0
+    tag_indptr = np.arange(n_examples + 1, dtype=np.int64) * len(tag_lines)
+    tag_indices = np.array(
+        [tag_to_idx[t] for ts in zip(*tag_lines) for t in ts], dtype=np.int32
+    )
+    vocab_list = sorted(vocab, key=vocab.get)
+    header = {
+        'version': PACKED_VERSION,
+        'n_examples': n_examples,
+        'sources': sources,
+        'columns': columns,
+        'vocab': _add_strings(writer, vocab_list),
+        'tags': {'names': tag_names, 'indptr': writer.add(tag_indptr),
+                 'indices': writer.add(tag_indices)},
+    }
+    header = json.dumps(header).encode('utf-8')
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(PACKED_MAGIC, PACKED_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\0' * _pad(_PREAMBLE.size + len(header)))
+        writer.write(f)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class VizSeqPackedTask(object):
+    """Zero-copy (memory-mapped) reader of a packed task file."""
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            raise ValueError(f'Not a VizSeq packed task (v{PACKED_VERSION})')
+        header_end = _PREAMBLE.size + header_len
+        self.header = json.loads(self._mmap[_PREAMBLE.size: header_end])
+        self._data_start = header_end + _pad(header_end)
+        self._vocab = None
+
+    @classmethod
+    def open(cls, dir_path: str) -> Optional['VizSeqPackedTask']:
+        """Opens the packed file of a task directory if it is present and
+        up to date with the text files it was built from."""
+        path = op.join(dir_path, PACKED_FILENAME)
+        if not op.exists(path):
+            return None
+        try:
+            packed = cls(path)
+        except ValueError:
+            return None
+        packed_files = {
+            op.basename(p) for paths in _get_packable_files(dir_path).values()
+            for p in paths
+        }
+        sources = packed.header['sources']
+        if set(sources) != packed_files or any(
+                _get_file_stat(op.join(dir_path, n)) != s
+                for n, s in sources.items()
+        ):
+            return None
+        return packed
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def n_examples(self) -> int:
+        return self.header['n_examples']
+
+    def get_array(self, spec: List) -> np.ndarray:
+        offset, dtype, count = spec
+        return np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count,
+                             offset=self._data_start + offset)
+
+    @property
+    def vocab(self) -> 'VizSeqPackedLines':
+        if self._vocab is None:
+            self._vocab = VizSeqPackedLines(self, self.header['vocab'])
+        return self._vocab
+
+    def get_names(self, kind: str) -> List[str]:
+        return [c['name'] for c in self.header['columns'] if c['kind'] == kind]
+
+    def get_sources(
+            self, kind: str, names: Optional[List[str]] = None,
+            text_merged: bool = False
+    ) -> Optional[VizSeqDataSources]:
+        columns = {c['name']: c for c in self.header['columns']
+                   if c['kind'] == kind}
+        names = self.get_names(kind) if names is None else names
+        if len(columns) == 0 or any(n not in columns for n in names):
+            return None
+        return VizSeqDataSources.from_sources(
+            names, [VizSeqPackedTextSource(self, columns[n]) for n in names],
+            text_merged=text_merged
+        )
+
+    def get_tags(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Tag names and CSR (indptr, indices) arrays of tags per example."""
+        tags = self.header['tags']
+        return tags['names'], self.get_array(tags['indptr']), \
+            self.get_array(tags['indices'])
+
+
+class VizSeqPackedLines(Sequence):
+    """Read-only sequence of the strings of a packed column."""
+    def __init__(self, packed: VizSeqPackedTask, arrays: Dict[str, List]):
+        self.packed = packed
+        self.arrays = arrays
+        self._blob_start = packed._data_start + arrays['blob'][0]
+        self.offsets = packed.get_array(arrays['offsets'])
+
+    def __getstate__(self):
+        return {'packed': self.packed, 'arrays': self.arrays}
+
+    def __setstate__(self, state):
+        self.__init__(state['packed'], state['arrays'])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _decode(self, i: int) -> str:
+        start = self._blob_start + int(self.offsets[i])
+        end = self._blob_start + int(self.offsets[i + 1]) - 1
+        return self.packed._mmap[start: end].decode('utf-8')
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self._decode(k) for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('index out of range')
+        return self._decode(i)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def find_all(self, query: str) -> np.ndarray:
+        """Indices of the strings containing `query` (searched in the blob
+        without decoding)."""
+        if '\n' in query:
+            return np.zeros(0, dtype=np.int64)
+        query = query.encode('utf-8')
+        end = self._blob_start + int(self.offsets[-1])
+        indices, pos = [], self.packed._mmap.find(query, self._blob_start, end)
+        while pos > -1:
+            i = int(np.searchsorted(
+                self.offsets, pos - self._blob_start, side='right'
+            )) - 1
+            indices.append(i)
+            pos = self.packed._mmap.find(
+                query, self._blob_start + int(self.offsets[i + 1]), end
+            )
+        return np.array(indices, dtype=np.int64)
+
+
+class VizSeqPackedTextSource(VizSeqDataSourceBase):
+    def __init__(self, packed: VizSeqPackedTask, column: Dict):
+        self.packed = packed
+        self.column = column
+        self.data = VizSeqPackedLines(packed, column['arrays'])
+
+    def _get_array(self, key: str) -> np.ndarray:
+        return self.packed.get_array(self.column['arrays'][key])
+
+    @property
+    def data_type(self) -> VizSeqDataType:
+        return VizSeqDataType.text
+
+    def get_len(self, idx: int, finer=False) -> int:
+        if not 0 <= idx <= len(self):
+            raise ValueError(f'Invalid index {idx}')
+        return int(self._get_array('n_chars' if finer else 'n_tokens')[idx])
+
+    def get_lens(self, finer=False) -> np.ndarray:
+        return self._get_array('n_chars' if finer else 'n_tokens')
+
+    @property
+    def token_ids(self) -> np.ndarray:
+        return self._get_array('token_ids')
+
+    @property
+    def vocab(self) -> List[Tuple[str, int]]:
+        # same order as Counter.most_common(): ties by first occurrence
+        ids, first, counts = np.unique(
+            self.token_ids, return_index=True, return_counts=True
+        )
+        order = np.lexsort((first, -counts))
+        vocab = self.packed.vocab
+        return [(vocab[ids[i]], int(counts[i])) for i in order]
+
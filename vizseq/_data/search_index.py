@@ -0,0 +1,231 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Sequence, Dict, Callable, Optional
+
+import numpy as np
+
+from vizseq._utils.cache_dir import get_cache_dir
+
+_ARRAY_NAMES = ('keys', 'indptr', 'postings')
+_CHUNK_SIZE = 100000
+# code point bits (Unicode code points are below 2^21)
+_BITS = 21
+
+
+def _encode(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)\
+        .astype(np.uint64)
+
+
+def _get_trigram_keys(codes: np.ndarray) -> np.ndarray:
+    return (codes[:-2] << (2 * _BITS)) | (codes[1:-1] << _BITS) | codes[2:]
+
+
+def _get_pairs(lines: List[str], start: int):
+    """(trigram, example index) pairs of a chunk of strings, deduplicated.
+    Each string is followed by two newlines, so that every character
+    (including the last two of a string) starts a trigram."""
+    codes = _encode('\n\n'.join(lines) + '\n\n')
+    ids = np.repeat(np.arange(start, start + len(lines), dtype=np.int32),
+                    [len(l) + 2 for l in lines])
+    keys = _get_trigram_keys(codes)
+    valid = codes[:-2] != ord('\n')
+    keys, ids = keys[valid], ids[:-2][valid]
+    order = np.lexsort((ids, keys))
+    keys, ids = keys[order], ids[order]
+    new = np.ones(len(keys), dtype=bool)
+    new[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+    return keys[new], ids[new]
+
+
+class VizSeqSearchIndex(object):
+    """Character trigram inverted index over the examples of a task (an
+    example matches if any of its text columns matches). Queries of up to
+    3 characters are answered from the index alone; longer ones are
+    verified on the candidates, so results are the same as a substring
+    search (`str.find`)."""
+    CACHE_SUB_DIR = 'search_index'
+    MAX_LOADED = 16
+
+    _executor = ThreadPoolExecutor(max_workers=1)
+    _building: Dict[str, Future] = {}
+    _loaded: 'OrderedDict[str, VizSeqSearchIndex]' = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, keys: np.ndarray, indptr: np.ndarray,
+                 postings: np.ndarray):
+        self.keys = keys
+        self.indptr = indptr
+        self.postings = postings
+
+    @classmethod
+    def build(cls, data: List[Sequence[str]]) -> 'VizSeqSearchIndex':
+        all_keys, all_ids = [], []
+        for column in data:
+            for start in range(0, len(column), _CHUNK_SIZE):
+                keys, ids = _get_pairs(
+                    list(column[start: start + _CHUNK_SIZE]), start
+                )
+                all_keys.append(keys)
+                all_ids.append(ids)
+        keys = np.concatenate(all_keys) if len(all_keys) > 0 \
+            else np.zeros(0, dtype=np.uint64)
+        ids = np.concatenate(all_ids) if len(all_ids) > 0 \
+            else np.zeros(0, dtype=np.int32)
+        if len(data) > 1:
+            order = np.lexsort((ids, keys))
+            keys, ids = keys[order], ids[order]
+            new = np.ones(len(keys), dtype=bool)
+            new[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+            keys, ids = keys[new], ids[new]
+        else:
+            # chunks are sorted by (key, id) and cover increasing ids
+            order = np.argsort(keys, kind='stable')
+            keys, ids = keys[order], ids[order]
+        starts = np.flatnonzero(np.diff(keys)) + 1 if len(keys) > 0 \
+            else np.zeros(0, dtype=np.int64)
+        indptr = np.concatenate([[0], starts, [len(keys)]]).astype(np.int64) \
+            if len(keys) > 0 else np.zeros(1, dtype=np.int64)
+        return cls(keys[indptr[:-1]], indptr, ids)
+
+    def _get_postings(self, lo: int, hi: int) -> np.ndarray:
+        """Example indices of the trigrams in [lo, hi)."""
+        a, b = np.searchsorted(self.keys, [lo, hi])
+        return self.postings[self.indptr[a]: self.indptr[b]]
+
+    def find(self, query: str, data: List[Sequence[str]]) -> List[int]:
+        """Sorted indices of the examples that contain `query`."""
+        if len(query) == 0:
+            return list(range(len(data[0])))
+        if '\n' in query:
+            return [i for i, cur in enumerate(zip(*data))
+                    if any(s.find(query) > -1 for s in cur)]
+        codes = _encode(query)
+        if len(codes) <= 2:
+            # the trigrams starting with the query
+            shift = _BITS * (3 - len(codes))
+            lo = int(_get_trigram_keys(
+                np.concatenate([codes, np.zeros(3 - len(codes), np.uint64)])
+            )[0])
+            return np.unique(self._get_postings(lo, lo + (1 << shift)))\
+                .tolist()
+        keys = np.unique(_get_trigram_keys(codes))
+        postings = [self._get_postings(int(k), int(k) + 1) for k in keys]
+        postings.sort(key=len)
+        candidates = np.unique(postings[0])
+        for p in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, p, assume_unique=False)
+        candidates = candidates.tolist()
+        if len(codes) == 3:
+            return candidates
+        return [i for i in candidates
+                if any(d[i].find(query) > -1 for d in data)]
+
+    @classmethod
+    def _get_name(cls, key: str, group: Optional[str] = None) -> str:
+        return key if group is None else f'{group}.{key}'
+
+    @classmethod
+    def _get_dir(cls, key: str, group: Optional[str] = None) -> str:
+        return op.join(get_cache_dir(cls.CACHE_SUB_DIR),
+                       cls._get_name(key, group))
+
+    @classmethod
+    def _prune(cls, key: str, group: str) -> None:
+        """Removes the other (stale) indices of a group."""
+        root = get_cache_dir(cls.CACHE_SUB_DIR)
+        name = cls._get_name(key, group)
+        for n in os.listdir(root):
+            if n.startswith(f'{group}.') and n != name and \
+                    not n.endswith('.tmp'):
+                shutil.rmtree(op.join(root, n), ignore_errors=True)
+                with cls._lock:
+                    cls._loaded.pop(n, None)
+
+    def save(self, key: str, group: Optional[str] = None) -> None:
+        """Persists the index under `key`. Indices are grouped (e.g. per
+        task) so that saving one removes the older ones of its group."""
+        path = self._get_dir(key, group)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(tmp_path, exist_ok=True)
+        for n in _ARRAY_NAMES:
+            np.save(op.join(tmp_path, f'{n}.npy'), getattr(self, n))
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # built concurrently by another process
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        if group is not None:
+            self._prune(key, group)
+
+    @classmethod
+    def load(
+            cls, key: str, group: Optional[str] = None
+    ) -> Optional['VizSeqSearchIndex']:
+        name = cls._get_name(key, group)
+        with cls._lock:
+            if name in cls._loaded:
+                cls._loaded.move_to_end(name)
+                return cls._loaded[name]
+        path = cls._get_dir(key, group)
+        if not op.isdir(path):
+            return None
+        try:
+            index = cls(*[np.load(op.join(path, f'{n}.npy'), mmap_mode='r')
+                          for n in _ARRAY_NAMES])
+        except (OSError, ValueError):
+            return None
+        with cls._lock:
+            cls._loaded[name] = index
+            while len(cls._loaded) > cls.MAX_LOADED:
+                cls._loaded.popitem(last=False)
+        return index
+
+    @classmethod
+    def _build_and_save(
+            cls, key: str, data_fn: Callable[[], List[Sequence[str]]],
+            group: Optional[str] = None
+    ) -> None:
+        try:
+            cls.build(data_fn()).save(key, group)
+        finally:
+            with cls._lock:
+                cls._building.pop(cls._get_name(key, group), None)
+
+    @classmethod
+    def get(
+            cls, key: str, data_fn: Callable[[], List[Sequence[str]]],
+            group: Optional[str] = None
+    ) -> Optional['VizSeqSearchIndex']:
+        """The persisted index under `key`, or None if it is not built yet
+        (it is then built in a background thread)."""
+        index = cls.load(key, group)
+        if index is None:
+            name = cls._get_name(key, group)
+            with cls._lock:
+                if name not in cls._building:
+                    cls._building[name] = cls._executor.submit(
+                        cls._build_and_save, key, data_fn, group
+                    )
+        return index
+
+    @classmethod
+    def wait(cls) -> None:
+        """Waits for the indices being built."""
+        with cls._lock:
+            futures = list(cls._building.values())
+        for f in futures:
+            f.result()
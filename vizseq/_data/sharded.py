@@ -0,0 +1,147 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import re
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Iterator, Optional, Union
+
+import numpy as np
+
+from .line_index import VizSeqMmapLines
+from .compressed import get_compressed_ext, get_decoded_path
+from vizseq._utils.cache_dir import get_cache_dir, get_content_hash
+
+# e.g. ref_0.part-00000.txt or ref_0.part-00000.txt.gz
+_SHARD_RE = re.compile(r'^(?P<prefix>.+)\.part-(?P<idx>\d+)(?P<ext>\.[^.]+)'
+                       r'(?P<compressed>\.(gz|xz|zst))?$')
+
+
+def get_shard_index(path: str) -> Optional[int]:
+    m = _SHARD_RE.match(op.basename(path))
+    return None if m is None else int(m.group('idx'))
+
+
+def group_shard_paths(
+        paths: List[str]
+) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Replaces shard paths (`{name}.part-NNNNN.txt`) by the path of the
+    logical file they form (`{name}.txt`), keeping the order of first
+    occurrence. Returns the paths and the (ordered) shards of each logical
+    path."""
+    out_paths, shards = [], {}
+    for p in paths:
+        m = _SHARD_RE.match(op.basename(p))
+        if m is None:
+            out_paths.append(p)
+            continue
+        logical_path = op.join(
+            op.dirname(p), m.group('prefix') + m.group('ext')
+        )
+        if logical_path not in shards:
+            out_paths.append(logical_path)
+            shards[logical_path] = []
+        shards[logical_path].append(p)
+    for s in shards.values():
+        s.sort(key=get_shard_index)
+    return out_paths, shards
+
+
+def _open_shard(path: str) -> VizSeqMmapLines:
+    if get_compressed_ext(path) is not None:
+        path = get_decoded_path(path)
+    return VizSeqMmapLines(path)
+
+
+def _count_lines(path: str) -> int:
+    return len(_open_shard(path))
+
+
+def get_shard_offsets(paths: List[str]) -> np.ndarray:
+    """Global offset table: the index of the first line of every shard plus
+    the total number of lines. Persisted under the cache directory by shard
+    identity (path, size and mtime), so that shards are not opened at all
+    once it is built."""
+    keys = []
+    for p in paths:
+        stat = os.stat(p)
+        keys.append(f'{op.abspath(p)}\t{stat.st_size}\t{stat.st_mtime_ns}')
+    cache_path = op.join(get_cache_dir('shards'),
+                         get_content_hash(keys) + '.npy')
+    if op.exists(cache_path):
+        try:
+            offsets = np.load(cache_path)
+            if len(offsets) == len(paths) + 1:
+                return offsets
+        except (OSError, ValueError):
+            pass
+    n_threads = min(8, len(paths))
+    if n_threads < 2:
+        counts = [_count_lines(p) for p in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            counts = list(executor.map(_count_lines, paths))
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, offsets)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return offsets
+
+
+class VizSeqShardedLines(Sequence):
+    """Read-only sequence of the (stripped) lines of many shard files, as a
+    single logical column. Shards are opened (memory-mapped) on first
+    access only."""
+    def __init__(self, paths: List[str], offsets: Optional[np.ndarray] = None):
+        self.paths = list(paths)
+        self.offsets = get_shard_offsets(self.paths) if offsets is None \
+            else offsets
+        self._shards: List[Optional[VizSeqMmapLines]] = [None] * len(paths)
+
+    def __getstate__(self):
+        return {'paths': self.paths, 'offsets': self.offsets}
+
+    def __setstate__(self, state):
+        self.__init__(state['paths'], state['offsets'])
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.paths)
+
+    def get_shard(self, k: int) -> VizSeqMmapLines:
+        if self._shards[k] is None:
+            self._shards[k] = _open_shard(self.paths[k])
+        return self._shards[k]
+
+    def select_shards(self, start: int, end: int) -> 'VizSeqShardedLines':
+        """The lines of shards [start, end) (no shard is opened)."""
+        offsets = self.offsets[start: end + 1] - self.offsets[start]
+        return VizSeqShardedLines(self.paths[start: end], offsets)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('line index out of range')
+        k = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        return self.get_shard(k)[i - int(self.offsets[k])]
+
+    def __iter__(self) -> Iterator[str]:
+        for k in range(self.n_shards):
+            yield from self.get_shard(k)
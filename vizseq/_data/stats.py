@@ -69,9 +69,8 @@ class VizSeqStats(object):
         tag_freq = Counter()
 
         for name, cur_src in zip(src.names, src.data):
-            for i in range(len(cur_src)):
-                src_lens[name].append(cur_src.get_len(i))
-                n_src_chars[name] += cur_src.get_len(i, finer=True)
+            src_lens[name] = cur_src.get_lens().tolist()
+            n_src_chars[name] = int(cur_src.get_lens(finer=True).sum())
             src_vocab[name] = cur_src.vocab
             n_src_tokens[name] = sum(src_lens[name])
             src_lens[name] = cls.auto_sample(src_lens[name])
@@ -79,9 +78,8 @@ class VizSeqStats(object):
                 src_lens[name] = []
 
         for name, cur_ref in zip(ref.names, ref.data):
-            for i in range(len(cur_ref)):
-                ref_lens[name].append(cur_ref.get_len(i))
-                n_ref_chars[name] += cur_ref.get_len(i, finer=True)
+            ref_lens[name] = cur_ref.get_lens().tolist()
+            n_ref_chars[name] = int(cur_ref.get_lens(finer=True).sum())
             ref_vocab[name] = cur_ref.vocab
             n_ref_tokens[name] = sum(ref_lens[name])
             ref_lens[name] = cls.auto_sample(ref_lens[name])
@@ -0,0 +1,182 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import time
+import hashlib
+import threading
+import importlib.util
+from typing import Dict, Tuple, Optional
+
+from .config_manager import VizSeqBaseConfigManager
+from .data_sources import get_name_from_path, RESERVED_FILE_PREFIXES
+from .packed import PACKED_FILENAME
+from .sharded import group_shard_paths
+
+# file group of the packed task file and of the task config
+PACKED_GROUP = 'packed'
+CFG_GROUP = 'cfg'
+
+
+def get_file_group(filename: str) -> Optional[str]:
+    """Cache group of a task file: `src`, `ref`, `tag`, `pred_{model}`,
+    `packed` or `cfg` (None for files that do not affect task data, e.g.
+    hidden index sidecars)."""
+    if filename.startswith('.'):
+        return None
+    if filename == PACKED_FILENAME:
+        return PACKED_GROUP
+    if filename == VizSeqBaseConfigManager.JSON_FILENAME:
+        return CFG_GROUP
+    prefix = next(
+        (p for p in RESERVED_FILE_PREFIXES if filename.startswith(p)), None
+    )
+    if prefix is None:
+        return None
+    if prefix == 'pred_':
+        (path, ), _ = group_shard_paths([filename])
+        return f'pred_{get_name_from_path(path)}'
+    return prefix[:-1]
+
+
+def _scan(dir_path: str) -> Dict[str, str]:
+    """Version (a hash of file names, sizes and mtimes) of every file group
+    in a task directory."""
+    stats: Dict[str, list] = {}
+    try:
+        entries = list(os.scandir(dir_path))
+    except OSError:
+        entries = []
+    for e in entries:
+        group = get_file_group(e.name)
+        if group is None:
+            continue
+        try:
+            stat = e.stat()
+        except OSError:
+            continue
+        stats.setdefault(group, []).append(
+            f'{e.name}\t{stat.st_size}\t{stat.st_mtime_ns}'
+        )
+    return {
+        g: hashlib.sha1('\n'.join(sorted(s)).encode('utf-8')).hexdigest()[:16]
+        for g, s in stats.items()
+    }
+
+
+class _InotifyWatch(object):
+    """Change notifications for a directory via inotify (if the optional
+    `inotify_simple` package is available)."""
+    def __init__(self, dir_path: str):
+        from inotify_simple import INotify, flags
+        self._inotify = INotify()
+        self._inotify.add_watch(
+            dir_path, flags.CREATE | flags.DELETE | flags.MODIFY |
+            flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM |
+            flags.ATTRIB | flags.DELETE_SELF | flags.MOVE_SELF
+        )
+
+    def has_changes(self) -> bool:
+        # non-blocking: drains pending events
+        events = self._inotify.read(timeout=0)
+        return any(get_file_group(e.name) is not None or e.name == ''
+                   for e in events)
+
+    def close(self) -> None:
+        self._inotify.close()
+
+
+class VizSeqTaskWatcher(object):
+    """Tracks per-group data versions of task directories. Directories are
+    rescanned when inotify reports a change or, without inotify, at most
+    every POLL_INTERVAL seconds (by file sizes and mtimes)."""
+    POLL_INTERVAL = 1.0
+    # dir path -> (versions, last scan time, inotify watch)
+    _tasks: Dict[str, Tuple[Dict[str, str], float, Optional[_InotifyWatch]]] \
+        = {}
+    # dir path -> group -> number of writes by this process (see `invalidate`)
+    _bumps: Dict[str, Dict[str, int]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def is_inotify_available(cls) -> bool:
+        return importlib.util.find_spec('inotify_simple') is not None
+
+    @classmethod
+    def _watch(cls, dir_path: str) -> Optional[_InotifyWatch]:
+        if not cls.is_inotify_available():
+            return None
+        try:
+            return _InotifyWatch(dir_path)
+        except OSError:
+            # e.g. out of watches or an unsupported file system
+            return None
+
+    @classmethod
+    def get_versions(cls, dir_path: str) -> Dict[str, str]:
+        dir_path = op.abspath(dir_path)
+        with cls._lock:
+            state = cls._tasks.get(dir_path, None)
+            now = time.time()
+            if state is None:
+                # watch before scanning so that no change is missed
+                watch = cls._watch(dir_path)
+                state = (_scan(dir_path), now, watch)
+            else:
+                versions, last_scan, watch = state
+                if watch is not None:
+                    changed = watch.has_changes()
+                else:
+                    changed = now - last_scan >= cls.POLL_INTERVAL
+                if changed:
+                    state = (_scan(dir_path), now, watch)
+            cls._tasks[dir_path] = state
+            bumps = cls._bumps.get(dir_path, {})
+            return {
+                **state[0],
+                **{g: f'{state[0].get(g, "")}+{n}' for g, n in bumps.items()}
+            }
+
+    @classmethod
+    def invalidate(cls, dir_path: str, *groups: str) -> None:
+        """Changes the versions of file groups written by this process, since
+        a poll may not see the write until POLL_INTERVAL (or at all if the
+        file size and mtime are unchanged)."""
+        dir_path = op.abspath(dir_path)
+        with cls._lock:
+            bumps = cls._bumps.setdefault(dir_path, {})
+            for g in groups:
+                bumps[g] = bumps.get(g, 0) + 1
+            state = cls._tasks.get(dir_path, None)
+            if state is not None:
+                cls._tasks[dir_path] = (_scan(dir_path), time.time(), state[2])
+
+    @classmethod
+    def get_version(cls, dir_path: str, *groups: str) -> str:
+        """Version of the given file groups (and of the packed task file,
+        which any group may be read from)."""
+        versions = cls.get_versions(dir_path)
+        return ':'.join(
+            versions.get(g, '') for g in (PACKED_GROUP, ) + groups
+        )
+
+    @classmethod
+    def get_data_version(cls, dir_path: str) -> str:
+        """Version of all data (and the config) of a task, e.g. for ETags."""
+        versions = cls.get_versions(dir_path)
+        key = '\n'.join(f'{g}\t{v}' for g, v in sorted(versions.items()))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            for _, _, watch in cls._tasks.values():
+                if watch is not None:
+                    watch.close()
+            cls._tasks = {}
+            cls._bumps = {}
@@ -0,0 +1,137 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import hashlib
+import importlib.util
+from concurrent.futures import Future
+from multiprocessing import cpu_count
+from typing import List, Optional, Tuple
+
+from .data_sources import VizSeqMediaInfo
+from vizseq._utils.cache_dir import get_cache_dir
+from vizseq._utils.worker_pool import VizSeqWorkerPool
+
+THUMBNAIL_WIDTHS = (160, 320, 640)
+# SVGs are served as they are
+THUMBNAIL_MIME_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/bmp'}
+
+
+def _get_format() -> Tuple[str, str]:
+    from PIL import features
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+class VizSeqThumbnailError(ValueError):
+    pass
+
+
+def _make_thumbnails(info: VizSeqMediaInfo, paths: List[str]) -> None:
+    from PIL import Image
+    pil_format, _ = _get_format()
+    modes = {'RGB', 'L', 'RGBA'} if pil_format == 'WEBP' else {'RGB', 'L'}
+    try:
+        with info.open() as f:
+            image = Image.open(f)
+            image.load()
+        if image.mode not in modes:
+            image = image.convert('RGBA' if 'RGBA' in modes else 'RGB')
+    except Exception as e:
+        # corrupt, truncated or unsupported image (or decompression bomb)
+        raise VizSeqThumbnailError(f'Cannot decode {info.path}: {e}')
+    for width, path in zip(THUMBNAIL_WIDTHS, paths):
+        resized = image
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        resized.save(tmp_path, format=pil_format, quality=85)
+        os.replace(tmp_path, path)
+
+
+class VizSeqThumbnailCache(object):
+    """On-disk thumbnails of source images at fixed widths, keyed by image
+    identity (path, zip member, size and mtime). Thumbnails are generated in
+    a process pool."""
+    CACHE_SUB_DIR = 'thumbnails'
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = get_cache_dir(self.CACHE_SUB_DIR) if root is None else root
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec('PIL') is not None
+
+    @classmethod
+    def is_supported(cls, info: VizSeqMediaInfo) -> bool:
+        return info.mime_type in THUMBNAIL_MIME_TYPES and cls.is_available()
+
+    @classmethod
+    def get_mime_type(cls) -> str:
+        return f'image/{_get_format()[1].replace("jpg", "jpeg")}'
+
+    @classmethod
+    def get_key(cls, info: VizSeqMediaInfo) -> str:
+        key = f'{info.path}\0{info.member}\0{info.size}\0{info.mtime}'
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get_version(cls, info: VizSeqMediaInfo) -> str:
+        """Short image identity used to version thumbnail URLs."""
+        return cls.get_key(info)[:16]
+
+    def _get_paths(self, info: VizSeqMediaInfo) -> List[str]:
+        key = self.get_key(info)
+        sub_dir = op.join(self.root, key[:2])
+        os.makedirs(sub_dir, exist_ok=True)
+        ext = _get_format()[1]
+        return [op.join(sub_dir, f'{key}.{w}.{ext}') for w in THUMBNAIL_WIDTHS]
+
+    def get_path(self, info: VizSeqMediaInfo, width: int) -> str:
+        assert width in THUMBNAIL_WIDTHS
+        return self._get_paths(info)[THUMBNAIL_WIDTHS.index(width)]
+
+    def exists(self, info: VizSeqMediaInfo) -> bool:
+        return all(op.exists(p) for p in self._get_paths(info))
+
+    @classmethod
+    def _get_pool(cls, n_workers: Optional[int] = None):
+        n_workers = max(1, cpu_count() - 1) if n_workers is None \
+            else n_workers
+        return VizSeqWorkerPool.get(n_workers, modules=(__name__,))
+
+    def submit(self, info: VizSeqMediaInfo) -> Future:
+        """Generates all thumbnails of an image in the process pool. The
+        future raises `VizSeqThumbnailError` if the image cannot be
+        decoded."""
+        return self._get_pool().submit(
+            _make_thumbnails, info, self._get_paths(info)
+        )
+
+    def build(
+            self, infos: List[VizSeqMediaInfo], n_workers: Optional[int] = None
+    ) -> int:
+        """Generates the missing thumbnails of a list of images. Returns the
+        number of images processed. Images that cannot be decoded are
+        skipped."""
+        infos = [i for i in infos if self.is_supported(i)
+                 and not self.exists(i)]
+        if len(infos) > 0:
+            pool = self._get_pool(n_workers)
+            futures = [
+                pool.submit(_make_thumbnails, i, self._get_paths(i))
+                for i in infos
+            ]
+            for f in futures:
+                try:
+                    f.result()
+                except VizSeqThumbnailError:
+                    pass
+        return len(infos)
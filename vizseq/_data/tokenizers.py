@@ -5,11 +5,19 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import os
+import os.path as op
+import math
 from enum import Enum
+from typing import List, Optional, Callable, Dict
+from multiprocessing import cpu_count
 
 from sacrebleu.tokenizers import (Tokenizer13a, TokenizerV14International,
                                  TokenizerZh)
 
+from vizseq._utils.cache_dir import get_cache_dir, get_content_hash
+from vizseq._utils.worker_pool import VizSeqWorkerPool
+
 
 class VizSeqTokenization(Enum):
     none = 0
@@ -23,18 +31,126 @@ def _tokenize_by_char(line: str) -> str:
     return ' '.join(list(line.strip()))
 
 
+# tokenizer instances are reused within a process (and within each worker)
+_TOKENIZERS: Dict[VizSeqTokenization, Callable[[str], str]] = {}
+
+
+def _get_tokenizer(tokenization: VizSeqTokenization) -> Callable[[str], str]:
+    tokenizer = _TOKENIZERS.get(tokenization, None)
+    if tokenizer is not None:
+        return tokenizer
+    if tokenization == VizSeqTokenization.none:
+        tokenizer = str
+    elif tokenization == VizSeqTokenization.mteval_13a:
+        tokenizer = Tokenizer13a()
+    elif tokenization == VizSeqTokenization.mteval_v14_international:
+        tokenizer = TokenizerV14International()
+    elif tokenization == VizSeqTokenization.zh:
+        tokenizer = TokenizerZh()
+    elif tokenization == VizSeqTokenization.char:
+        tokenizer = _tokenize_by_char
+    else:
+        raise ValueError(f'Unknown tokenization {tokenization.name}')
+    _TOKENIZERS[tokenization] = tokenizer
+    return tokenizer
+
+
+def _tokenize_batch(
+        lines: List[str], tokenization: VizSeqTokenization
+) -> List[str]:
+    tokenizer = _get_tokenizer(tokenization)
+    return [tokenizer(l) for l in lines]
+
+
 class VizSeqTokenizer(object):
+    LINES_PER_WORKER = 10000
+
     @classmethod
     def tokenize_line(cls, line: str, tokenization: VizSeqTokenization) -> str:
         if tokenization == VizSeqTokenization.none:
             return line
-        elif tokenization == VizSeqTokenization.mteval_13a:
-            return Tokenizer13a()(line)
-        elif tokenization == VizSeqTokenization.mteval_v14_international:
-            return TokenizerV14International()(line)
-        elif tokenization == VizSeqTokenization.zh:
-            return TokenizerZh()(line)
-        elif tokenization == VizSeqTokenization.char:
-            return _tokenize_by_char(line)
-        else:
-            raise ValueError(f'Unknown tokenization {tokenization.name}')
+        return _get_tokenizer(tokenization)(line)
+
+    @classmethod
+    def tokenize(
+            cls, lines: List[str], tokenization: VizSeqTokenization,
+            n_workers: Optional[int] = None
+    ) -> List[str]:
+        if tokenization == VizSeqTokenization.none:
+            return list(lines)
+        if n_workers is None:
+            n_workers = int(math.ceil(len(lines) / cls.LINES_PER_WORKER))
+        n_workers = max(1, min(n_workers, cpu_count() - 1))
+        if n_workers == 1:
+            return _tokenize_batch(lines, tokenization)
+        batch_sz = int(math.ceil(len(lines) / n_workers))
+        batches = [
+            lines[i: i + batch_sz] for i in range(0, len(lines), batch_sz)
+        ]
+        tokenized = []
+        executor = VizSeqWorkerPool.get(n_workers, modules=(__name__,))
+        for b in executor.map(
+                _tokenize_batch, batches, [tokenization] * len(batches)
+        ):
+            tokenized.extend(b)
+        return tokenized
+
+
+class VizSeqTokenizationCache(object):
+    """On-disk cache of tokenized text keyed by content hash and tokenization
+    mode, so that each source/reference/hypothesis is tokenized only once."""
+    CACHE_SUB_DIR = 'tokenized'
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = get_cache_dir(self.CACHE_SUB_DIR) if root is None else root
+
+    def _get_path(self, key: str, tokenization: VizSeqTokenization) -> str:
+        return op.join(self.root, f'{key}.{tokenization.name}.txt')
+
+    @classmethod
+    def _read(cls, path: str) -> List[str]:
+        # lines are separated by '\n' only: other line breaks (e.g. '\r' or
+        # '\u2028') are kept as part of the lines
+        with open(path, encoding='utf-8', newline='\n') as f:
+            return [l[:-1] if l.endswith('\n') else l for l in f]
+
+    @classmethod
+    def _count_lines(cls, path: str) -> int:
+        with open(path, 'rb') as f:
+            return sum(
+                c.count(b'\n') for c in iter(lambda: f.read(1 << 20), b'')
+            )
+
+    def get_path(
+            self, lines: List[str], tokenization: VizSeqTokenization,
+            n_workers: Optional[int] = None
+    ) -> str:
+        """The path of the cache file of the tokenized lines (one per line,
+        separated by '\n'), which is written if missing or invalid."""
+        path = self._get_path(get_content_hash(lines), tokenization)
+        if op.exists(path) and self._count_lines(path) == len(lines):
+            return path
+        tokenized = VizSeqTokenizer.tokenize(
+            lines, tokenization, n_workers=n_workers
+        )
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            for l in tokenized:
+                f.write(l.replace('\n', ' ') + '\n')
+        os.replace(tmp_path, path)
+        return path
+
+    def get(
+            self, lines: List[str], tokenization: VizSeqTokenization,
+            n_workers: Optional[int] = None
+    ) -> List[str]:
+        if tokenization == VizSeqTokenization.none:
+            return lines
+        try:
+            return self._read(self.get_path(lines, tokenization, n_workers))
+        except OSError:
+            # read-only cache directory
+            return [
+                l.replace('\n', ' ') for l in
+                VizSeqTokenizer.tokenize(lines, tokenization, n_workers)
+            ]
@@ -0,0 +1,105 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+from multiprocessing import cpu_count
+from typing import List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from .data_sources import (VizSeqDataSource, VizSeqMediaInfo, _is_soundfile)
+from vizseq._utils.cache_dir import get_cache_dir
+from vizseq._utils.worker_pool import VizSeqWorkerPool
+
+N_PEAKS = 1000
+
+
+def _get_peaks(info: VizSeqMediaInfo, n_points: int) -> np.ndarray:
+    from vizseq._aligners.speech_aligner import VizSeqSpeechToTextAligner
+    if not _is_soundfile(info.member or info.path):
+        return np.zeros((n_points, 2), dtype=np.int8)
+    with info.open() as f:
+        sound, _ = sf.read(f, dtype='float32')
+    return VizSeqSpeechToTextAligner.get_peak_envelope(sound, n_points)
+
+
+def _get_peaks_batch(
+        infos: List[VizSeqMediaInfo], n_points: int
+) -> np.ndarray:
+    return np.stack([_get_peaks(i, n_points) for i in infos])
+
+
+class VizSeqWaveformPeaks(object):
+    """Min/max peak envelopes of audio sources (`n_points` int8 pairs per
+    clip), decoded once in a process pool and stored as one .npy file per
+    source."""
+    CACHE_SUB_DIR = 'peaks'
+    BATCH_SIZE = 32
+
+    def __init__(self, n_points: int = N_PEAKS, root: Optional[str] = None):
+        self.n_points = n_points
+        self.root = get_cache_dir(self.CACHE_SUB_DIR) if root is None else root
+
+    def _get_path(self, source: VizSeqDataSource) -> str:
+        key = source.get_media_key()
+        return op.join(self.root, f'{key}.{self.n_points}.npy')
+
+    def load(self, source: VizSeqDataSource) -> Optional[np.ndarray]:
+        path = self._get_path(source)
+        if not op.exists(path):
+            return None
+        try:
+            peaks = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return peaks if len(peaks) == len(source) else None
+
+    def compute(
+            self, source: VizSeqDataSource, ids: List[int],
+            n_workers: Optional[int] = None
+    ) -> np.ndarray:
+        if len(ids) == 0:
+            return np.zeros((0, self.n_points, 2), dtype=np.int8)
+        infos = [source.get_media_info(i) for i in ids]
+        batches = [infos[i: i + self.BATCH_SIZE]
+                   for i in range(0, len(infos), self.BATCH_SIZE)]
+        n_workers = max(1, cpu_count() - 1) if n_workers is None \
+            else n_workers
+        n_workers = min(n_workers, len(batches))
+        if n_workers == 1:
+            return np.concatenate(
+                [_get_peaks_batch(b, self.n_points) for b in batches]
+            )
+        pool = VizSeqWorkerPool.get(n_workers, modules=(__name__,))
+        return np.concatenate(list(pool.map(
+            _get_peaks_batch, batches, [self.n_points] * len(batches)
+        )))
+
+    def build(
+            self, source: VizSeqDataSource, n_workers: Optional[int] = None
+    ) -> np.ndarray:
+        """Computes and persists the peaks of all clips of a source."""
+        peaks = self.load(source)
+        if peaks is not None:
+            return peaks
+        peaks = self.compute(source, list(range(len(source))), n_workers)
+        path = self._get_path(source)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, peaks)
+        os.replace(tmp_path, path)
+        return peaks
+
+    def get(self, source: VizSeqDataSource, ids: List[int]) -> np.ndarray:
+        """Peaks of some clips: from the persisted file if the source has
+        been precomputed, decoded on the fly otherwise."""
+        peaks = self.load(source)
+        if peaks is not None:
+            return np.asarray(peaks[ids])
+        return self.compute(source, ids)
@@ -0,0 +1,91 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Iterator, Optional
+
+
+class VizSeqZipHandlePool(object):
+    """Per-process pool of open zip file handles, so that the central
+    directory of a zip is parsed once rather than on every access. Each
+    handle is used by one thread at a time, which lets several threads read
+    members of the same zip in parallel."""
+    MAX_IDLE_HANDLES = 8
+    MAX_READ_THREADS = 8
+    # path -> ((size, mtime), idle handles)
+    _idle: Dict[str, Tuple[Tuple[int, int], List[zipfile.ZipFile]]] = {}
+    _pid = os.getpid()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _reset_if_forked(cls) -> None:
+        # handles inherited from the parent share file offsets with it
+        if cls._pid != os.getpid():
+            cls._idle = {}
+            cls._pid = os.getpid()
+
+    @classmethod
+    @contextmanager
+    def open(cls, path: str) -> Iterator[zipfile.ZipFile]:
+        path = op.abspath(path)
+        stat = os.stat(path)
+        version = (stat.st_size, stat.st_mtime_ns)
+        zip_f = None
+        with cls._lock:
+            cls._reset_if_forked()
+            cur_version, handles = cls._idle.get(path, (version, []))
+            if cur_version != version:
+                # the file has been replaced
+                for h in handles:
+                    h.close()
+                handles = []
+            cls._idle[path] = (version, handles)
+            if len(handles) > 0:
+                zip_f = handles.pop()
+        if zip_f is None:
+            zip_f = zipfile.ZipFile(path)
+        try:
+            yield zip_f
+        finally:
+            with cls._lock:
+                cur_version, handles = cls._idle.get(path, (None, []))
+                if cls._pid == os.getpid() and cur_version == version and \
+                        len(handles) < cls.MAX_IDLE_HANDLES:
+                    handles.append(zip_f)
+                else:
+                    zip_f.close()
+
+    @classmethod
+    def read(cls, path: str, member: str) -> bytes:
+        with cls.open(path) as zip_f:
+            return zip_f.read(member)
+
+    @classmethod
+    def read_all(
+            cls, path: str, members: List[str],
+            n_threads: Optional[int] = None
+    ) -> List[bytes]:
+        """Reads members in parallel, each thread with its own handle."""
+        n_threads = min(cls.MAX_READ_THREADS, len(members)) \
+            if n_threads is None else n_threads
+        if n_threads < 2:
+            return [cls.read(path, m) for m in members]
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            return list(executor.map(lambda m: cls.read(path, m), members))
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._lock:
+            for _, handles in cls._idle.values():
+                for h in handles:
+                    h.close()
+            cls._idle = {}
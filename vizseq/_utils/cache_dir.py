@@ -0,0 +1,32 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import hashlib
+from typing import Iterable
+
+CACHE_ROOT_ENV = 'VIZSEQ_CACHE_ROOT'
+DEFAULT_CACHE_ROOT = op.join(op.expanduser('~'), '.cache', 'vizseq')
+
+
+def get_cache_dir(*sub_dirs: str) -> str:
+    root = os.environ.get(CACHE_ROOT_ENV, DEFAULT_CACHE_ROOT)
+    path = op.join(root, *sub_dirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_content_hash(lines: Iterable[str], *salts: str) -> str:
+    h = hashlib.sha1()
+    for s in salts:
+        h.update(s.encode('utf-8'))
+        h.update(b'\0')
+    for l in lines:
+        h.update(l.encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
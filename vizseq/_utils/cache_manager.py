@@ -0,0 +1,196 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import sys
+import time
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+import numpy as np
+
+# items sampled to estimate the size of large lists
+_N_SAMPLES = 1000
+
+
+def get_n_bytes(obj: Any, _seen: Optional[set] = None) -> int:
+    """Approximate memory footprint of an object. Numpy arrays count their
+    buffers, except for memory maps (which are backed by files); large
+    containers are estimated from a sample of their items. Only attributes
+    of VizSeq objects are followed."""
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.memmap):
+        return sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.base is None or obj.flags.owndata else \
+            sys.getsizeof(obj) + get_n_bytes(obj.base, _seen)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return sys.getsizeof(obj)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        if len(items) > _N_SAMPLES:
+            step = len(items) / _N_SAMPLES
+            sample = [items[int(i * step)] for i in range(_N_SAMPLES)]
+            return size + int(
+                sum(get_n_bytes(k, _seen) + get_n_bytes(v, _seen)
+                    for k, v in sample) * step
+            )
+        return size + sum(get_n_bytes(k, _seen) + get_n_bytes(v, _seen)
+                          for k, v in items)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj if isinstance(obj, (list, tuple)) else list(obj)
+        if len(items) > _N_SAMPLES:
+            step = len(items) / _N_SAMPLES
+            sample = [items[int(i * step)] for i in range(_N_SAMPLES)]
+            return size + int(sum(get_n_bytes(i, _seen) for i in sample) *
+                              step)
+        return size + sum(get_n_bytes(i, _seen) for i in items)
+    if type(obj).__module__.startswith('vizseq') and \
+            hasattr(obj, '__dict__'):
+        return size + get_n_bytes(vars(obj), _seen)
+    return size
+
+
+class VizSeqCacheStats(NamedTuple):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    n_entries: int = 0
+    n_bytes: int = 0
+
+    def to_dict(self):
+        return self._asdict()
+
+
+class _Entry(object):
+    __slots__ = ('value', 'n_bytes', 'cost', 'priority')
+
+    def __init__(self, value: Any, n_bytes: int, cost: float,
+                 priority: float):
+        self.value = value
+        self.n_bytes = n_bytes
+        self.cost = cost
+        self.priority = priority
+
+
+class VizSeqCacheManager(object):
+    """Process-wide in-memory cache shared by all tasks (data sources,
+    scores, indices and rendered responses), under a global memory budget.
+    Entries are evicted by cost-aware LRU (GreedyDual-Size): an entry's
+    priority is the clock at its last access plus its computation time per
+    byte, so large entries that are cheap to recompute go first. The clock
+    advances to the priority of every evicted entry, which ages entries that
+    are not accessed."""
+    DEFAULT_BUDGET_BYTES = 2 * 1024 ** 3
+
+    _budget_bytes = DEFAULT_BUDGET_BYTES
+    _entries: Dict[Hashable, _Entry] = {}
+    _n_bytes = 0
+    _clock = 0.
+    # namespace -> [hits, misses, evictions]
+    _counters: Dict[str, list] = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def set_budget(cls, n_bytes: int) -> None:
+        with cls._lock:
+            cls._budget_bytes = n_bytes
+            cls._evict()
+
+    @classmethod
+    def get_budget(cls) -> int:
+        return cls._budget_bytes
+
+    @classmethod
+    def _count(cls, namespace: str, i: int) -> None:
+        cls._counters.setdefault(namespace, [0, 0, 0])[i] += 1
+
+    @classmethod
+    def _get_priority(cls, n_bytes: int, cost: float) -> float:
+        return cls._clock + cost / max(n_bytes, 1)
+
+    @classmethod
+    def _evict(cls) -> None:
+        while cls._n_bytes > cls._budget_bytes and len(cls._entries) > 0:
+            key = min(cls._entries, key=lambda k: cls._entries[k].priority)
+            entry = cls._entries.pop(key)
+            cls._n_bytes -= entry.n_bytes
+            cls._clock = max(cls._clock, entry.priority)
+            cls._count(key[0], 2)
+
+    @classmethod
+    def get(cls, namespace: str, key: Hashable,
+            compute_fn: Callable[[], Any]) -> Any:
+        key = (namespace, key)
+        with cls._lock:
+            entry = cls._entries.get(key, None)
+            if entry is not None:
+                entry.priority = cls._get_priority(entry.n_bytes, entry.cost)
+                cls._count(namespace, 0)
+                return entry.value
+            cls._count(namespace, 1)
+        # computed outside of the lock: cached getters may call each other
+        start = time.time()
+        value = compute_fn()
+        cost = time.time() - start
+        n_bytes = get_n_bytes(value)
+        with cls._lock:
+            if n_bytes <= cls._budget_bytes and key not in cls._entries:
+                cls._entries[key] = _Entry(
+                    value, n_bytes, cost, cls._get_priority(n_bytes, cost)
+                )
+                cls._n_bytes += n_bytes
+                cls._evict()
+        return value
+
+    @classmethod
+    def cached(cls, namespace: str):
+        """Decorator caching a function by its (hashable) arguments, like
+        `functools.lru_cache`."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = args + tuple(sorted(kwargs.items()))
+                return cls.get(namespace, key, lambda: fn(*args, **kwargs))
+            wrapper.cache_clear = lambda: cls.clear(namespace)
+            return wrapper
+        return decorator
+
+    @classmethod
+    def clear(cls, namespace: Optional[str] = None) -> None:
+        with cls._lock:
+            keys = [k for k in cls._entries
+                    if namespace is None or k[0] == namespace]
+            for k in keys:
+                cls._n_bytes -= cls._entries.pop(k).n_bytes
+            if namespace is None:
+                cls._counters = {}
+            else:
+                cls._counters.pop(namespace, None)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, VizSeqCacheStats]:
+        """Statistics by namespace (and in total, under "total")."""
+        with cls._lock:
+            sizes: Dict[str, list] = {}
+            for (namespace, _), entry in cls._entries.items():
+                s = sizes.setdefault(namespace, [0, 0])
+                s[0] += 1
+                s[1] += entry.n_bytes
+            stats = {
+                n: VizSeqCacheStats(*cls._counters.get(n, [0, 0, 0]),
+                                    *sizes.get(n, [0, 0]))
+                for n in sorted(set(cls._counters) | set(sizes))
+            }
+        stats['total'] = VizSeqCacheStats(
+            *[sum(s[i] for s in stats.values()) for i in range(5)]
+        )
+        return stats
@@ -0,0 +1,141 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import os.path as op
+import fcntl
+import hashlib
+import threading
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
+
+from vizseq._utils.cache_dir import get_cache_dir
+
+
+class VizSeqEmbeddingStore(object):
+    """Content-addressed, append-only store of embedding matrices backed by a
+    memory-mapped file. Each key maps to `n_rows` x `dim` rows (one row for a
+    sentence embedding, one row per token for token embeddings). The data
+    file stops growing at `max_bytes`: later entries are not cached."""
+    DATA_FILENAME = 'data.bin'
+    INDEX_FILENAME = 'index.tsv'
+    LOCK_FILENAME = 'lock'
+    MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+    def __init__(
+            self, name: str, dim: int, dtype: str = 'float32',
+            root: Optional[str] = None, max_bytes: Optional[int] = None
+    ):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        sub_dir = f'{name}.{dim}.{self.dtype.name}'
+        if root is None:
+            self.root = get_cache_dir('embeddings', sub_dir)
+        else:
+            self.root = op.join(root, sub_dir)
+            os.makedirs(self.root, exist_ok=True)
+        self.data_path = op.join(self.root, self.DATA_FILENAME)
+        self.index_path = op.join(self.root, self.INDEX_FILENAME)
+        self.lock_path = op.join(self.root, self.LOCK_FILENAME)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._index_size = 0
+        self._mmap: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(text: str, *salts: str) -> str:
+        h = hashlib.sha1()
+        for s in salts:
+            h.update(s.encode('utf-8'))
+            h.update(b'\0')
+        h.update(text.encode('utf-8'))
+        return h.hexdigest()
+
+    def _refresh(self) -> None:
+        # pick up entries appended by other processes
+        if not op.exists(self.index_path):
+            return
+        size = op.getsize(self.index_path)
+        if size == self._index_size:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._index_size)
+            chunk = f.read(size - self._index_size)
+        # ignore a trailing partial line (still being written)
+        chunk = chunk[: chunk.rfind(b'\n') + 1]
+        for l in chunk.decode('utf-8').splitlines():
+            key, offset, n_rows = l.split('\t')
+            self._index[key] = (int(offset), int(n_rows))
+        self._index_size += len(chunk)
+        self._mmap = None
+
+    def _get_mmap(self) -> np.ndarray:
+        if self._mmap is None:
+            n_rows = 0
+            if op.exists(self.data_path):
+                n_rows = op.getsize(self.data_path) // (
+                        self.dim * self.dtype.itemsize
+                )
+            if n_rows == 0:
+                return np.zeros((0, self.dim), dtype=self.dtype)
+            self._mmap = np.memmap(
+                self.data_path, dtype=self.dtype, mode='r',
+                shape=(n_rows, self.dim)
+            )
+        return self._mmap
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return key in self._index
+
+    def get(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            self._refresh()
+            if len(self._index) == 0:
+                return [None for _ in keys]
+            data = self._get_mmap()
+            result = []
+            for k in keys:
+                offset, n_rows = self._index.get(k, (-1, 0))
+                result.append(
+                    None if offset < 0 else data[offset: offset + n_rows]
+                )
+            return result
+
+    def put(self, keys: List[str], embeddings: List[np.ndarray]) -> None:
+        """Appends the entries that are not stored yet, as long as the data
+        file stays within `max_bytes`."""
+        assert len(keys) == len(embeddings)
+        with self._lock, open(self.lock_path, 'w') as lock_f:
+            fcntl.flock(lock_f, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                row_bytes = self.dim * self.dtype.itemsize
+                offset = 0
+                if op.exists(self.data_path):
+                    offset = op.getsize(self.data_path) // row_bytes
+                index_lines, written = [], set()
+                with open(self.data_path, 'ab') as f:
+                    for k, e in zip(keys, embeddings):
+                        if k in self._index or k in written:
+                            continue
+                        written.add(k)
+                        e = np.asarray(e, dtype=self.dtype)
+                        e = e.reshape(-1, self.dim)
+                        if (offset + len(e)) * row_bytes > self.max_bytes:
+                            break
+                        f.write(e.tobytes())
+                        index_lines.append(f'{k}\t{offset}\t{len(e)}\n')
+                        offset += len(e)
+                with open(self.index_path, 'a') as f:
+                    f.write(''.join(index_lines))
+            finally:
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+            self._refresh()
@@ -17,5 +17,14 @@ def get_optional_dict(
     return maybe_dict.get(key, default)
 
 
+def get_optional_bool(
+        maybe_dict: Optional[Dict[str, str]], key: str, default: bool
+) -> bool:
+    value = get_optional_dict(maybe_dict, key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in {'true', '1', 'yes', 'on'}
+    return bool(value)
+
+
 def map_optional(obj: Optional[Any], map_fn: callable):
     return None if obj is None else map_fn(obj)
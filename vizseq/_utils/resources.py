@@ -0,0 +1,121 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os.path as op
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+
+FETCH_COMMAND = 'vizseq-fetch-resources'
+
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'wordnet': 'corpora/wordnet',
+}
+LASER_MODEL_FILES = (
+    '93langs.fcodes', '93langs.fvocab', 'bilstm.93langs.2018-12-26.pt'
+)
+ALL_RESOURCES = sorted(NLTK_RESOURCES) + ['laser']
+
+# availability is checked once per process
+_AVAILABLE: Dict[str, bool] = {}
+
+
+def _resolve(name: str) -> List[str]:
+    if name == 'punkt':
+        # NLTK>=3.8.2 loads Punkt parameters from "punkt_tab" instead
+        import nltk.tokenize.punkt
+        if hasattr(nltk.tokenize.punkt, 'PunktTokenizer'):
+            return ['punkt_tab']
+    return [name]
+
+
+def _get_laser_data_dir() -> Optional[str]:
+    spec = importlib.util.find_spec('laserembeddings')
+    if spec is None or spec.submodule_search_locations is None:
+        return None
+    return op.join(list(spec.submodule_search_locations)[0], 'data')
+
+
+def _is_available(name: str) -> bool:
+    if name in NLTK_RESOURCES:
+        import nltk
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            return False
+        return True
+    elif name == 'laser':
+        data_dir = _get_laser_data_dir()
+        return data_dir is not None and all(
+            op.isfile(op.join(data_dir, f)) for f in LASER_MODEL_FILES
+        )
+    raise ValueError(f'Unknown resource {name}')
+
+
+class VizSeqResourceManager(object):
+    @classmethod
+    def is_available(cls, name: str) -> bool:
+        if name not in _AVAILABLE:
+            _AVAILABLE[name] = all(_is_available(n) for n in _resolve(name))
+        return _AVAILABLE[name]
+
+    @classmethod
+    def require(cls, *names: str) -> None:
+        missing = [n for n in names if not cls.is_available(n)]
+        if len(missing) > 0:
+            raise FileNotFoundError(
+                f'Missing local resources: {", ".join(missing)}. Run '
+                f'"{FETCH_COMMAND} {" ".join(missing)}" on a machine with '
+                f'network access (or point NLTK_DATA to a shared copy).'
+            )
+
+    @classmethod
+    def load(cls, *names: str) -> None:
+        """Loads resources into memory (e.g. to warm up worker processes)."""
+        cls.require(*names)
+        for name in names:
+            if name in {'punkt', 'punkt_tab'}:
+                import nltk
+                nltk.sent_tokenize('Warm up. Done.')
+            elif name == 'wordnet':
+                from nltk.corpus import wordnet
+                wordnet.ensure_loaded()
+
+    @classmethod
+    def fetch(
+            cls, names: Optional[List[str]] = None,
+            nltk_data_dir: Optional[str] = None
+    ) -> Tuple[List[str], List[str]]:
+        names = ALL_RESOURCES if names is None else names
+        fetched, failed = [], []
+        for name in names:
+            for n in _resolve(name):
+                if n in NLTK_RESOURCES:
+                    import nltk
+                    ok = nltk.download(
+                        n, download_dir=nltk_data_dir, quiet=True
+                    )
+                elif n == 'laser':
+                    ok = cls._fetch_laser()
+                else:
+                    raise ValueError(f'Unknown resource {n}')
+                (fetched if ok else failed).append(n)
+            _AVAILABLE.pop(name, None)
+        return fetched, failed
+
+    @classmethod
+    def _fetch_laser(cls) -> bool:
+        import runpy
+        import sys
+        argv = [v for v in sys.argv]
+        sys.argv = [sys.argv[0], 'download-models']
+        try:
+            runpy.run_module('laserembeddings', run_name='__main__')
+        finally:
+            sys.argv = argv
+        return _is_available('laser')
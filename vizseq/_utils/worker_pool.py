@@ -0,0 +1,87 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import atexit
+import importlib
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple, Sequence
+
+from vizseq._utils.resources import VizSeqResourceManager
+
+START_METHOD_ENV = 'VIZSEQ_MP_START_METHOD'
+
+
+def _init_worker(modules: Sequence[str], resources: Sequence[str]) -> None:
+    for m in modules:
+        importlib.import_module(m)
+    VizSeqResourceManager.load(*resources)
+
+
+def _get_mp_context(modules: Sequence[str]):
+    method = os.environ.get(START_METHOD_ENV, None)
+    if method is None or method not in mp.get_all_start_methods():
+        return mp.get_context()
+    ctx = mp.get_context(method)
+    if method == 'forkserver':
+        # only effective before the fork server is started: the first pool
+        # decides which modules every later forked worker inherits for free
+        ctx.set_forkserver_preload(list(modules))
+    return ctx
+
+
+class VizSeqWorkerPool(object):
+    """Process pools kept alive across calls, one per (modules, resources)
+    signature. Workers import the given modules and load the given resources
+    once, before any task arrives.
+
+    `get` returns a pool with at least `n_workers` workers: an existing
+    larger pool is reused as is, and a smaller one is replaced. With the
+    `forkserver` start method, only the modules of the first pool are
+    preloaded into the fork server; workers of later pools still import
+    their own modules in the initializer."""
+    _pools: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]],
+                 Tuple[ProcessPoolExecutor, int]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(
+            cls, n_workers: int, modules: Sequence[str] = (),
+            resources: Sequence[str] = ()
+    ) -> ProcessPoolExecutor:
+        key = (tuple(modules), tuple(resources))
+        with cls._lock:
+            pool, size = cls._pools.get(key, (None, 0))
+            if pool is not None and (
+                    size < n_workers or getattr(pool, '_broken', False)
+            ):
+                pool.shutdown(wait=False)
+                pool = None
+            if pool is None:
+                size = max(size, n_workers)
+                pool = ProcessPoolExecutor(
+                    max_workers=size, mp_context=_get_mp_context(key[0]),
+                    initializer=_init_worker, initargs=key
+                )
+                cls._pools[key] = (pool, size)
+            return pool
+
+    @classmethod
+    def set_start_method(cls, method: str) -> None:
+        os.environ[START_METHOD_ENV] = method
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            for pool, _ in cls._pools.values():
+                pool.shutdown(wait=True)
+            cls._pools.clear()
+
+
+atexit.register(VizSeqWorkerPool.shutdown)
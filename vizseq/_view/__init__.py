@@ -10,4 +10,5 @@ from .data_view import VizSeqDataPageView, DEFAULT_PAGE_SIZE, DEFAULT_PAGE_NO
 from .data_filter import VizSeqFilter
 from .data_sorters import (VizSeqSortingType, VizSeqRandomSorter,
                            VizSeqByLenSorter, VizSeqByStrOrderSorter,
-                           VizSeqByMetricSorter)
+                           VizSeqByMetricSorter,
+                           VizSeqByRankDisagreementSorter)
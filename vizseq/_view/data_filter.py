@@ -6,16 +6,31 @@
 #
 
 
-from typing import List
+from typing import List, Optional
+
+import numpy as np
+
+from vizseq._data import VizSeqSearchIndex
 
 
-# TODO: scale this part
 class VizSeqFilter(object):
     @classmethod
-    def filter(cls, data: List[List[str]], query: str) -> List[int]:
+    def filter(
+            cls, data: List[List[str]], query: str,
+            search_index: Optional[VizSeqSearchIndex] = None
+    ) -> List[int]:
         if len(query) == 0:
             return list(range(len(data[0])))
 
+        if search_index is not None:
+            return search_index.find(query, data)
+
+        if all(hasattr(d, 'find_all') for d in data):
+            # packed sources: search the UTF-8 blobs without decoding
+            return np.unique(
+                np.concatenate([d.find_all(query) for d in data])
+            ).tolist()
+
         indices = []
         for i, cur_list in enumerate(zip(*data)):
             if any(s.find(query) > -1 for s in cur_list):
@@ -0,0 +1,343 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import re
+import operator
+from typing import List, Optional, Tuple, Sequence
+
+import numpy as np
+
+from vizseq._data import VizSeqDataSources, VizSeqSearchIndex
+from vizseq.scorers import get_scorer, get_scorer_ids
+from .data_filter import VizSeqFilter
+from .data_sorters import VizSeqSortingType, VizSeqSortPermutation
+
+LEN_FIELDS = {'src_len', 'ref_len', 'hypo_len'}
+TEXT_FIELDS = {'src', 'ref', 'hypo'}
+COMPARISON_OPS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '!=': operator.ne,
+}
+KEYWORDS = {'AND', 'OR', 'NOT'}
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<paren>[()])
+      | "(?P<string>(?:[^"\\]|\\.)*)"
+      | (?P<op><=|>=|!=|<|>|=|~|:)
+      | (?P<word>[^\s()"<>=!~:]+)
+    )''', re.VERBOSE)
+_FIELD_RE = re.compile(r'^(?P<name>[\w.-]+)(?:\[(?P<model>[^\]]+)\])?$')
+
+
+class VizSeqQueryError(ValueError):
+    pass
+
+
+def _tokenize(query: str) -> List[Tuple[str, str]]:
+    """Query tokens. The rest of the query from the first invalid
+    character on is an `error` token."""
+    tokens, pos = [], 0
+    query = query.rstrip()
+    while pos < len(query):
+        m = _TOKEN_RE.match(query, pos)
+        if m is None or m.end() == pos:
+            tokens.append(('error', query[pos:]))
+            break
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'string':
+            value = re.sub(r'\\(.)', r'\1', value)
+        elif kind == 'word' and value in KEYWORDS:
+            kind = 'keyword'
+        tokens.append((kind, value))
+        pos = m.end()
+    return tokens
+
+
+def _is_structured(tokens: List[Tuple[str, str]]) -> bool:
+    """Whether the field before the first operator is `tag`, a length or
+    text field or a scorer ID."""
+    for i, (kind, _) in enumerate(tokens):
+        if kind == 'op':
+            if i == 0 or tokens[i - 1][0] != 'word':
+                return False
+            m = _FIELD_RE.match(tokens[i - 1][1])
+            return m is not None and (
+                m.group('name') in {'tag'} | LEN_FIELDS | TEXT_FIELDS or
+                m.group('name') in get_scorer_ids()
+            )
+    return False
+
+
+class _Parser(object):
+    """Recursive descent parser of:
+        expr := and_expr (OR and_expr)*
+        and_expr := not_expr (AND not_expr)*
+        not_expr := NOT not_expr | '(' expr ')' | term
+        term := field op value | 'tag' ':' value | field '~' value | value
+    into nested tuples."""
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise VizSeqQueryError('Unexpected end of query')
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def parse(self):
+        node = self._parse_or()
+        if self.pos < len(self.tokens):
+            raise VizSeqQueryError(f'Unexpected "{self.tokens[self.pos][1]}"')
+        return node
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek() == ('keyword', 'OR'):
+            self._next()
+            node = ('or', node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._peek() == ('keyword', 'AND'):
+            self._next()
+            node = ('and', node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        kind, value = self._peek()
+        if (kind, value) == ('keyword', 'NOT'):
+            self._next()
+            return ('not', self._parse_not())
+        if (kind, value) == ('paren', '('):
+            self._next()
+            node = self._parse_or()
+            if self._next() != ('paren', ')'):
+                raise VizSeqQueryError('Missing ")"')
+            return node
+        return self._parse_term()
+
+    def _parse_value(self) -> str:
+        kind, value = self._next()
+        if kind not in {'word', 'string'}:
+            raise VizSeqQueryError(f'Expected a value, got "{value}"')
+        return value
+
+    def _parse_term(self):
+        kind, value = self._next()
+        if kind == 'string':
+            return ('text', None, None, value)
+        if kind != 'word':
+            raise VizSeqQueryError(f'Unexpected "{value}"')
+        op_kind, op = self._peek()
+        if op_kind != 'op':
+            return ('text', None, None, value)
+        self._next()
+        if op == ':':
+            if value != 'tag':
+                raise VizSeqQueryError(f'Unknown prefix "{value}:"')
+            return ('tag', self._parse_value())
+        m = _FIELD_RE.match(value)
+        if m is None:
+            raise VizSeqQueryError(f'Invalid field "{value}"')
+        name, model = m.group('name'), m.group('model')
+        if op == '~':
+            if name not in TEXT_FIELDS:
+                raise VizSeqQueryError(f'"{name}" is not a text field')
+            return ('text', name, model, self._parse_value())
+        raw = self._parse_value()
+        try:
+            number = float(raw)
+        except ValueError:
+            raise VizSeqQueryError(f'"{raw}" is not a number')
+        return ('cmp', name, model, op, number)
+
+
+def parse_query(query: str):
+    """Syntax tree of a structured query, or None if the query is a plain
+    search string. A query is structured if its first condition is on a
+    field, a metric or `tag` (e.g. `ref_len>3`, but not `rock AND roll` or
+    `x=1`). Raises `VizSeqQueryError` if a structured query is invalid."""
+    tokens = _tokenize(query)
+    if not _is_structured(tokens):
+        return None
+    for kind, value in tokens:
+        if kind == 'error':
+            raise VizSeqQueryError(f'Invalid query at "{value}"')
+    return _Parser(tokens).parse()
+
+
+class VizSeqQueryColumns(object):
+    """Per-example columns that structured queries are evaluated on. This
+    default computes them from the data sources; subclasses can serve them
+    from caches."""
+    def __init__(
+            self, src: VizSeqDataSources, ref: VizSeqDataSources,
+            hypo: VizSeqDataSources, tags: Optional[List[List[str]]] = None,
+            search_index: Optional[VizSeqSearchIndex] = None
+    ):
+        self.src = src
+        self.ref = ref
+        self.hypo = hypo
+        self.tags = tags
+        self.search_index = search_index
+        self._sent_scores = {}
+        self._sort_permutations = {}
+
+    @property
+    def n_examples(self) -> int:
+        return len(self.ref) if len(self.src) == 0 else len(self.src)
+
+    @property
+    def models(self) -> List[str]:
+        return self.hypo.text_names
+
+    def get_lens(self, name: str, model: Optional[str]) -> np.ndarray:
+        if name == 'src_len':
+            if self.src.main_text_idx is None:
+                raise VizSeqQueryError('"src_len" needs a text source')
+            return self.src.data[self.src.main_text_idx].get_lens()
+        elif name == 'ref_len':
+            return self.ref.data[0].get_lens()
+        return self.hypo.data[self.hypo.names.index(model)].get_lens()
+
+    def get_sent_scores(self, metric: str, model: str) -> np.ndarray:
+        if (metric, model) not in self._sent_scores:
+            hypo = self.hypo.data[self.hypo.names.index(model)].text
+            self._sent_scores[metric, model] = np.array(get_scorer(metric)(
+                corpus_level=False, sent_level=True
+            ).score(hypo, self.ref.text).sent_scores, dtype=np.float64)
+        return self._sent_scores[metric, model]
+
+    def get_sort_permutation(
+            self, sorting: VizSeqSortingType
+    ) -> Optional[np.ndarray]:
+        """The order of all examples by a sorting type other than `metric`,
+        or None if it does not apply (e.g. no source text)."""
+        if sorting not in self._sort_permutations:
+            self._sort_permutations[sorting] = self._get_sort_permutation(
+                sorting
+            )
+        return self._sort_permutations[sorting]
+
+    def _get_sort_permutation(
+            self, sorting: VizSeqSortingType
+    ) -> Optional[np.ndarray]:
+        if sorting == VizSeqSortingType.random:
+            return VizSeqSortPermutation.random(self.n_examples)
+        elif sorting == VizSeqSortingType.ref_len:
+            # whitespace token counts (`str.split()`), as in `*_len` queries
+            return VizSeqSortPermutation.by_len(self.get_lens('ref_len', None))
+        elif sorting == VizSeqSortingType.ref_alphabetical:
+            return VizSeqSortPermutation.by_str_order(self.ref.main_text)
+        elif not self.src.has_text:
+            return None
+        elif sorting == VizSeqSortingType.src_len:
+            return VizSeqSortPermutation.by_len(self.get_lens('src_len', None))
+        elif sorting == VizSeqSortingType.src_alphabetical:
+            return VizSeqSortPermutation.by_str_order(self.src.main_text)
+        return None
+
+    def get_tag_mask(self, tag: str) -> np.ndarray:
+        if self.tags is None:
+            return np.zeros(self.n_examples, dtype=bool)
+        return np.array([tag in t for t in self.tags], dtype=bool)
+
+    def get_text(self, name: Optional[str],
+                 model: Optional[str]) -> List[Sequence[str]]:
+        if name == 'src' or (name is None and self.src.has_text):
+            return self.src.text
+        elif name == 'ref' or name is None:
+            return self.ref.text
+        elif model is None:
+            return self.hypo.text
+        return [self.hypo.data[self.hypo.names.index(model)].text]
+
+    def find(self, name: Optional[str], model: Optional[str],
+             query: str) -> List[int]:
+        data = self.get_text(name, model)
+        if len(data) == 0:
+            return []
+        # the search index covers the default (source or reference) texts
+        default = 'src' if self.src.has_text else 'ref'
+        search_index = self.search_index if name in {None, default} else None
+        return VizSeqFilter.filter(data, query, search_index)
+
+
+class VizSeqQuery(object):
+    """Structured example filters, e.g.
+        ref_len>30 AND bleu[modelA]<10 AND tag:news AND hypo[modelB]~"foo"
+    Terms are length comparisons (`src_len`, `ref_len`, `hypo_len[model]`),
+    sentence score comparisons (`<metric>[model]`), tags (`tag:<tag>`) and
+    substring matches (`src~`, `ref~`, `hypo[model]~` or a bare string),
+    combined with AND, OR, NOT and parentheses. A query is compiled into a
+    boolean mask over all examples."""
+    def __init__(self, tree):
+        self.tree = tree
+
+    @classmethod
+    def parse(cls, query: str) -> Optional['VizSeqQuery']:
+        tree = parse_query(query)
+        return None if tree is None else cls(tree)
+
+    @classmethod
+    def _get_model(cls, columns: VizSeqQueryColumns, name: str,
+                   model: Optional[str]) -> str:
+        if model is None:
+            if len(columns.models) != 1:
+                raise VizSeqQueryError(f'"{name}" needs a model: {name}[m]')
+            return columns.models[0]
+        if model not in columns.models:
+            raise VizSeqQueryError(f'Unknown model "{model}"')
+        return model
+
+    @classmethod
+    def _get_mask(cls, node, columns: VizSeqQueryColumns) -> np.ndarray:
+        kind = node[0]
+        if kind == 'and':
+            return cls._get_mask(node[1], columns) & \
+                cls._get_mask(node[2], columns)
+        elif kind == 'or':
+            return cls._get_mask(node[1], columns) | \
+                cls._get_mask(node[2], columns)
+        elif kind == 'not':
+            return ~cls._get_mask(node[1], columns)
+        elif kind == 'tag':
+            return columns.get_tag_mask(node[1])
+        elif kind == 'text':
+            _, name, model, text = node
+            if model is not None:
+                model = cls._get_model(columns, name, model)
+            mask = np.zeros(columns.n_examples, dtype=bool)
+            mask[columns.find(name, model, text)] = True
+            return mask
+        _, name, model, op, number = node
+        if name in LEN_FIELDS:
+            if name == 'hypo_len':
+                model = cls._get_model(columns, name, model)
+            values = columns.get_lens(name, model)
+        elif name in get_scorer_ids():
+            values = columns.get_sent_scores(
+                name, cls._get_model(columns, name, model)
+            )
+        else:
+            raise VizSeqQueryError(f'Unknown field "{name}"')
+        return COMPARISON_OPS[op](np.asarray(values), number)
+
+    def get_mask(self, columns: VizSeqQueryColumns) -> np.ndarray:
+        return self._get_mask(self.tree, columns)
+
+    def filter(self, columns: VizSeqQueryColumns) -> List[int]:
+        return np.flatnonzero(self.get_mask(columns)).tolist()
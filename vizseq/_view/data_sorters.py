@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import List, Dict
+from typing import List, Dict, Sequence, Union, Callable, Tuple
 from enum import Enum
 
 import numpy as np
@@ -19,6 +19,7 @@ class VizSeqSortingType(Enum):
     src_len = 4
     src_alphabetical = 5
     metric = 6
+    metric_rank_disagreement = 7
 
 
 class VizSeqOriginalSorter(object):
@@ -30,23 +31,24 @@ class VizSeqOriginalSorter(object):
 class VizSeqRandomSorter(object):
     @classmethod
     def sort(cls, indices: List[int]):
-        np.random.seed(seed=1)
-        n_examples = len(indices)
-        return [indices[i] for i in np.random.permutation(n_examples)]
+        permutation = VizSeqSortPermutation.random(len(indices))
+        return [indices[i] for i in permutation]
 
 
 class VizSeqByLenSorter(object):
     @classmethod
     def sort(cls, data: List[str], indices: List[int]):
-        sent_lens = [len(data[i].split(' ')) for i in indices]
-        return [indices[i] for i in np.argsort(sent_lens).tolist()[::-1]]
+        sent_lens = np.array([len(data[i].split(' ')) for i in indices])
+        return [indices[i] for i in VizSeqSortPermutation.by_len(sent_lens)]
 
 
 class VizSeqByStrOrderSorter(object):
     @classmethod
     def sort(cls, data: List[str], indices: List[int]):
-        sorted_indices = np.argsort([data[i] for i in indices])
-        return [indices[i] for i in sorted_indices]
+        permutation = VizSeqSortPermutation.by_str_order(
+            [data[i] for i in indices]
+        )
+        return [indices[i] for i in permutation]
 
 
 class VizSeqByMetricSorter(object):
@@ -57,6 +59,146 @@ class VizSeqByMetricSorter(object):
         :param indices:
         :return:
         """
-        avg_scores = [np.mean(list(s.values())) for s in scores]
-        sorted_indices = np.argsort(avg_scores)
-        return [indices[i] for i in sorted_indices]
+        avg_scores = np.array([np.mean(list(s.values())) for s in scores])
+        order = cls.sort_by_key(avg_scores, list(range(len(indices))))
+        return [indices[i] for i in order]
+
+    @classmethod
+    def sort_by_key(cls, key_scores: np.ndarray, indices: List[int]):
+        """
+        :param key_scores: Per-example sort keys of all examples (see
+        `VizSeqScoreKey`)
+        :param indices:
+        :return:
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        order = np.argsort(key_scores[indices], kind='stable')
+        return indices[order].tolist()
+
+
+class VizSeqByRankDisagreementSorter(object):
+    @classmethod
+    def get_disagreement(cls, scores: np.ndarray) -> Tuple[np.ndarray,
+                                                           np.ndarray]:
+        """Per-example disagreement with the overall model ranking (by mean
+        sentence score): the number of model pairs in reversed order and
+        the sum of their score margins.
+
+        :param scores: Model-by-example array of the sentence scores of all
+        examples
+        """
+        order = np.argsort(-scores.mean(axis=1), kind='stable')
+        ranked = scores[order]
+        # upper triangle: (better, worse) model pairs in the overall ranking
+        better, worse = np.triu_indices(len(ranked), k=1)
+        margins = ranked[worse] - ranked[better]
+        reversed_pairs = margins > 0
+        return reversed_pairs.sum(axis=0), \
+            np.where(reversed_pairs, margins, 0.).sum(axis=0)
+
+    @classmethod
+    def sort(cls, scores: np.ndarray, indices: List[int]):
+        """Most disagreeing examples first."""
+        indices = np.asarray(indices, dtype=np.int64)
+        n_reversed, margins = cls.get_disagreement(scores)
+        order = np.lexsort((-margins[indices], -n_reversed[indices]))
+        return indices[order].tolist()
+
+
+class VizSeqSortPermutation(object):
+    """Sorting orders of all the examples of a task as `int32` permutations,
+    which are computed once and restricted to the filtered examples at
+    request time without touching the data."""
+    @classmethod
+    def by_len(cls, lens: np.ndarray) -> np.ndarray:
+        # longest first
+        return np.argsort(lens, kind='stable')[::-1].astype(np.int32)
+
+    @classmethod
+    def by_str_order(cls, data: Sequence[str]) -> np.ndarray:
+        return np.array(sorted(range(len(data)), key=data.__getitem__),
+                        dtype=np.int32)
+
+    @classmethod
+    def random(cls, n_examples: int, seed: int = 1) -> np.ndarray:
+        return np.random.RandomState(seed).permutation(n_examples)\
+            .astype(np.int32)
+
+    @classmethod
+    def take(cls, permutation: np.ndarray,
+             indices: Union[List[int], np.ndarray]) -> np.ndarray:
+        """The examples in `indices` (or a boolean mask) in the permutation
+        order."""
+        mask = np.asarray(indices)
+        if mask.dtype != np.bool_:
+            mask = np.zeros(len(permutation), dtype=bool)
+            mask[np.asarray(indices, dtype=np.int64)] = True
+        return permutation[mask[permutation]]
+
+
+def parse_sorting_metric(sorting_metric: str) -> Tuple[str, str]:
+    """Splits `<metric>[:<key>]` into the metric and the score key."""
+    metric, _, key = sorting_metric.partition(':')
+    return metric, key
+
+
+class VizSeqScoreKey(object):
+    """Per-example sort keys on sentence scores: the mean over all models
+    (empty key), a model (`<model>`) or the difference between two models
+    (`<model>-<baseline>`)."""
+    @classmethod
+    def parse(cls, key: str, models: List[str]) -> List[str]:
+        """The models whose scores make the key: [] for the mean, [model] or
+        [model, baseline]."""
+        if len(key) == 0:
+            return []
+        if key in models:
+            return [key]
+        # model names may contain "-"
+        for i, c in enumerate(key):
+            if c == '-' and key[:i] in models and key[i + 1:] in models:
+                return [key[:i], key[i + 1:]]
+        raise ValueError(f'Unknown score key "{key}"')
+
+    @classmethod
+    def get_scores(
+            cls, key: str, models: List[str],
+            get_sent_scores: Callable[[str], np.ndarray]
+    ) -> np.ndarray:
+        key_models = cls.parse(key, models)
+        if len(key_models) == 0:
+            return np.mean([get_sent_scores(m) for m in models], axis=0)
+        elif len(key_models) == 1:
+            return np.asarray(get_sent_scores(key_models[0]))
+        model, baseline = key_models
+        return np.asarray(get_sent_scores(model)) - \
+            np.asarray(get_sent_scores(baseline))
+
+
+class VizSeqTopKSelector(object):
+    @classmethod
+    def select(cls, scores: np.ndarray, indices: Union[List[int], np.ndarray],
+               k: int, best: bool = False) -> np.ndarray:
+        """The k examples in `indices` with the lowest (or highest if `best`)
+        scores, in sorted order and with NaN scores last. Only these k are
+        sorted (partial selection with `np.partition` then `np.argsort`)."""
+        indices = np.asarray(indices, dtype=np.int32)
+        k = min(k, len(indices))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int32)
+        values = scores[indices]
+        if best:
+            values = -values
+        # examples without a score (NaN) come last
+        values = np.where(np.isnan(values), np.inf, values)
+        if k < len(indices):
+            # ties with the k-th value are broken by position, as in a stable
+            # sort
+            kth = np.partition(values, k - 1)[k - 1]
+            lower = np.flatnonzero(values < kth)
+            ties = np.flatnonzero(values == kth)[:k - len(lower)]
+            selected = np.sort(np.concatenate([lower, ties]))
+        else:
+            selected = np.arange(len(indices))
+        order = np.argsort(values[selected], kind='stable')
+        return indices[selected[order]]
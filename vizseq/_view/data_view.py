@@ -5,15 +5,19 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import Tuple, List, Iterable, NamedTuple, Dict, Optional
+from typing import (Tuple, List, Iterable, NamedTuple, Dict, Optional,
+                    Callable, Union)
 
 import numpy as np
 
-from vizseq._data import VizSeqDataSources, VizSeqLanguageTagger
-from .data_sorters import (VizSeqSortingType, VizSeqRandomSorter,
-                           VizSeqByLenSorter, VizSeqByStrOrderSorter,
-                           VizSeqByMetricSorter)
+from vizseq._data import (VizSeqDataSources, VizSeqLanguageTagger,
+                          VizSeqSearchIndex)
+from .data_sorters import (VizSeqSortingType, VizSeqByMetricSorter,
+                           VizSeqByRankDisagreementSorter,
+                           VizSeqSortPermutation, VizSeqScoreKey,
+                           VizSeqTopKSelector, parse_sorting_metric)
 from .data_filter import VizSeqFilter
+from .data_query import VizSeqQuery, VizSeqQueryColumns
 from vizseq.scorers import get_scorer, get_scorer_ids
 from vizseq._visualizers import (VizSeqSrcVisualizer, VizSeqRefVisualizer,
                                  VizSeqHypoVisualizer, VizSeqDictVisualizer)
@@ -50,6 +54,7 @@ class VizSeqPageData(NamedTuple):
     n_cur_samples: int
     n_samples: int
     total_examples: int
+    query_error: Optional[str] = None
 
 
 class VizSeqDataPageView(object):
@@ -62,6 +67,108 @@ class VizSeqDataPageView(object):
             for i, e in enumerate(data)
         ]
 
+    @classmethod
+    def _filter(
+            cls, query: str, columns: VizSeqQueryColumns
+    ) -> Union[List[int], np.ndarray]:
+        """Indices (or a boolean mask) of the examples matching `query`.
+        Raises `VizSeqQueryError` if a structured query does not apply to
+        the data (e.g. an unknown field or model)."""
+        structured_query = VizSeqQuery.parse(query)
+        if structured_query is not None:
+            return structured_query.get_mask(columns)
+        src, ref = columns.src, columns.ref
+        if src.has_text:
+            return VizSeqFilter.filter(src.text, query, columns.search_index)
+        elif ref.has_text:
+            return VizSeqFilter.filter(ref.text, query, columns.search_index)
+        return list(range(len(src)))
+
+    @classmethod
+    def get_example_idx(
+            cls, src: VizSeqDataSources, ref: VizSeqDataSources,
+            hypo: VizSeqDataSources, query: str = '', sorting: int = 0,
+            sorting_metric: str = '',
+            search_index: Optional[VizSeqSearchIndex] = None,
+            tags: Optional[List[List[str]]] = None,
+            query_columns: Optional[VizSeqQueryColumns] = None
+    ) -> np.ndarray:
+        """Indices of the examples matching `query`, in the sorting order.
+        Sentence scores for metric sorting come from `query_columns`, and
+        `sorting_metric` can have a score key (see `get_top_k_idx`)."""
+        if query_columns is None:
+            query_columns = VizSeqQueryColumns(
+                src, ref, hypo, tags=tags, search_index=search_index
+            )
+        selected = cls._filter(query, query_columns)
+
+        sorting = {e.value: e for e in VizSeqSortingType}.get(sorting, None)
+        assert sorting is not None
+        models = hypo.text_names
+        metric, key = parse_sorting_metric(sorting_metric)
+        has_scores = metric in get_scorer_ids() and len(models) > 0
+        if sorting == VizSeqSortingType.metric:
+            if has_scores:
+                try:
+                    key_scores = VizSeqScoreKey.get_scores(
+                        key, models,
+                        lambda m: query_columns.get_sent_scores(metric, m)
+                    )
+                except ValueError:
+                    # unknown models in the key: keep the original order
+                    return cls._get_indices(selected)
+                return np.asarray(VizSeqByMetricSorter.sort_by_key(
+                    key_scores, cls._get_indices(selected)
+                ), dtype=np.int32)
+        elif sorting == VizSeqSortingType.metric_rank_disagreement:
+            if has_scores:
+                scores = np.stack([
+                    query_columns.get_sent_scores(metric, m) for m in models
+                ])
+                return np.asarray(VizSeqByRankDisagreementSorter.sort(
+                    scores, cls._get_indices(selected)
+                ), dtype=np.int32)
+        elif sorting != VizSeqSortingType.original:
+            permutation = query_columns.get_sort_permutation(sorting)
+            if permutation is not None:
+                return VizSeqSortPermutation.take(permutation, selected)
+        return cls._get_indices(selected)
+
+    @classmethod
+    def get_top_k_idx(
+            cls, src: VizSeqDataSources, ref: VizSeqDataSources,
+            hypo: VizSeqDataSources, sorting_metric: str, k: int,
+            best: bool = False, query: str = '',
+            search_index: Optional[VizSeqSearchIndex] = None,
+            tags: Optional[List[List[str]]] = None,
+            query_columns: Optional[VizSeqQueryColumns] = None
+    ) -> Tuple[int, np.ndarray]:
+        """The number of examples matching `query` and the indices of the k
+        worst (or best) of them by `sorting_metric`: `<metric>` (mean over
+        models), `<metric>:<model>` or `<metric>:<model>-<baseline>`."""
+        if query_columns is None:
+            query_columns = VizSeqQueryColumns(
+                src, ref, hypo, tags=tags, search_index=search_index
+            )
+        selected = cls._get_indices(cls._filter(query, query_columns))
+        metric, key = parse_sorting_metric(sorting_metric)
+        models = hypo.text_names
+        if metric not in get_scorer_ids() or len(models) == 0:
+            raise ValueError(f'Invalid sorting metric "{sorting_metric}"')
+        scores = VizSeqScoreKey.get_scores(
+            key, models, lambda m: query_columns.get_sent_scores(metric, m)
+        )
+        return len(selected), VizSeqTopKSelector.select(
+            scores, selected, k, best=best
+        )
+
+    @classmethod
+    def _get_indices(cls, selected: Union[List[int], np.ndarray]):
+        selected = np.asarray(selected)
+        if selected.dtype == np.bool_:
+            return np.flatnonzero(selected).astype(np.int32)
+        return selected.astype(np.int32)
+
     @classmethod
     def get(
             cls, src: VizSeqDataSources, ref: VizSeqDataSources,
@@ -69,56 +176,46 @@ class VizSeqDataPageView(object):
             metrics: Optional[List[str]] = None, query: str = '',
             sorting: int = 0, sorting_metric: str = '',
             need_lang_tags: bool = False, disable_alignment: bool = False,
+            media_url_fn: Optional[Callable[[str, int], str]] = None,
+            search_index: Optional[VizSeqSearchIndex] = None,
+            tags: Optional[List[List[str]]] = None,
+            query_columns: Optional[VizSeqQueryColumns] = None,
+            example_idx: Optional[np.ndarray] = None, top_k: int = 0,
+            top_k_best: bool = False
     ) -> VizSeqPageData:
+        """`example_idx` (from `get_example_idx`) skips filtering and
+        sorting, so that pages of the same view can share them. With
+        `top_k`, the view has the k worst (or best if `top_k_best`) examples
+        by `sorting_metric` (see `get_top_k_idx`) instead, and only the ones
+        up to the current page are sorted."""
         assert page_no > 0 and page_sz > 0
         page_sz = min(page_sz, MAX_PAGE_SZ)
         metrics = [] if metrics is None else metrics
         models = hypo.text_names
-        # query
-        cur_idx = list(range(len(src)))
-        if src.has_text:
-            cur_idx = VizSeqFilter.filter(src.text, query)
-        elif ref.has_text:
-            cur_idx = VizSeqFilter.filter(ref.text, query)
-        n_samples = len(cur_idx)
-
-        # sorting
-        sorting = {e.value: e for e in VizSeqSortingType}.get(sorting, None)
-        assert sorting is not None
-        if sorting == VizSeqSortingType.random:
-            cur_idx = VizSeqRandomSorter.sort(cur_idx)
-        elif sorting == VizSeqSortingType.ref_len:
-            cur_idx = VizSeqByLenSorter.sort(ref.main_text, cur_idx)
-        elif sorting == VizSeqSortingType.ref_alphabetical:
-            cur_idx = VizSeqByStrOrderSorter.sort(ref.main_text, cur_idx)
-        elif sorting == VizSeqSortingType.src_len:
-            if src.has_text:
-                cur_idx = VizSeqByLenSorter.sort(src.main_text, cur_idx)
-        elif sorting == VizSeqSortingType.src_alphabetical:
-            if src.has_text:
-                cur_idx = VizSeqByStrOrderSorter.sort(src.main_text, cur_idx)
-        elif sorting == VizSeqSortingType.metric:
-            if sorting_metric in get_scorer_ids():
-                _cur_ref = [_select(t, cur_idx) for t in ref.text]
-                scores = {
-                    m: get_scorer(sorting_metric)(
-                        corpus_level=False, sent_level=True
-                    ).score(_select(t, cur_idx), _cur_ref).sent_scores
-                    for m, t in zip(models, hypo.text)
-                }
-                scores = [
-                    {m: scores[m][i] for m in models}
-                    for i in range(len(cur_idx))
-                ]
-                cur_idx = VizSeqByMetricSorter.sort(scores, cur_idx)
+        # query and sorting
+        if example_idx is None and top_k > 0:
+            n_samples, example_idx = cls.get_top_k_idx(
+                src, ref, hypo, sorting_metric, min(top_k, page_sz * page_no),
+                best=top_k_best, query=query, search_index=search_index,
+                tags=tags, query_columns=query_columns
+            )
+            n_samples = min(n_samples, top_k)
+        else:
+            if example_idx is None:
+                example_idx = cls.get_example_idx(
+                    src, ref, hypo, query=query, sorting=sorting,
+                    sorting_metric=sorting_metric, search_index=search_index,
+                    tags=tags, query_columns=query_columns
+                )
+            n_samples = len(example_idx)
 
         # pagination
-        start_idx, end_idx = _get_start_end_idx(len(cur_idx), page_sz, page_no)
-        cur_idx = cur_idx[start_idx: end_idx + 1]
+        start_idx, end_idx = _get_start_end_idx(n_samples, page_sz, page_no)
+        cur_idx = example_idx[start_idx: end_idx + 1].tolist()
         n_cur_samples = len(cur_idx)
 
         # page data
-        cur_src = src.cached(cur_idx)
+        cur_src = src.cached(cur_idx, media_url_fn=media_url_fn)
         cur_src_text = _select(src.main_text, cur_idx) if src.has_text else None
         cur_ref = [_select(t, cur_idx) for t in ref.text]
         cur_hypo = {
@@ -5,50 +5,324 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import List
-from functools import lru_cache
+from typing import List, Optional
 import os.path as op
+import json
 from glob import glob
 
-from vizseq._data import VizSeqDataSources
+import numpy as np
+
+from vizseq._data import (VizSeqDataSources, VizSeqTokenization,
+                          VizSeqPackedTask, VizSeqWaveformPeaks,
+                          VizSeqTaskWatcher, VizSeqStats, VizSeqNGrams,
+                          VizSeqSearchIndex, glob_text_files,
+                          find_text_files)
 from vizseq.scorers import get_scorer
+from vizseq._utils.cache_manager import VizSeqCacheManager
+from vizseq._utils.cache_dir import get_content_hash
+from .data_query import VizSeqQueryColumns, VizSeqQueryError
+from .data_sorters import VizSeqSortingType
+from .data_view import VizSeqDataPageView
+
+
+def _get_tokenization(tokenization: str) -> VizSeqTokenization:
+    return {t.name: t for t in VizSeqTokenization}.get(
+        tokenization, VizSeqTokenization.none
+    )
+
+
+def _get_packed_sources(
+        dir_path: str, kind: str, names: Optional[List[str]] = None,
+        text_merged: bool = False
+) -> Optional[VizSeqDataSources]:
+    packed = VizSeqPackedTask.open(dir_path)
+    if packed is None:
+        return None
+    return packed.get_sources(kind, names=names, text_merged=text_merged)
+
+
+def _get_version(dir_path: str, *groups: str) -> str:
+    return VizSeqTaskWatcher.get_version(dir_path, *groups)
+
+
+def _get_pred_groups(
+        dir_path: str, models: Optional[List[str]] = None
+) -> List[str]:
+    if models is not None:
+        return [f'pred_{m}' for m in models]
+    return sorted(g for g in VizSeqTaskWatcher.get_versions(dir_path)
+                  if g.startswith('pred_'))
+
+
+# The cached getters below take the version of the task files they read
+# (see `VizSeqTaskWatcher`) as an argument, so that changing a file only
+# misses the caches of the data it affects. The task tokenization only
+# applies to scorer inputs: examples are shown, searched and sorted as they
+# are in the task files.
+
+@VizSeqCacheManager.cached('src')
+def __get_src(dir_path: str, version: str, tokenization: str = 'none'):
+    src = _get_packed_sources(dir_path, 'src')
+    if src is None:
+        src = VizSeqDataSources(sorted(glob(op.join(dir_path, 'src_*.*'))))
+    return src.tokenize(_get_tokenization(tokenization))
+
+
+def _get_src(dir_path: str, tokenization: str = 'none'):
+    return __get_src(dir_path, _get_version(dir_path, 'src'), tokenization)
+
+
+def _get_media_info(dir_path: str, src_name: str, idx: int):
+    return _get_src(dir_path).get_media_info(src_name, idx)
+
+
+def _get_waveform_peaks(dir_path: str, src_name: str, ids: List[int]):
+    src = _get_src(dir_path)
+    if src_name not in src.names:
+        return None
+    source = src.data[src.names.index(src_name)]
+    if not source.is_audio or any(not 0 <= i < len(source) for i in ids):
+        return None
+    return VizSeqWaveformPeaks().get(source, ids)
+
 
+@VizSeqCacheManager.cached('ref')
+def __get_ref(dir_path: str, version: str, tokenization: str = 'none'):
+    ref = _get_packed_sources(dir_path, 'ref')
+    if ref is None:
+        ref = VizSeqDataSources(glob_text_files(dir_path, 'ref'))
+    return ref.tokenize(_get_tokenization(tokenization))
 
-@lru_cache(maxsize=2)
-def _get_src(dir_path: str):
-    return VizSeqDataSources(sorted(glob(op.join(dir_path, 'src_*.*'))))
 
+def _get_ref(dir_path: str, tokenization: str = 'none'):
+    return __get_ref(dir_path, _get_version(dir_path, 'ref'), tokenization)
 
-@lru_cache(maxsize=2)
-def _get_ref(dir_path: str):
-    return VizSeqDataSources(sorted(glob(op.join(dir_path, 'ref_*.txt'))))
+
+@VizSeqCacheManager.cached('tag')
+def __get_tag(dir_path: str, version: str):
+    tag = _get_packed_sources(dir_path, 'tag', text_merged=True)
+    if tag is None:
+        tag = VizSeqDataSources(
+            glob_text_files(dir_path, 'tag'), text_merged=True
+        )
+    return tag
 
 
-@lru_cache(maxsize=2)
 def _get_tag(dir_path: str):
-    return VizSeqDataSources(
-        sorted(glob(op.join(dir_path, 'tag_*.txt'))), text_merged=True
-    )
+    return __get_tag(dir_path, _get_version(dir_path, 'tag'))
 
 
-@lru_cache(maxsize=2)
-def __get_hypo(dir_path: str, models: str):
-    if len(models) > 0:
-        paths = [op.join(dir_path, f'pred_{m}.txt') for m in models.split(',')]
-    else:
-        paths = glob(op.join(dir_path, 'pred_*.txt'))
-    return VizSeqDataSources(paths)
+@VizSeqCacheManager.cached('hypo')
+def __get_hypo(dir_path: str, models: str, version: str,
+               tokenization: str = 'none'):
+    names = models.split(',') if len(models) > 0 else None
+    hypo = _get_packed_sources(dir_path, 'pred', names=names)
+    if hypo is None:
+        if names is not None:
+            paths = [p for m in names
+                     for p in find_text_files(dir_path, f'pred_{m}')]
+        else:
+            paths = glob_text_files(dir_path, 'pred')
+        hypo = VizSeqDataSources(paths)
+    return hypo.tokenize(_get_tokenization(tokenization))
 
 
-def _get_hypo(dir_path: str, models: List[str]):
-    return __get_hypo(dir_path, ','.join(models))
+def _get_hypo(dir_path: str, models: List[str], tokenization: str = 'none'):
+    version = _get_version(
+        dir_path, *_get_pred_groups(dir_path, models or None)
+    )
+    return __get_hypo(dir_path, ','.join(models), version, tokenization)
 
 
-@lru_cache(maxsize=64)
-def _get_scores(dir_path: str, metric: str, model: str):
-    hypo = _get_hypo(dir_path, [model])
-    ref = _get_ref(dir_path)
+@VizSeqCacheManager.cached('scores')
+def __get_scores(dir_path: str, metric: str, model: str, version: str,
+                 tokenization: str = 'none'):
+    hypo = _get_hypo(dir_path, [model], tokenization)
+    ref = _get_ref(dir_path, tokenization)
     tag = _get_tag(dir_path)
     return get_scorer(metric)(corpus_level=True, sent_level=True).score(
         hypo.data[0].text, ref.text, tags=tag.text
     )
+
+
+def _get_scores(dir_path: str, metric: str, model: str,
+                tokenization: str = 'none'):
+    version = _get_version(dir_path, f'pred_{model}', 'ref', 'tag')
+    return __get_scores(dir_path, metric, model, version, tokenization)
+
+
+@VizSeqCacheManager.cached('sent_scores')
+def __get_sent_scores(dir_path: str, metric: str, model: str, version: str,
+                      tokenization: str = 'none') -> np.ndarray:
+    return np.asarray(
+        _get_scores(dir_path, metric, model, tokenization).sent_scores,
+        dtype=np.float64
+    )
+
+
+def _get_sent_scores(dir_path: str, metric: str, model: str,
+                     tokenization: str = 'none') -> np.ndarray:
+    version = _get_version(dir_path, f'pred_{model}', 'ref', 'tag')
+    return __get_sent_scores(dir_path, metric, model, version, tokenization)
+
+
+def _get_search_index(dir_path: str):
+    """The search index over the text sources (or references if sources
+    are not text) of a task, or None while it is being built."""
+    src = _get_src(dir_path)
+    group = 'src' if src.has_text else 'ref'
+    task_key = get_content_hash([op.abspath(dir_path)])
+    key = get_content_hash([task_key, _get_version(dir_path, group)])
+    # indices of older versions of the task are removed once this one is
+    # saved
+    return VizSeqSearchIndex.get(
+        key, lambda: src.text if src.has_text else _get_ref(dir_path).text,
+        group=task_key
+    )
+
+
+@VizSeqCacheManager.cached('query_columns')
+def __get_lens(dir_path: str, name: str, model: str,
+               version: str) -> np.ndarray:
+    if name == 'src':
+        sources = _get_src(dir_path)
+    elif name == 'ref':
+        sources = _get_ref(dir_path)
+    else:
+        sources = _get_hypo(dir_path, [model])
+    if sources.main_text_idx is None:
+        field = 'hypo_len' if name == 'pred' else f'{name}_len'
+        raise VizSeqQueryError(f'"{field}" needs a text source')
+    return sources.data[sources.main_text_idx].get_lens()
+
+
+def _get_lens(dir_path: str, name: str, model: str = '') -> np.ndarray:
+    """Lengths of the (first) text source `name` ('src', 'ref' or 'pred')
+    of a task."""
+    group = f'pred_{model}' if name == 'pred' else name
+    version = _get_version(dir_path, group)
+    return __get_lens(dir_path, name, model, version)
+
+
+@VizSeqCacheManager.cached('query_columns')
+def __get_tag_mask(dir_path: str, tag: str, version: str) -> np.ndarray:
+    tags = _get_tag(dir_path)
+    if not tags.has_text:
+        return np.zeros(len(_get_ref(dir_path)), dtype=bool)
+    return np.array([tag in t for t in tags.text], dtype=bool)
+
+
+def _get_tag_mask(dir_path: str, tag: str) -> np.ndarray:
+    return __get_tag_mask(dir_path, tag, _get_version(dir_path, 'tag'))
+
+
+class _VizSeqTaskQueryColumns(VizSeqQueryColumns):
+    """Query columns of a task served from the memory caches, so that
+    queries do not recompute lengths, tags or sentence scores. Sentence
+    scores are on the text in the task tokenization."""
+    def __init__(self, dir_path: str, tokenization: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dir_path = dir_path
+        self.tokenization = tokenization
+
+    def get_lens(self, name: str, model: Optional[str]) -> np.ndarray:
+        name = {'src_len': 'src', 'ref_len': 'ref'}.get(name, 'pred')
+        return _get_lens(self.dir_path, name, model or '')
+
+    def get_sent_scores(self, metric: str, model: str) -> np.ndarray:
+        return _get_sent_scores(self.dir_path, metric, model,
+                                self.tokenization)
+
+    def get_sort_permutation(
+            self, sorting: VizSeqSortingType
+    ) -> Optional[np.ndarray]:
+        return _get_sort_permutation(self.dir_path, sorting.value)
+
+    def get_tag_mask(self, tag: str) -> np.ndarray:
+        return _get_tag_mask(self.dir_path, tag)
+
+
+@VizSeqCacheManager.cached('sort_index')
+def __get_sort_permutation(dir_path: str, sorting: int,
+                           version: str) -> Optional[np.ndarray]:
+    columns = _VizSeqTaskQueryColumns(
+        dir_path, 'none', _get_src(dir_path), _get_ref(dir_path),
+        VizSeqDataSources(None)
+    )
+    return columns._get_sort_permutation(VizSeqSortingType(sorting))
+
+
+def _get_sort_permutation(dir_path: str,
+                          sorting: int) -> Optional[np.ndarray]:
+    """The `int32` permutation of all the examples of a task by a sorting
+    type other than `metric`."""
+    version = _get_version(dir_path, 'src', 'ref')
+    return __get_sort_permutation(dir_path, sorting, version)
+
+
+def _get_query_columns(dir_path: str, models: List[str],
+                       tokenization: str = 'none') -> VizSeqQueryColumns:
+    return _VizSeqTaskQueryColumns(
+        dir_path, tokenization, _get_src(dir_path), _get_ref(dir_path),
+        _get_hypo(dir_path, models),
+        search_index=_get_search_index(dir_path)
+    )
+
+
+@VizSeqCacheManager.cached('example_idx')
+def __get_example_idx(dir_path: str, models: str, query: str, sorting: int,
+                      sorting_metric: str, version: str,
+                      tokenization: str = 'none') -> np.ndarray:
+    columns = _get_query_columns(
+        dir_path, models.split(',') if len(models) > 0 else [], tokenization
+    )
+    return VizSeqDataPageView.get_example_idx(
+        columns.src, columns.ref, columns.hypo, query=query, sorting=sorting,
+        sorting_metric=sorting_metric, search_index=columns.search_index,
+        query_columns=columns
+    )
+
+
+def _get_example_idx(dir_path: str, models: List[str], query: str = '',
+                     sorting: int = 0, sorting_metric: str = '',
+                     tokenization: str = 'none') -> np.ndarray:
+    """Filtered and sorted example indices of a task view, cached per
+    (query, sorting) so that turning pages does not redo them."""
+    version = _get_version(
+        dir_path, 'src', 'ref', 'tag',
+        *_get_pred_groups(dir_path, models or None)
+    )
+    return __get_example_idx(dir_path, ','.join(models), query, sorting,
+                             sorting_metric, version, tokenization)
+
+
+@VizSeqCacheManager.cached('stats')
+def __get_stats(dir_path: str, version: str):
+    src = _get_src(dir_path)
+    ref = _get_ref(dir_path)
+    tag = _get_tag(dir_path)
+    return json.dumps(VizSeqStats.get(src, ref, tag).to_dict())
+
+
+def _get_stats(dir_path: str) -> str:
+    version = _get_version(dir_path, 'src', 'ref', 'tag')
+    return __get_stats(dir_path, version)
+
+
+@VizSeqCacheManager.cached('n_grams')
+def __get_n_grams(dir_path: str, version: str, k: int = 50):
+    src = _get_src(dir_path)
+    if src.has_text:
+        return json.dumps(VizSeqNGrams.extract(src, k=k))
+    ref = _get_ref(dir_path)
+    return json.dumps(VizSeqNGrams.extract(ref, k=k))
+
+
+def _get_n_grams(dir_path: str, k: int = 50):
+    version = _get_version(dir_path, 'src', 'ref')
+    return __get_n_grams(dir_path, version, k)
+
+
+def _clear_caches():
+    VizSeqCacheManager.clear()
+    VizSeqTaskWatcher.reset()
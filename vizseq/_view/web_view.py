@@ -5,27 +5,43 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import List, Tuple, Iterable
+from typing import List, Tuple, Iterable, Optional
 import math
 import os
 import os.path as op
-from glob import glob
 import json
+from urllib.parse import urlencode
+
+import numpy as np
 
 from vizseq._data import (VizSeqTaskConfigManager, VizSeqGlobalConfigManager,
-                          VizSeqStats, set_g_cred_path, VizSeqTableExporter,
-                          VizSeqNGrams, VizSeqTokenization)
-from vizseq.scorers import get_scorer_name, get_scorer_ids_and_names
+                          set_g_cred_path, VizSeqTableExporter,
+                          VizSeqTokenization, VizSeqMediaInfo,
+                          VizSeqThumbnailCache, VizSeqTaskWatcher,
+                          glob_text_files, group_shard_paths,
+                          get_name_from_path)
+from vizseq._data.task_watcher import CFG_GROUP
+from vizseq.scorers import (get_scorer_name, get_scorer_ids_and_names,
+                            get_scorer_ids)
 from .data_view import VizSeqDataPageView, VizSeqPageData
+from .data_query import VizSeqQueryError
+from .data_sorters import (VizSeqSortingType, VizSeqScoreKey,
+                           parse_sorting_metric)
 from .mem_cached_data_getters import (_get_src, _get_ref, _get_tag, _get_hypo,
-                                      _get_scores)
+                                      _get_scores, _get_media_info,
+                                      _get_waveform_peaks, _get_stats,
+                                      _get_n_grams, _get_example_idx,
+                                      _get_query_columns)
+
+PAGE_THUMBNAIL_WIDTH = 320
 
 
 class VizSeqWebView(object):
     def __init__(
             self, data_root: str, task: str = '', models: List[str] = (),
             page_sz: int = 10, page_no: int = 1, query: str = '',
-            sorting: int = 0, sorting_metric: str = ''
+            sorting: int = 0, sorting_metric: str = '', top_k: int = 0,
+            top_k_best: bool = False
     ):
         if not op.isdir(data_root):
             raise NotADirectoryError(f'{data_root} is not a valid data root.')
@@ -51,6 +67,8 @@ class VizSeqWebView(object):
         self.query = query
         self.sorting = sorting
         self.sorting_metric = sorting_metric
+        self.top_k = top_k
+        self.top_k_best = top_k_best
         set_g_cred_path(VizSeqGlobalConfigManager().g_cred_path)
         src = _get_src(self.dir_path)
         self.src_has_text = src.has_text
@@ -68,10 +86,7 @@ class VizSeqWebView(object):
         self.cfg.set_task_name(task_name)
 
     def get_stats(self):
-        src = _get_src(self.dir_path)
-        ref = _get_ref(self.dir_path)
-        tag = _get_tag(self.dir_path)
-        return json.dumps(VizSeqStats.get(src, ref, tag).to_dict())
+        return _get_stats(self.dir_path)
 
     @classmethod
     def get_enum_tasks_and_names_and_enum_models(
@@ -88,13 +103,10 @@ class VizSeqWebView(object):
             task_name = VizSeqTaskConfigManager(dir_path).task_name
             if len(task_name) == 0:
                 task_name = d
-            paths = sorted(glob(op.join(dir_path, 'pred_*.txt')))
+            paths, _ = group_shard_paths(glob_text_files(dir_path, 'pred'))
             if len(paths) == 0:
                 continue
-            models = [
-                (i, str(op.splitext(op.basename(p))[0]).split('_', 1)[1])
-                for i, p in enumerate(paths)
-            ]
+            models = [(i, get_name_from_path(p)) for i, p in enumerate(paths)]
             enum_tasks_and_names_and_enum_models.append(
                 (c, d, task_name, models)
             )
@@ -118,7 +130,7 @@ class VizSeqWebView(object):
         sent_scores = {s: {} for s in self.metrics}
         for s in self.metrics:
             for i, m in enumerate(self.models):
-                cur = _get_scores(self.dir_path, s, m)
+                cur = _get_scores(self.dir_path, s, m, self.tokenization)
                 cur = [cur.corpus_score, cur.group_scores, cur.sent_scores]
                 corpus_scores[s][m] = cur[0]
                 for t in tag_set:
@@ -139,24 +151,104 @@ class VizSeqWebView(object):
         return json.dumps(scores)
 
     def get_n_grams(self, k=50):
-        src = _get_src(self.dir_path)
-        if src.has_text:
-            ngrams = VizSeqNGrams.extract(src, k=k)
-        else:
-            ref = _get_ref(self.dir_path)
-            ngrams = VizSeqNGrams.extract(ref, k=k)
-        return json.dumps(ngrams)
+        return _get_n_grams(self.dir_path, k=k)
 
     def get_page_data(self) -> VizSeqPageData:
         dir_path = op.join(self.data_root, self.task)
         src = _get_src(dir_path)
         ref = _get_ref(dir_path)
         hypo = _get_hypo(dir_path, self.models)
-        return VizSeqDataPageView.get(
-            src, ref, hypo, self.page_sz, self.page_no, metrics=self.metrics,
-            query=self.query, sorting=self.sorting,
-            sorting_metric=self.sorting_metric, need_lang_tags=True
-        )
+        kwargs = {
+            'metrics': self.metrics, 'need_lang_tags': True,
+            'media_url_fn': self.get_media_url
+        }
+        try:
+            if self.top_k > 0:
+                # only the examples up to the current page are selected
+                idx_kwargs = {
+                    'query': self.query,
+                    'sorting_metric': self.get_top_k_metric(),
+                    'query_columns': _get_query_columns(
+                        dir_path, self.models, self.tokenization
+                    ),
+                    'top_k': self.top_k, 'top_k_best': self.top_k_best
+                }
+            else:
+                idx_kwargs = {'example_idx': _get_example_idx(
+                    dir_path, self.models, query=self.query,
+                    sorting=self.sorting, sorting_metric=self.sorting_metric,
+                    tokenization=self.tokenization
+                )}
+            return VizSeqDataPageView.get(
+                src, ref, hypo, self.page_sz, self.page_no, **kwargs,
+                **idx_kwargs
+            )
+        except VizSeqQueryError as e:
+            page_data = VizSeqDataPageView.get(
+                src, ref, hypo, self.page_sz, self.page_no, **kwargs,
+                example_idx=np.zeros(0, dtype=np.int32)
+            )
+            return page_data._replace(query_error=str(e))
+
+    def get_top_k_metric(self) -> str:
+        """The sorting metric (with its score key) of the worst/best-k view:
+        the selected metric sorting or else the first task metric."""
+        sorting_metric = self.sorting_metric
+        metric_sortings = {
+            VizSeqSortingType.metric.value,
+            VizSeqSortingType.metric_rank_disagreement.value
+        }
+        if self.sorting not in metric_sortings:
+            sorting_metric = ''
+        if len(sorting_metric) == 0 and len(self.metrics) > 0:
+            sorting_metric = self.metrics[0]
+        metric, key = parse_sorting_metric(sorting_metric)
+        if metric not in get_scorer_ids():
+            raise VizSeqQueryError('Worst/best-k needs a metric')
+        if len(self.models) == 0:
+            raise VizSeqQueryError('Worst/best-k needs a model')
+        try:
+            VizSeqScoreKey.parse(key, self.models)
+        except ValueError as e:
+            raise VizSeqQueryError(str(e))
+        return sorting_metric
+
+    def get_media_url(self, src_name: str, idx: int) -> str:
+        url_args = {'t': self.task, 's': src_name, 'i': idx}
+        info = _get_media_info(self.dir_path, src_name, idx)
+        if info is not None and VizSeqThumbnailCache.is_supported(info):
+            # versioned thumbnail URLs can be cached for good
+            url_args.update({
+                'w': PAGE_THUMBNAIL_WIDTH,
+                'v': VizSeqThumbnailCache.get_version(info)
+            })
+        return '/media?' + urlencode(url_args)
+
+    @classmethod
+    def get_media_info(
+            cls, data_root: str, task: str, src_name: str, idx: int
+    ) -> Optional[VizSeqMediaInfo]:
+        return _get_media_info(op.join(data_root, task), src_name, idx)
+
+    @classmethod
+    def get_data_version(cls, data_root: str, task: str) -> str:
+        return VizSeqTaskWatcher.get_data_version(op.join(data_root, task))
+
+    @classmethod
+    def invalidate_cfg(cls, data_root: str, task: str) -> None:
+        VizSeqTaskWatcher.invalidate(op.join(data_root, task), CFG_GROUP)
+
+    @classmethod
+    def get_waveform_peaks(
+            cls, data_root: str, task: str, src_name: str, ids: List[int]
+    ) -> Optional[str]:
+        peaks = _get_waveform_peaks(op.join(data_root, task), src_name, ids)
+        if peaks is None:
+            return None
+        return json.dumps({
+            'n_points': peaks.shape[1],
+            'peaks': {i: p.flatten().tolist() for i, p in zip(ids, peaks)}
+        })
 
     def get_page_data_with_pagination(self) -> str:
         page_data = self.get_page_data()._asdict()
@@ -219,3 +311,7 @@ class VizSeqWebView(object):
     @property
     def page_sizes(self):
         return [10, 25, 50, 100]
+
+    @property
+    def top_k_options(self):
+        return [10, 50, 100, 500]
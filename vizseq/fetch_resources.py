@@ -0,0 +1,42 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import argparse
+import sys
+
+from vizseq._utils.resources import VizSeqResourceManager, ALL_RESOURCES
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download the resources (NLTK data and LASER models) '
+                    'needed by VizSeq scorers, so that scoring runs offline.'
+    )
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='resources to fetch: {} (default: all)'.format(
+                            ', '.join(ALL_RESOURCES)
+                        ))
+    parser.add_argument('--nltk-data-dir', type=str, default=None,
+                        help='NLTK data directory to download into')
+    args = parser.parse_args()
+    for n in args.names:
+        if n not in ALL_RESOURCES:
+            parser.error(f'unknown resource "{n}"')
+    names = args.names if len(args.names) > 0 else None
+    fetched, failed = VizSeqResourceManager.fetch(
+        names, nltk_data_dir=args.nltk_data_dir
+    )
+    for n in fetched:
+        print(f'Fetched {n}')
+    for n in failed:
+        print(f'Failed to fetch {n}')
+    if len(failed) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -44,10 +44,17 @@ def view_examples(
         sorting: VizSeqSortingType = VizSeqSortingType.original,
         need_g_translate: bool = False,
         disable_alignment: bool = False,
+        tags: Optional[PathOrPathsOrDictOfStrList] = None,
+        sorting_metric: str = '',
+        top_k: int = 0,
+        top_k_best: bool = False,
 ):
     _src = VizSeqDataSources(sources)
     _ref = VizSeqDataSources(references)
     _hypo = VizSeqDataSources(hypothesis)
+    _tags = None
+    if tags is not None:
+        _tags = VizSeqDataSources(tags, text_merged=True).text
     if _hypo.n_sources == 0:
         metrics = None
     assert len(_src) == len(_ref)
@@ -56,8 +63,9 @@ def view_examples(
     _need_g_translate = need_g_translate and _src.has_text
     view = VizSeqDataPageView.get(
         _src, _ref, _hypo, page_sz, page_no, metrics=metrics, query=query,
-        sorting=sorting.value, need_lang_tags=_need_g_translate,
-        disable_alignment=disable_alignment
+        sorting=sorting.value, sorting_metric=sorting_metric,
+        need_lang_tags=_need_g_translate, disable_alignment=disable_alignment,
+        tags=_tags, top_k=top_k, top_k_best=top_k_best
     )
 
     google_translation = []
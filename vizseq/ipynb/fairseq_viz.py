@@ -62,13 +62,17 @@ def view_examples(
         page_no: int = DEFAULT_PAGE_NO,
         sorting: VizSeqSortingType = VizSeqSortingType.original,
         need_g_translate: bool = False,
-        disable_alignment: bool = False
+        disable_alignment: bool = False,
+        sorting_metric: str = '',
+        top_k: int = 0,
+        top_k_best: bool = False
 ):
     sources, references, hypothesis = _get_data(log_path_or_paths)
     return _view_examples(
         sources, references, hypothesis, metrics, query, page_sz=page_sz,
         page_no=page_no, sorting=sorting, need_g_translate=need_g_translate,
-        disable_alignment=disable_alignment
+        disable_alignment=disable_alignment, sorting_metric=sorting_metric,
+        top_k=top_k, top_k_best=top_k_best
     )
 
 
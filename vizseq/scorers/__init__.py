@@ -11,7 +11,8 @@ import os
 import sys
 from pathlib import Path
 import math
-from typing import List, Optional, Set, Dict, Callable, NamedTuple, Tuple, Type
+from typing import (List, Optional, Set, Dict, Callable, NamedTuple, Tuple,
+                    Type, Sequence)
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from multiprocessing import cpu_count
 
@@ -19,6 +20,8 @@ import numpy as np
 from tqdm import tqdm
 
 from vizseq._utils.optional import map_optional
+from vizseq._utils.resources import VizSeqResourceManager
+from vizseq._utils.worker_pool import VizSeqWorkerPool
 
 EXCLUDED_PREFIXES = ('.', '_')
 PY_FILE_EXT = ('.py', '.pyc')
@@ -65,14 +68,32 @@ def _batch(a_list: list, n_batches: int):
             yield a_list[i: min(i + batch_size, len(a_list))]
 
 
+def _score_batch(
+        sent_score_func: SENT_SCORE_FN_TYPE, hypo: Sequence[str],
+        ref: List[Sequence[str]], extra_args: Optional[Dict[str, str]] = None
+) -> List[float]:
+    # sharded batches are read here, in the worker
+    return sent_score_func(
+        list(hypo), [list(r) for r in ref], extra_args=extra_args
+    )
+
+
 class VizSeqScorer(object):
     SAMPLES_PER_WORKER = 1000
+    # local resources (NLTK data, model files) the scorer needs. They are
+    # checked (once per process) on construction instead of being downloaded
+    # on import. See `vizseq._utils.resources`.
+    REQUIRED_RESOURCES: Tuple[str, ...] = ()
+    # heavy modules to import in worker processes before any task arrives
+    # (in addition to the scorer's own module)
+    PRELOAD_MODULES: Tuple[str, ...] = ()
 
     def __init__(
             self, corpus_level: bool = True, sent_level: bool = False,
             n_workers: Optional[int] = None, verbose: bool = False,
             extra_args: Optional[Dict[str, str]] = None
     ):
+        VizSeqResourceManager.require(*self.REQUIRED_RESOURCES)
         self.corpus_level = corpus_level
         self.sent_level = sent_level
         self.n_workers = n_workers
@@ -100,6 +121,12 @@ class VizSeqScorer(object):
                 self.n_workers = 1
         self.n_workers = max(1, min(self.n_workers, max_n_workers))
 
+    def _get_worker_pool(self) -> ProcessPoolExecutor:
+        modules = (type(self).__module__,) + tuple(self.PRELOAD_MODULES)
+        return VizSeqWorkerPool.get(
+            self.n_workers, modules=modules, resources=self.REQUIRED_RESOURCES
+        )
+
     @staticmethod
     def _batch(hypo: List[str], ref: List[List[str]], n_batches: int):
         n_samples = len(hypo)
@@ -111,6 +138,21 @@ class VizSeqScorer(object):
             part_hypo, *part_ref = zip(*b)
             yield list(part_hypo), [list(r) for r in part_ref]
 
+    @staticmethod
+    def _batch_shards(hypo, ref: list, n_batches: int) -> Optional[list]:
+        """Batches along shard boundaries if the hypothesis and references
+        are sharded sources (see `vizseq._data.sharded`) with the same
+        layout. Batches are lazy: workers only open their own shards."""
+        if not all(hasattr(s, 'select_shards') for s in [hypo] + ref):
+            return None
+        if any(not np.array_equal(r.offsets, hypo.offsets) for r in ref):
+            return None
+        return [
+            (hypo.select_shards(b[0], b[-1] + 1),
+             [r.select_shards(b[0], b[-1] + 1) for r in ref])
+            for b in _batch(list(range(hypo.n_shards)), n_batches)
+        ]
+
     @classmethod
     @abstractmethod
     def score(
@@ -129,20 +171,25 @@ class VizSeqScorer(object):
                 hypothesis, references, extra_args=self.extra_args
             )
         else:
-            batches = list(
-                self._batch(hypothesis, references, n_batches=self.n_workers)
+            batches = self._batch_shards(
+                hypothesis, references, n_batches=self.n_workers
             )
-            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
-                futures = {
-                    executor.submit(
-                        sent_score_func, b[0], b[1], extra_args=self.extra_args
-                    ): i
-                    for i, b in enumerate(batches)
-                }
-                progress = as_completed(futures)
-                if self.verbose:
-                    progress = tqdm(progress)
-                tmp = {futures[future]: future.result() for future in progress}
+            if batches is None:
+                batches = list(self._batch(
+                    hypothesis, references, n_batches=self.n_workers
+                ))
+            executor = self._get_worker_pool()
+            futures = {
+                executor.submit(
+                    _score_batch, sent_score_func, b[0], b[1],
+                    extra_args=self.extra_args
+                ): i
+                for i, b in enumerate(batches)
+            }
+            progress = as_completed(futures)
+            if self.verbose:
+                progress = tqdm(progress)
+            tmp = {futures[future]: future.result() for future in progress}
             sent_scores = []
             for k in sorted(tmp):
                 sent_scores.extend(tmp[k])
@@ -179,8 +226,34 @@ class VizSeqScorer(object):
 
 FILE_ROOT = Path(__file__).parent
 
+# Built-in scorers: scorer ID -> (module name, scorer name). Implementation
+# modules (and their heavy dependencies) are imported on `get_scorer()` only.
+SCORER_MANIFEST = {
+    'bert_score': ('bert_score', 'BERTScore'),
+    'bleu': ('bleu', 'BLEU'),
+    'bp': ('bp', 'BP'),
+    'chrf': ('chrf', 'chrF'),
+    'cider': ('cider', 'CIDEr'),
+    'gleu': ('gleu', 'GLEU'),
+    'laser': ('laser', 'LASER'),
+    'meteor': ('meteor', 'METEOR'),
+    'nist': ('nist', 'NIST'),
+    'ribes': ('ribes', 'RIBES'),
+    'rouge_1': ('rouge', 'ROUGE-1'),
+    'rouge_2': ('rouge', 'ROUGE-2'),
+    'rouge_l': ('rouge', 'ROUGE-L'),
+    'ter': ('ter', 'TER'),
+    'wer_ins': ('wer', 'WER-Insertion'),
+    'wer_del': ('wer', 'WER-Deletion'),
+    'wer_sub': ('wer', 'WER-Substitution'),
+    'wer': ('wer', 'WER'),
+}
+
 _SCORER_REGISTRY = {}
-_SCORER_ID_TO_NAME = {}
+_SCORER_ID_TO_NAME = {k: n for k, (_, n) in SCORER_MANIFEST.items()}
+_SCORER_ID_TO_MODULE = {
+    k: f'vizseq.scorers.{m}' for k, (m, _) in SCORER_MANIFEST.items()
+}
 
 
 def register_scorer(scorer_id: str, scorer_name: str):
@@ -196,12 +269,14 @@ def register_scorer(scorer_id: str, scorer_name: str):
 
 
 def get_scorer(scorer_id: str) -> Type[VizSeqScorer]:
-    assert scorer_id in _SCORER_REGISTRY.keys()
+    if scorer_id not in _SCORER_REGISTRY and scorer_id in _SCORER_ID_TO_MODULE:
+        importlib.import_module(_SCORER_ID_TO_MODULE[scorer_id])
+    assert scorer_id in _SCORER_REGISTRY
     return _SCORER_REGISTRY[scorer_id]
 
 
 def get_scorer_ids() -> List[str]:
-    return list(_SCORER_REGISTRY.keys())
+    return list(_SCORER_ID_TO_NAME.keys())
 
 
 def get_scorer_name(scorer_id: str) -> str:
@@ -216,12 +291,14 @@ def get_scorer_ids_and_names() -> List[Tuple[str, str]]:
     return [tuple(e) for e in _SCORER_ID_TO_NAME.items()]
 
 
-# automatically import any Python files in the scorers/ directory
+# automatically import Python files in the scorers/ directory that are not
+# listed in the manifest (e.g. newly added scorers)
+_manifest_modules = set(_SCORER_ID_TO_MODULE.values())
 scorer_filenames = sorted(
     m for m in os.listdir(FILE_ROOT)
     if m.endswith(PY_FILE_EXT) and not m.startswith(EXCLUDED_PREFIXES)
 )
 for m in scorer_filenames:
     module_name = f'vizseq.scorers.{os.path.splitext(os.path.basename(m))[0]}'
-    if module_name not in sys.modules:
+    if module_name not in sys.modules and module_name not in _manifest_modules:
         importlib.import_module(module_name)
@@ -13,11 +13,13 @@
 from typing import List, Dict, Tuple
 from collections import defaultdict
 import math
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
 
 import numpy as np
 from tqdm import tqdm
 
+from vizseq._utils.worker_pool import VizSeqWorkerPool
+
 
 def _batch(a_list: list, n_batches: int):
     batch_size = len(a_list) // n_batches + int(len(a_list) % n_batches > 0)
@@ -54,15 +56,15 @@ def _multiprocess_batch_extract_n_grams(
         return _batch_extract_n_grams(sentences, n)
     else:
         batches = list(_batch(sentences, n_batches=n_workers))
-        with ProcessPoolExecutor(max_workers=n_workers) as executor:
-            futures = {
-                executor.submit(_batch_extract_n_grams, b, n): i
-                for i, b in enumerate(batches)
-            }
-            progress = as_completed(futures)
-            if verbose:
-                progress = tqdm(progress)
-            tmp = {futures[future]: future.result() for future in progress}
+        executor = VizSeqWorkerPool.get(n_workers, modules=(__name__,))
+        futures = {
+            executor.submit(_batch_extract_n_grams, b, n): i
+            for i, b in enumerate(batches)
+        }
+        progress = as_completed(futures)
+        if verbose:
+            progress = tqdm(progress)
+        tmp = {futures[future]: future.result() for future in progress}
         result = []
         for k in sorted(tmp):
             result.extend(tmp[k])
@@ -0,0 +1,86 @@
+# Copyright (c) Facebook, Inc. and its affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+from contextlib import contextmanager
+from typing import List, Optional, Callable, Sequence, Any
+
+import numpy as np
+
+from vizseq._utils.optional import get_optional_dict
+
+DEFAULT_MAX_TOKENS = 8192
+
+
+@contextmanager
+def torch_threads(n_threads: Optional[int]):
+    if n_threads is None:
+        yield
+        return
+    import torch
+    prev = torch.get_num_threads()
+    torch.set_num_threads(n_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(prev)
+
+
+def get_length_buckets(
+        lengths: Sequence[int], max_tokens: int = DEFAULT_MAX_TOKENS
+) -> List[List[int]]:
+    """Groups indices of length-sorted items into buckets whose padded size
+    (number of items x longest item) stays under `max_tokens`."""
+    order = np.argsort(np.asarray(lengths), kind='stable').tolist()
+    buckets, cur = [], []
+    for i in order:
+        cur_max_len = max(1, lengths[i])
+        if len(cur) > 0 and (len(cur) + 1) * cur_max_len > max_tokens:
+            buckets.append(cur)
+            cur = []
+        cur.append(i)
+    if len(cur) > 0:
+        buckets.append(cur)
+    return buckets
+
+
+class VizSeqEmbeddingBatcher(object):
+    def __init__(
+            self, max_tokens: int = DEFAULT_MAX_TOKENS,
+            n_threads: Optional[int] = None
+    ):
+        self.max_tokens = max_tokens
+        self.n_threads = n_threads
+
+    @classmethod
+    def from_extra_args(cls, extra_args: Optional[dict]):
+        max_tokens = get_optional_dict(
+            extra_args, 'max_tokens_per_batch', DEFAULT_MAX_TOKENS
+        )
+        n_threads = get_optional_dict(extra_args, 'n_threads', None)
+        return cls(
+            max_tokens=int(max_tokens),
+            n_threads=None if n_threads is None else int(n_threads)
+        )
+
+    @staticmethod
+    def get_n_tokens(sentence: str) -> int:
+        # whitespace tokens (+2 for BOS/EOS) approximate subword lengths well
+        # enough for bucketing
+        return len(sentence.split()) + 2
+
+    def run(
+            self, lengths: Sequence[int],
+            batch_fn: Callable[[List[int]], Sequence[Any]]
+    ) -> List[Any]:
+        """Calls `batch_fn` on buckets of item indices and returns the
+        per-item outputs in the original order."""
+        outputs = [None] * len(lengths)
+        with torch_threads(self.n_threads):
+            for bucket in get_length_buckets(lengths, self.max_tokens):
+                for i, o in zip(bucket, batch_fn(bucket)):
+                    outputs[i] = o
+        return outputs
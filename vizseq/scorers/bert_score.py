@@ -5,10 +5,121 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from vizseq.scorers import register_scorer, VizSeqScorer, VizSeqScore
+from collections import defaultdict
+from typing import List, Optional, Dict, Tuple
 
 import numpy as np
-from typing import List, Optional
+
+from vizseq.scorers import register_scorer, VizSeqScorer, VizSeqScore
+from vizseq._utils.embedding_store import VizSeqEmbeddingStore
+from vizseq._utils.cache_dir import get_content_hash
+from vizseq._utils.optional import get_optional_bool
+from vizseq.scorers._embedding_batching import VizSeqEmbeddingBatcher
+
+# process-wide BERTScorer instances (by language) and token embedding stores
+# (by model id). Each cached row holds a token embedding followed by its IDF
+# weight.
+_scorers = {}
+_stores = {}
+
+
+def _get_bert_scorer(lang: str):
+    if lang not in _scorers:
+        import bert_score as bs
+        _scorers[lang] = bs.BERTScorer(lang=lang)
+    return _scorers[lang]
+
+
+def _get_model_id(scorer) -> str:
+    return f'{scorer.model_type}.L{scorer.num_layers}'
+
+
+def _get_store(scorer) -> VizSeqEmbeddingStore:
+    model_id = _get_model_id(scorer)
+    if model_id not in _stores:
+        dim = scorer._model.config.hidden_size + 1
+        _stores[model_id] = VizSeqEmbeddingStore(f'bert_score.{model_id}', dim)
+    return _stores[model_id]
+
+
+def _get_idf_dict(
+        scorer, references: List[str], use_idf: bool
+) -> Tuple[Dict[int, float], str]:
+    if use_idf:
+        from bert_score.utils import get_idf_dict
+        return get_idf_dict(references, scorer._tokenizer), \
+            get_content_hash(references)
+    tokenizer = scorer._tokenizer
+    idf_dict = defaultdict(lambda: 1.)
+    idf_dict[tokenizer.sep_token_id] = 0
+    idf_dict[tokenizer.cls_token_id] = 0
+    return idf_dict, 'no_idf'
+
+
+def _embed_tokens(
+        scorer, sentences: List[str], idf_dict: Dict[int, float]
+) -> List[np.ndarray]:
+    from bert_score.utils import get_bert_embedding
+    embeddings, masks, idf = get_bert_embedding(
+        sentences, scorer._model, scorer._tokenizer, idf_dict,
+        batch_size=len(sentences), device=scorer.device
+    )
+    embeddings, masks = embeddings.cpu().numpy(), masks.cpu().numpy()
+    idf = idf.cpu().numpy()
+    result = []
+    for e, m, w in zip(embeddings, masks, idf):
+        m = m.astype(bool)
+        result.append(np.concatenate([e[m], w[m][:, None]], axis=1))
+    return result
+
+
+def _embed(
+        scorer, sentences: List[str], idf_dict: Dict[int, float],
+        idf_key: str, batcher: VizSeqEmbeddingBatcher
+) -> List[np.ndarray]:
+    store = _get_store(scorer)
+    model_id = _get_model_id(scorer)
+    keys = [VizSeqEmbeddingStore.get_key(s, model_id, idf_key)
+            for s in sentences]
+    cached = store.get(keys)
+    missing = {k: s for k, s, e in zip(keys, sentences, cached) if e is None}
+    if len(missing) > 0:
+        missing_keys = list(missing.keys())
+        missing_sents = [missing[k] for k in missing_keys]
+        embeddings = batcher.run(
+            [batcher.get_n_tokens(s) for s in missing_sents],
+            lambda b: _embed_tokens(
+                scorer, [missing_sents[i] for i in b], idf_dict
+            )
+        )
+        store.put(missing_keys, embeddings)
+        # entries beyond the store size limit are not cached
+        computed = {
+            k: np.asarray(e, dtype=store.dtype)
+            for k, e in zip(missing_keys, embeddings)
+        }
+        cached = [
+            computed[k] if e is None else e for k, e in zip(keys, cached)
+        ]
+    return cached
+
+
+def _greedy_match(hypo: np.ndarray, ref: np.ndarray) -> float:
+    """BERTScore F1 of one pair from its [embedding, IDF] token rows."""
+    hypo_emb, hypo_idf = hypo[:, :-1].astype(np.float32), hypo[:, -1]
+    ref_emb, ref_idf = ref[:, :-1].astype(np.float32), ref[:, -1]
+    hypo_emb /= np.linalg.norm(hypo_emb, axis=1, keepdims=True)
+    ref_emb /= np.linalg.norm(ref_emb, axis=1, keepdims=True)
+    sim = hypo_emb @ ref_emb.T
+    hypo_idf_sum, ref_idf_sum = np.sum(hypo_idf), np.sum(ref_idf)
+    # empty sentences only have the zero-weight [CLS] and [SEP] tokens
+    if hypo_idf_sum == 0 or ref_idf_sum == 0:
+        return 0.
+    precision = np.sum(sim.max(axis=1) * hypo_idf) / hypo_idf_sum
+    recall = np.sum(sim.max(axis=0) * ref_idf) / ref_idf_sum
+    if precision + recall == 0:
+        return 0.
+    return float(2 * precision * recall / (precision + recall))
 
 
 @register_scorer('bert_score', 'BERTScore')
@@ -19,7 +130,6 @@ class BERTScoreScorer(VizSeqScorer):
     ) -> VizSeqScore:
         corpus_score, sent_scores, group_scores = None, None, None
 
-        import bert_score as bs
         import langid
         import logging
         logging.getLogger('pytorch_pretrained_bert').setLevel(logging.WARNING)
@@ -27,10 +137,15 @@ class BERTScoreScorer(VizSeqScorer):
 
         lang = langid.classify(references[0][0])[0]
 
-        sent_scores = bs.score(
-            hypothesis, references[0], nthreads=self.n_workers, lang=lang,
-            verbose=self.verbose
-        )[2].tolist()
+        scorer = _get_bert_scorer(lang)
+        use_idf = get_optional_bool(self.extra_args, 'bert_score_idf', False)
+        idf_dict, idf_key = _get_idf_dict(scorer, references[0], use_idf)
+        batcher = VizSeqEmbeddingBatcher.from_extra_args(self.extra_args)
+        # references are usually shared across systems: their token
+        # embeddings come from the cache after the first call
+        ref_emb = _embed(scorer, references[0], idf_dict, idf_key, batcher)
+        hypo_emb = _embed(scorer, hypothesis, idf_dict, idf_key, batcher)
+        sent_scores = [_greedy_match(h, r) for h, r in zip(hypo_emb, ref_emb)]
 
         if self.corpus_level:
             corpus_score = np.mean(sent_scores)
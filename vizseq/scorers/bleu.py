@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from typing import List, Optional, Dict
 import argparse
 
@@ -47,6 +47,8 @@ def _get_sent_bleu(
 
 @register_scorer('bleu', 'BLEU')
 class BLEUScorer(VizSeqScorer):
+    PRELOAD_MODULES = ('sacrebleu',)
+
     def score_corpus_multiprocess(
             self, hypothesis: List[str], references: List[List[str]],
             score='score'
@@ -65,27 +67,26 @@ class BLEUScorer(VizSeqScorer):
             ref_len, sys_len = 0, 0
             correct = [0 for _ in range(BLEU.NGRAM_ORDER)]
             total = [0 for _ in range(BLEU.NGRAM_ORDER)]
-            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
-                futures = [
-                    executor.submit(
-                        scorer.corpus_score, b[0], b[1],
-                        use_effective_order=False
-                    )
-                    for b in batches
-                ]
-                progress = as_completed(futures)
-                if self.verbose:
-                    progress = tqdm(progress)
-                for future in progress:
-                    s = future.result()
-                    ref_len += s.ref_len
-                    sys_len += s.sys_len
-                    for n in range(BLEU.NGRAM_ORDER):
-                        correct[n] += s.counts[n]
-                        total[n] += s.totals[n]
-                corpus_score = scorer.compute_bleu(
-                    correct, total, sys_len, ref_len, smooth_method='exp'
+            executor = self._get_worker_pool()
+            futures = [
+                executor.submit(
+                    scorer.corpus_score, b[0], b[1], use_effective_order=False
                 )
+                for b in batches
+            ]
+            progress = as_completed(futures)
+            if self.verbose:
+                progress = tqdm(progress)
+            for future in progress:
+                s = future.result()
+                ref_len += s.ref_len
+                sys_len += s.sys_len
+                for n in range(BLEU.NGRAM_ORDER):
+                    correct[n] += s.counts[n]
+                    total[n] += s.totals[n]
+            corpus_score = scorer.compute_bleu(
+                correct, total, sys_len, ref_len, smooth_method='exp'
+            )
         proj = {'score': lambda s: s.score, 'bp': lambda s: s.bp}.get(score)
         return proj(corpus_score)
 
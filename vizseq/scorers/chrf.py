@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from typing import List, Optional, Dict
 import argparse
 
@@ -45,6 +45,8 @@ def _get_corpus_statistics(hypothesis: List[str], references: List[List[str]]):
 
 @register_scorer('chrf', 'chrF')
 class ChrFScorer(VizSeqScorer):
+    PRELOAD_MODULES = ('sacrebleu',)
+
     def score_corpus_multiprocess(
             self, hypothesis: List[str], references: List[List[str]]
     ) -> float:
@@ -56,18 +58,18 @@ class ChrFScorer(VizSeqScorer):
                 self._batch(hypothesis, references, n_batches=self.n_workers)
             )
             corpus_stats = [0 for _ in range(CHRF.ORDER * 3)]
-            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
-                futures = [
-                    executor.submit(_get_corpus_statistics, b[0], b[1])
-                    for b in batches
-                ]
-                progress = as_completed(futures)
-                if self.verbose:
-                    progress = tqdm(progress)
-                for future in progress:
-                    stats = future.result()
-                    for i in range(CHRF.ORDER * 3):
-                        corpus_stats[i] += stats[i]
+            executor = self._get_worker_pool()
+            futures = [
+                executor.submit(_get_corpus_statistics, b[0], b[1])
+                for b in batches
+            ]
+            progress = as_completed(futures)
+            if self.verbose:
+                progress = tqdm(progress)
+            for future in progress:
+                stats = future.result()
+                for i in range(CHRF.ORDER * 3):
+                    corpus_stats[i] += stats[i]
             corpus_score = scorer.compute_chrf(corpus_stats, scorer.order,
                                                scorer.beta).score
         return corpus_score
@@ -10,46 +10,93 @@ from typing import List, Optional, Dict
 import numpy as np
 
 from vizseq.scorers import register_scorer, VizSeqScorer, VizSeqScore
+from vizseq._utils.resources import VizSeqResourceManager
+from vizseq._utils.embedding_store import VizSeqEmbeddingStore
+from vizseq._utils.optional import get_optional_dict
+from vizseq.scorers._embedding_batching import VizSeqEmbeddingBatcher
 
-setup_flag = False
+LASER_MODEL_VERSION = 'bilstm.93langs.2018-12-26'
+LASER_EMBEDDING_DIM = 1024
 
+# process-wide model instance and embedding stores
+_laser = None
+_stores = {}
 
-def set_up():
-    global setup_flag
-    if setup_flag:
-        return
-    try:
+
+def _get_laser():
+    global _laser
+    if _laser is None:
+        VizSeqResourceManager.require('laser')
         import laserembeddings
-        laserembeddings.Laser().embed_sentences(['This is a test.'], lang='en')
-    except FileNotFoundError:
-        import runpy
-        import sys
-        argv = [v for v in sys.argv]
-        sys.argv = [sys.argv[0], 'download-models']
-        runpy.run_module('laserembeddings', run_name='__main__')
-        sys.argv = argv
-        setup_flag = True
+        _laser = laserembeddings.Laser()
+    return _laser
+
+
+def _get_store(dtype: str) -> VizSeqEmbeddingStore:
+    if dtype not in _stores:
+        _stores[dtype] = VizSeqEmbeddingStore(
+            'laser', LASER_EMBEDDING_DIM, dtype=dtype
+        )
+    return _stores[dtype]
+
+
+def _embed(
+        sentences: List[str], lang: str, dtype: str,
+        batcher: VizSeqEmbeddingBatcher
+) -> np.ndarray:
+    store = _get_store(dtype)
+    keys = [
+        VizSeqEmbeddingStore.get_key(s, LASER_MODEL_VERSION, lang)
+        for s in sentences
+    ]
+    cached = store.get(keys)
+    missing = {k: s for k, s, e in zip(keys, sentences, cached) if e is None}
+    if len(missing) > 0:
+        missing_keys = list(missing.keys())
+        missing_sents = [missing[k] for k in missing_keys]
+        laser = _get_laser()
+        embeddings = batcher.run(
+            [batcher.get_n_tokens(s) for s in missing_sents],
+            lambda b: laser.embed_sentences(
+                [missing_sents[i] for i in b], lang=lang
+            )
+        )
+        store.put(missing_keys, embeddings)
+        # entries beyond the store size limit are not cached
+        computed = dict(zip(missing_keys, embeddings))
+        cached = [
+            computed[k] if e is None else e for k, e in zip(keys, cached)
+        ]
+    if len(cached) == 0:
+        return np.zeros((0, LASER_EMBEDDING_DIM), dtype=np.float32)
+    return np.concatenate(
+        [np.asarray(e, dtype=store.dtype).reshape(-1, store.dim)
+         for e in cached]
+    ).astype(np.float32)
 
 
 def _get_sent_laser(
         hypothesis: List[str], references: List[List[str]],
         extra_args: Optional[Dict[str, str]] = None
 ) -> List[float]:
-    set_up()
+    VizSeqResourceManager.require('laser')
 
-    import laserembeddings
     import langid
     import logging
     logging.getLogger('langid').setLevel(logging.WARNING)
 
     n_samples = len(hypothesis)
+    if n_samples == 0:
+        return []
     mid_idx = n_samples // 2
     hypo_lang = langid.classify(hypothesis[mid_idx])[0]
     ref_lang = langid.classify(references[0][mid_idx])[0]
 
-    laser = laserembeddings.Laser()
-    hypo_emb = laser.embed_sentences(hypothesis, lang=hypo_lang)
-    ref_emb = laser.embed_sentences(references[0], lang=ref_lang)
+    # float16 halves the cache size at a small cost in precision
+    dtype = get_optional_dict(extra_args, 'laser_cache_dtype', 'float32')
+    batcher = VizSeqEmbeddingBatcher.from_extra_args(extra_args)
+    hypo_emb = _embed(hypothesis, hypo_lang, dtype, batcher)
+    ref_emb = _embed(references[0], ref_lang, dtype, batcher)
 
     inner_product = np.sum(hypo_emb * ref_emb, axis=1)
     hypo_l2 = np.linalg.norm(hypo_emb, axis=1)
@@ -59,13 +106,17 @@ def _get_sent_laser(
 
 @register_scorer('laser', 'LASER')
 class LaserScorer(VizSeqScorer):
+    REQUIRED_RESOURCES = ('laser',)
+
     def score(
             self, hypothesis: List[str], references: List[List[str]],
             tags: Optional[List[List[str]]] = None
     ) -> VizSeqScore:
         corpus_score, group_scores, sent_scores = None, None, None
 
-        sent_scores = _get_sent_laser(hypothesis, references)
+        sent_scores = _get_sent_laser(
+            hypothesis, references, extra_args=self.extra_args
+        )
 
         if self.corpus_level:
             corpus_score = np.mean(sent_scores)
@@ -8,14 +8,10 @@
 from typing import List, Optional, Dict
 
 from nltk.translate.meteor_score import meteor_score
-import nltk
 
 from vizseq.scorers import register_scorer, VizSeqScorer, VizSeqScore
 
 
-nltk.download('wordnet', quiet=True)
-
-
 def _get_sent_meteor(
         hypothesis: List[str], references: List[List[str]],
         extra_args: Optional[Dict[str, str]] = None
@@ -28,6 +24,9 @@ def _get_sent_meteor(
 
 @register_scorer('meteor', 'METEOR')
 class METEORScorer(VizSeqScorer):
+    REQUIRED_RESOURCES = ('wordnet',)
+    PRELOAD_MODULES = ('nltk.translate.meteor_score', 'nltk.corpus')
+
     def score(
             self, hypothesis: List[str], references: List[List[str]],
             tags: Optional[List[List[str]]] = None
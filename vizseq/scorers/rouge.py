@@ -8,14 +8,10 @@
 from typing import List, Optional, Dict
 
 import rouge as _rouge
-import nltk
 
 from vizseq.scorers import register_scorer, VizSeqScorer, VizSeqScore
 
 
-nltk.download('punkt', quiet=True)
-
-
 STATS_TYPE = 'f'
 
 
@@ -56,6 +52,9 @@ def _get_sent_rouge_l(
 
 @register_scorer('rouge_1', 'ROUGE-1')
 class Rouge1Scorer(VizSeqScorer):
+    REQUIRED_RESOURCES = ('punkt',)
+    PRELOAD_MODULES = ('rouge', 'nltk.stem.porter')
+
     def score(
             self, hypothesis: List[str], references: List[List[str]],
             tags: Optional[List[List[str]]] = None
@@ -67,6 +66,9 @@ class Rouge1Scorer(VizSeqScorer):
 
 @register_scorer('rouge_2', 'ROUGE-2')
 class Rouge2Scorer(VizSeqScorer):
+    REQUIRED_RESOURCES = ('punkt',)
+    PRELOAD_MODULES = ('rouge', 'nltk.stem.porter')
+
     def score(
             self, hypothesis: List[str], references: List[List[str]],
             tags: Optional[List[List[str]]] = None
@@ -78,6 +80,9 @@ class Rouge2Scorer(VizSeqScorer):
 
 @register_scorer('rouge_l', 'ROUGE-L')
 class RougeLScorer(VizSeqScorer):
+    REQUIRED_RESOURCES = ('punkt',)
+    PRELOAD_MODULES = ('rouge', 'nltk.stem.porter')
+
     def score(
             self, hypothesis: List[str], references: List[List[str]],
             tags: Optional[List[List[str]]] = None
@@ -8,15 +8,23 @@
 import os
 import os.path as op
 import argparse
-from typing import List
+import asyncio
+import hashlib
+import datetime
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
 
 from vizseq._utils.logger import logger
 
 from vizseq._view import VizSeqWebView, DEFAULT_PAGE_SIZE, DEFAULT_PAGE_NO
 from vizseq._data.zip_file import VizSeqZipFile
-from vizseq._data import get_g_translate, VizSeqGlobalConfigManager
+from vizseq._data import (get_g_translate, VizSeqGlobalConfigManager,
+                          VizSeqMediaInfo, VizSeqThumbnailCache,
+                          VizSeqThumbnailError, THUMBNAIL_WIDTHS)
 from vizseq._visualizers import SPAN_HIGHTLIGHT_JS
 from vizseq._utils import VizSeqJson
+from vizseq._utils.worker_pool import VizSeqWorkerPool
+from vizseq._utils.cache_manager import VizSeqCacheManager
 from vizseq import __version__
 
 from tornado import web, ioloop
@@ -33,6 +41,11 @@ parser.add_argument('--port', type=int, default=DEFAULT_PORT,
 parser.add_argument('--data-root', type=str, default='./examples/data',
                     help='root path to data')
 parser.add_argument('--debug', action='store_true', help='debug mode')
+parser.add_argument(
+    '--cache-budget-mb', type=int,
+    default=VizSeqCacheManager.DEFAULT_BUDGET_BYTES // 1024 ** 2,
+    help='memory budget (MB) for cached data sources, scores and responses'
+)
 args, _ = parser.parse_known_args()
 
 env = Environment(
@@ -49,6 +62,8 @@ class VizSeqBaseRequestHandler(web.RequestHandler):
             'p_no': str(self.get_page_no_arg()),
             's': str(self.get_sorting_arg()),
             's_metric': self.get_sorting_metric_arg(),
+            'k': str(self.get_top_k_arg()),
+            'best': '1' if self.get_top_k_best_arg() else '0',
         }
 
     def get_task_arg(self) -> str:
@@ -84,6 +99,47 @@ class VizSeqBaseRequestHandler(web.RequestHandler):
     def get_sorting_metric_arg(self) -> str:
         return self.get_query_argument('s_metric', '')
 
+    def get_top_k_arg(self) -> int:
+        top_k = self.get_query_argument('k', '')
+        if len(top_k) == 0:
+            top_k = '0'
+        if not top_k.isdigit():
+            raise web.HTTPError(400)
+        return int(top_k)
+
+    def get_top_k_best_arg(self) -> bool:
+        return self.get_query_argument('best', '0') == '1'
+
+    def get_data_etag(self) -> str:
+        """ETag derived from the task data version and the request URL (no
+        need to compute the response)."""
+        version = VizSeqWebView.get_data_version(
+            args.data_root, self.get_task_arg()
+        )
+        key = f'{__version__}:{version}:{self.request.uri}'
+        return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '"'
+
+    def is_data_not_modified(self) -> bool:
+        """Lets clients revalidate task data responses without them being
+        recomputed. Returns True (with a 304 status) if the client's copy is
+        current."""
+        self.set_header('Cache-Control', 'no-cache')
+        if self.request.headers.get('If-None-Match', None) is None:
+            return False
+        self.set_header('ETag', self.get_data_etag())
+        if self.check_etag_header():
+            self.set_status(304)
+            return True
+        self.clear_header('ETag')
+        return False
+
+    def compute_etag(self) -> Optional[str]:
+        # computed once the response is written (which may have updated the
+        # task config)
+        if self.get_query_argument('t', '') != '':
+            return self.get_data_etag()
+        return super().compute_etag()
+
 
 class TaskListHandler(VizSeqBaseRequestHandler):
     def get(self):
@@ -97,6 +153,8 @@ class TaskListHandler(VizSeqBaseRequestHandler):
 
 class ViewHandler(VizSeqBaseRequestHandler):
     def get(self):
+        if self.is_data_not_modified():
+            return
         url_args = self.get_url_args()
         models = self.get_models_arg()
         task = self.get_task_arg()
@@ -104,10 +162,11 @@ class ViewHandler(VizSeqBaseRequestHandler):
         query = self.get_query_arg()
         sorting = self.get_sorting_arg()
         s_metric = self.get_sorting_metric_arg()
+        top_k, top_k_best = self.get_top_k_arg(), self.get_top_k_best_arg()
         wv = VizSeqWebView(
             args.data_root, task, models=models, page_sz=page_sz,
             page_no=page_no, query=query, sorting=sorting,
-            sorting_metric=s_metric
+            sorting_metric=s_metric, top_k=top_k, top_k_best=top_k_best
         )
         pd = wv.get_page_data()
         html = env.get_template('view.html').render(
@@ -126,17 +185,23 @@ class ViewHandler(VizSeqBaseRequestHandler):
             ref=pd.viz_ref, hypo=pd.viz_hypo, n_samples=pd.n_samples,
             cur_sent_scores=pd.viz_sent_scores, description=wv.description,
             tokenization=wv.tokenization, all_tokenization=wv.all_tokenization,
-            total_examples=pd.total_examples, n_cur_samples=pd.n_cur_samples
+            total_examples=pd.total_examples, n_cur_samples=pd.n_cur_samples,
+            query_error=pd.query_error, top_k=top_k, top_k_best=top_k_best,
+            top_k_options=wv.top_k_options
         )
         self.write(html)
 
 
 class PageDataHandler(VizSeqBaseRequestHandler):
     def get(self):
+        if self.is_data_not_modified():
+            return
         wv = VizSeqWebView(
             args.data_root, self.get_task_arg(), models=self.get_models_arg(),
             page_sz=self.get_page_sz_arg(), page_no=self.get_page_no_arg(),
-            query=self.get_query_arg(), sorting=self.get_sorting_arg()
+            query=self.get_query_arg(), sorting=self.get_sorting_arg(),
+            sorting_metric=self.get_sorting_metric_arg(),
+            top_k=self.get_top_k_arg(), top_k_best=self.get_top_k_best_arg()
         )
         page_data_json = wv.get_page_data_with_pagination()
         self.write(page_data_json)
@@ -154,7 +219,10 @@ class TaskCfgHandler(VizSeqBaseRequestHandler):
         cfg_metrics = cfg_metrics.split(',') if len(cfg_metrics) > 0 else []
         cfg.set_metrics(cfg_metrics)
         tokenization = self.get_query_argument('tkn', '')
-        cfg.set_tokenization(tokenization)
+        if len(tokenization) > 0:
+            cfg.set_tokenization(tokenization)
+        # without inotify, the write is only seen at the next poll
+        VizSeqWebView.invalidate_cfg(args.data_root, task)
         self.finish(f'Task "{task}" Config updated.')
 
 
@@ -203,6 +271,8 @@ class GTranslateHandler(VizSeqBaseRequestHandler):
 
 class StatsHandler(VizSeqBaseRequestHandler):
     def get(self):
+        if self.is_data_not_modified():
+            return
         task = self.get_task_arg()
         response = VizSeqWebView(args.data_root, task).get_stats()
         self.write(response)
@@ -210,6 +280,8 @@ class StatsHandler(VizSeqBaseRequestHandler):
 
 class ScoresHandler(VizSeqBaseRequestHandler):
     def get(self):
+        if self.is_data_not_modified():
+            return
         response = VizSeqWebView(
             args.data_root, self.get_task_arg(), self.get_models_arg()
         ).get_scores()
@@ -218,11 +290,191 @@ class ScoresHandler(VizSeqBaseRequestHandler):
 
 class NGramsHandler(VizSeqBaseRequestHandler):
     def get(self):
+        if self.is_data_not_modified():
+            return
         task = self.get_task_arg()
         response = VizSeqWebView(args.data_root, task).get_n_grams()
         self.write(response)
 
 
+def _parse_byte_range(
+        range_header: str, size: int
+) -> Optional[Tuple[int, int]]:
+    """Parses a single "bytes=" range into [start, end). Returns None if the
+    range is invalid or not satisfiable."""
+    unit, _, spec = range_header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+    start, _, end = spec.strip().partition('-')
+    try:
+        if len(start) == 0:
+            # suffix range: the last N bytes
+            start, end = max(size - int(end), 0), size
+        else:
+            start = int(start)
+            end = size if len(end) == 0 else min(int(end) + 1, size)
+    except ValueError:
+        return None
+    if start >= end:
+        return None
+    return start, end
+
+
+class MediaHandler(VizSeqBaseRequestHandler):
+    """Streams images, audio and video of sources (loose files or zip
+    members), with validators for browser caching and range requests for
+    seeking."""
+    CHUNK_SIZE = 256 * 1024
+
+    def compute_etag(self) -> Optional[str]:
+        # set explicitly from file metadata, never from the response body
+        return None
+
+    @classmethod
+    def get_etag(cls, info: VizSeqMediaInfo) -> str:
+        key = f'{info.path}:{info.member}:{info.size}:{info.mtime}'
+        return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '"'
+
+    def is_not_modified(
+            self, etag: str, last_modified: datetime.datetime
+    ) -> bool:
+        if_none_match = self.request.headers.get('If-None-Match', None)
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return etag in tags or '*' in tags
+        if_modified_since = self.request.headers.get('If-Modified-Since', None)
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(if_modified_since) >= \
+                       last_modified
+            except (TypeError, ValueError):
+                pass
+        return False
+
+    def set_default_headers(self):
+        self.set_header('Accept-Ranges', 'bytes')
+
+    @classmethod
+    async def get_thumbnail_info(
+            cls, info: VizSeqMediaInfo, width: int
+    ) -> VizSeqMediaInfo:
+        cache = VizSeqThumbnailCache()
+        path = cache.get_path(info, width)
+        if not op.exists(path):
+            await asyncio.wrap_future(cache.submit(info))
+        stat = os.stat(path)
+        return VizSeqMediaInfo(
+            path=path, member=None, size=stat.st_size, mtime=stat.st_mtime,
+            mime_type=VizSeqThumbnailCache.get_mime_type()
+        )
+
+    async def get(self):
+        idx = self.get_query_argument('i', '')
+        if not idx.isdigit():
+            raise web.HTTPError(400)
+        info = VizSeqWebView.get_media_info(
+            args.data_root, self.get_task_arg(), self.get_query_argument('s'),
+            int(idx)
+        )
+        if info is None:
+            raise web.HTTPError(404)
+        immutable = False
+        width = self.get_query_argument('w', None)
+        if width is not None and VizSeqThumbnailCache.is_supported(info):
+            if not width.isdigit() or int(width) not in THUMBNAIL_WIDTHS:
+                raise web.HTTPError(400)
+            version = VizSeqThumbnailCache.get_version(info)
+            try:
+                info = await self.get_thumbnail_info(info, int(width))
+            except VizSeqThumbnailError:
+                # served as it is: the browser may still be able to show it
+                pass
+            else:
+                # the URL is versioned by image identity: never revalidate
+                immutable = self.get_query_argument('v', None) == version
+        etag = self.get_etag(info)
+        last_modified = datetime.datetime.fromtimestamp(
+            int(info.mtime), tz=datetime.timezone.utc
+        )
+        self.set_header('Content-Type', info.mime_type)
+        self.set_header('ETag', etag)
+        self.set_header('Last-Modified', last_modified)
+        if immutable:
+            self.set_header(
+                'Cache-Control', 'public, max-age=31536000, immutable'
+            )
+        else:
+            # cacheable, but revalidated (cheaply) against the ETag
+            self.set_header('Cache-Control', 'no-cache')
+        if self.is_not_modified(etag, last_modified):
+            self.set_status(304)
+            return
+
+        start, end = 0, info.size
+        range_header = self.request.headers.get('Range', None)
+        if_range = self.request.headers.get('If-Range', None)
+        if range_header is not None and if_range in {None, etag}:
+            byte_range = _parse_byte_range(range_header, info.size)
+            if byte_range is None:
+                self.set_status(416)
+                self.set_header('Content-Range', f'bytes */{info.size}')
+                return
+            start, end = byte_range
+            self.set_status(206)
+            self.set_header(
+                'Content-Range', f'bytes {start}-{end - 1}/{info.size}'
+            )
+        self.set_header('Content-Length', end - start)
+        if self.request.method == 'HEAD':
+            return
+
+        # file reads happen off the IO loop
+        loop = ioloop.IOLoop.current()
+        with info.open() as f:
+            if start > 0:
+                await loop.run_in_executor(None, f.seek, start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = await loop.run_in_executor(
+                    None, f.read, min(self.CHUNK_SIZE, remaining)
+                )
+                if len(chunk) == 0:
+                    break
+                remaining -= len(chunk)
+                self.write(chunk)
+                await self.flush()
+
+    async def head(self):
+        await self.get()
+
+
+class PeaksHandler(VizSeqBaseRequestHandler):
+    async def get(self):
+        try:
+            ids = [int(i) for i in self.get_query_argument('i').split(',')]
+        except ValueError:
+            raise web.HTTPError(400)
+        # decoding (if not precomputed) happens off the IO loop
+        response = await ioloop.IOLoop.current().run_in_executor(
+            None, VizSeqWebView.get_waveform_peaks, args.data_root,
+            self.get_task_arg(), self.get_query_argument('s'), ids
+        )
+        if response is None:
+            raise web.HTTPError(404)
+        self.set_header('Content-Type', 'application/json')
+        self.write(response)
+
+
+class CacheStatsHandler(VizSeqBaseRequestHandler):
+    def get(self):
+        stats = VizSeqCacheManager.get_stats()
+        self.set_header('Cache-Control', 'no-store')
+        self.write({
+            'budget_bytes': VizSeqCacheManager.get_budget(),
+            'stats': {n: s.to_dict() for n, s in stats.items()}
+        })
+
+
 class AboutHandler(VizSeqBaseRequestHandler):
     def get(self):
         html = env.get_template('about.html').render(
@@ -231,8 +483,8 @@ class AboutHandler(VizSeqBaseRequestHandler):
         self.write(html)
 
 
-def start_server(hostname=DEFAULT_HOSTNAME, port=DEFAULT_PORT, debug=False):
-    app = web.Application([
+def make_app(debug=False) -> web.Application:
+    return web.Application([
         (r'/', TaskListHandler),
         (r'/view', ViewHandler),
         (r'/config', ConfigHandler),
@@ -244,7 +496,20 @@ def start_server(hostname=DEFAULT_HOSTNAME, port=DEFAULT_PORT, debug=False):
         (r'/ngrams', NGramsHandler),
         (r'/page_data', PageDataHandler),
         (r'/task_cfg', TaskCfgHandler),
+        (r'/media', MediaHandler),
+        (r'/peaks', PeaksHandler),
+        (r'/cache_stats', CacheStatsHandler),
     ], debug=debug)
+
+
+def start_server(hostname=DEFAULT_HOSTNAME, port=DEFAULT_PORT, debug=False,
+                 cache_budget_mb: Optional[int] = None):
+    if cache_budget_mb is not None:
+        VizSeqCacheManager.set_budget(cache_budget_mb * 1024 ** 2)
+    # forking a multi-threaded server is unsafe: scorer workers are started
+    # from a fork server with the scorer modules preloaded instead
+    VizSeqWorkerPool.set_start_method('forkserver')
+    app = make_app(debug=debug)
     app.listen(port, max_buffer_size=1024 ** 3)
     logger.info("Application Started")
     print(f'You can navigate to http://{hostname}:{port}')
@@ -252,4 +517,4 @@ def start_server(hostname=DEFAULT_HOSTNAME, port=DEFAULT_PORT, debug=False):
 
 
 if __name__ == '__main__':
-    start_server(args.hostname, args.port, args.debug)
+    start_server(args.hostname, args.port, args.debug, args.cache_budget_mb)